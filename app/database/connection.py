@@ -1,22 +1,72 @@
 import os
 
 from sqlalchemy import MetaData, create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database.pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    register_pool_gauges,
+)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./tictactoe.db")
 
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its async driver"""
+    if url.startswith("sqlite"):
+        return "sqlite+aiosqlite" + url[url.index(":") :]
+    if url.startswith("postgresql"):
+        return "postgresql+asyncpg" + url[url.index(":") :]
+    return url
+
+
+def pool_options() -> dict:
+    """Connection pool settings, sized per worker from the environment"""
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
 else:
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(
+        DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_options()
+    )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **pool_options()
+    )
+    register_pool_gauges(engine, InstrumentedQueuePool.metrics_prefix)
+    register_pool_gauges(async_engine, InstrumentedAsyncQueuePool.metrics_prefix)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay usable after commit; reloading them would need an await
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
 
 Base = declarative_base()
 metadata = MetaData()
 
 
+def dialect_insert(db: Session):
+    """INSERT construct with ON CONFLICT support for the session's database"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
 def get_db():
     """Get database session"""
     db = SessionLocal()
@@ -24,3 +74,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Get async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,47 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.services.metrics_service import metrics
+
+
+class _InstrumentedPoolMixin:
+    """Record checkout wait time, timeouts and overflow connections"""
+
+    metrics_prefix = "db.pool"
+
+    def _do_get(self):
+        overflow = self.overflow()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            metrics.increment(f"{self.metrics_prefix}.timeouts")
+            raise
+        metrics.observe(
+            f"{self.metrics_prefix}.checkout_wait", time.perf_counter() - start
+        )
+        if self.overflow() > max(overflow, 0):
+            metrics.increment(f"{self.metrics_prefix}.overflow_events")
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool for the sync engine"""
+
+    metrics_prefix = "db.pool"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """QueuePool for the async engine"""
+
+    metrics_prefix = "db.async_pool"
+
+
+def register_pool_gauges(engine, prefix: str):
+    """Expose live pool usage; read through the engine so dispose() is safe"""
+    metrics.register_gauge(f"{prefix}.size", lambda: engine.pool.size())
+    metrics.register_gauge(f"{prefix}.in_use", lambda: engine.pool.checkedout())
+    metrics.register_gauge(f"{prefix}.idle", lambda: engine.pool.checkedin())
+    metrics.register_gauge(f"{prefix}.overflow", lambda: engine.pool.overflow())
@@ -0,0 +1,118 @@
+import json
+from typing import NamedTuple
+
+# Bit i of a mask is board position i (0-8, row by row)
+FULL_MASK = 0x1FF
+WIN_MASKS = (
+    0b000000111,
+    0b000111000,
+    0b111000000,  # Rows
+    0b001001001,
+    0b010010010,
+    0b100100100,  # Columns
+    0b100010001,
+    0b001010100,  # Diagonals
+)
+
+# Base-3 encoding: each cell is a digit ("" = 0, "X" = 1, "O" = 2)
+BOARD_CODES = 3**9
+_POWERS = tuple(3**i for i in range(9))
+_TERNARY = tuple(
+    sum(power for i, power in enumerate(_POWERS) if mask >> i & 1)
+    for mask in range(FULL_MASK + 1)
+)
+_CELL_JSON = ('""', '"X"', '"O"')
+
+
+class Board(NamedTuple):
+    """Immutable 3x3 board stored as one 9-bit mask per player"""
+
+    x: int = 0
+    o: int = 0
+
+    @classmethod
+    def from_list(cls, cells: list[str]) -> "Board":
+        """Build a board from the API form: a list of 9 "", "X" or "O" strings"""
+        x = o = 0
+        for i, cell in enumerate(cells):
+            if cell == "X":
+                x |= 1 << i
+            elif cell == "O":
+                o |= 1 << i
+        return cls(x, o)
+
+    @classmethod
+    def from_json(cls, board_state: str | None) -> "Board":
+        """Build a board from its JSON text form"""
+        return cls.from_list(json.loads(board_state)) if board_state else cls()
+
+    @classmethod
+    def from_code(cls, code: int) -> "Board":
+        """Build a board from its base-3 integer encoding"""
+        x = o = 0
+        for i in range(9):
+            code, digit = divmod(code, 3)
+            if digit == 1:
+                x |= 1 << i
+            elif digit == 2:
+                o |= 1 << i
+        return cls(x, o)
+
+    @classmethod
+    def coerce(cls, board: "Board | list[str]") -> "Board":
+        """Accept either a Board or the list form"""
+        return board if isinstance(board, Board) else cls.from_list(board)
+
+    @property
+    def code(self) -> int:
+        """Base-3 integer encoding in range(BOARD_CODES)"""
+        return _TERNARY[self.x] + 2 * _TERNARY[self.o]
+
+    @property
+    def occupied(self) -> int:
+        """Mask of filled positions"""
+        return self.x | self.o
+
+    def to_list(self) -> list[str]:
+        """Convert to the API form"""
+        return [self.cell(i) for i in range(9)]
+
+    def to_json(self) -> str:
+        """Convert to the compact JSON text form"""
+        return "[" + ",".join(_CELL_JSON[self._digit(i)] for i in range(9)) + "]"
+
+    def cell(self, position: int) -> str:
+        """Get the mark at a position ("" when empty)"""
+        return ("", "X", "O")[self._digit(position)]
+
+    def is_empty(self, position: int) -> bool:
+        """Check whether a position is on the board and free"""
+        return 0 <= position <= 8 and not self.occupied >> position & 1
+
+    def empty_positions(self) -> list[int]:
+        """List free positions in ascending order"""
+        free = ~self.occupied & FULL_MASK
+        return [i for i in range(9) if free >> i & 1]
+
+    def play(self, position: int, mark: str) -> "Board":
+        """Return a new board with mark placed at position"""
+        bit = 1 << position
+        if mark == "X":
+            return Board(self.x | bit, self.o)
+        return Board(self.x, self.o | bit)
+
+    def winner(self) -> str | None:
+        """Get the winning mark, if any"""
+        for mask in WIN_MASKS:
+            if self.x & mask == mask:
+                return "X"
+            if self.o & mask == mask:
+                return "O"
+        return None
+
+    def is_full(self) -> bool:
+        """Check if every position is filled"""
+        return self.occupied.bit_count() == 9
+
+    def _digit(self, position: int) -> int:
+        return (self.x >> position & 1) + 2 * (self.o >> position & 1)
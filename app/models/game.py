@@ -1,13 +1,22 @@
 import enum
-import json
 from datetime import datetime
 
-from pydantic import BaseModel, Field
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, Text
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.database.connection import Base
+from app.models.board import Board
 
 
 class GameStatus(str, enum.Enum):
@@ -31,9 +40,9 @@ class Game(Base):
         Integer, ForeignKey("users.id"), nullable=True
     )  # Can be null for AI games
     player2_type = Column(Enum(PlayerType), default=PlayerType.HUMAN)
-    board_state = Column(
-        Text, default='["","","","","","","","",""]'
-    )  # JSON string of 3x3 board
+    board_code = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )  # Base-3 encoded 3x3 board, see app.models.board
     current_turn = Column(String(1), default="X")  # X or O
     status = Column(Enum(GameStatus), default=GameStatus.WAITING)
     winner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -41,12 +50,29 @@ class Game(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
+    # Bumped on every write; updates only apply if the row is unchanged since
+    # it was read (UPDATE ... WHERE id = ? AND version = ?)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     player1 = relationship("User", foreign_keys=[player1_id])
     player2 = relationship("User", foreign_keys=[player2_id])
     winner = relationship("User", foreign_keys=[winner_id])
 
+    __table_args__ = (
+        # Active games list: filter on status, newest first
+        Index("ix_games_status_created_at", status, created_at.desc()),
+        Index("ix_games_player1_id", player1_id),
+        # AI games have no player2, so only index human opponents
+        Index(
+            "ix_games_player2_id",
+            player2_id,
+            postgresql_where=player2_id.isnot(None),
+            sqlite_where=player2_id.isnot(None),
+        ),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
 
 class GameObserver(Base):
     __tablename__ = "game_observers"
@@ -60,12 +86,43 @@ class GameObserver(Base):
     game = relationship("Game")
     user = relationship("User")
 
+    __table_args__ = (
+        # One row per observer; also serves per-game observer counts
+        Index("uq_game_observers_game_user", game_id, user_id, unique=True),
+    )
+
+
+class GameMoveRecord(Base):
+    """Append-only log of moves; a game's board can be rebuilt from it"""
+
+    __tablename__ = "game_moves"
+
+    game_id = Column(Integer, ForeignKey("games.id"), primary_key=True)
+    seq = Column(Integer, primary_key=True)  # Game.total_moves after the move
+    position = Column(SmallInteger, nullable=False)
+    mark = Column(String(1), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 
 # Pydantic models
 class GameMove(BaseModel):
     position: int = Field(..., ge=0, le=8, description="Board position 0-8")
 
 
+class GameMoveEvent(BaseModel):
+    """A single move, sent to observers instead of the whole game"""
+
+    class Config:
+        use_enum_values = True
+
+    game_id: int
+    seq: int  # total_moves after this move; snapshots carry the same counter
+    position: int
+    mark: str
+    status: GameStatus
+    winner_id: int | None = None
+
+
 class GameCreate(BaseModel):
     class Config:
         use_enum_values = True
@@ -93,7 +150,7 @@ class GameResponse(BaseModel):
 
     @classmethod
     def from_orm(cls, game: Game):
-        board_state = json.loads(game.board_state) if game.board_state else [""] * 9
+        board_state = Board.from_code(game.board_code or 0).to_list()
         return cls(
             id=game.id,
             player1_id=game.player1_id,
@@ -123,6 +180,16 @@ class GameListItem(BaseModel):
     observer_count: int = 0
 
 
+class GameMoveItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    seq: int
+    position: int
+    mark: str
+    # Unset until the move is written to the database
+    created_at: datetime | None = None
+
+
 class WebSocketMessage(BaseModel):
     type: str
     data: dict
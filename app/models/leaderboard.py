@@ -1,5 +1,7 @@
+import enum
+
 from pydantic import BaseModel
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -25,6 +27,45 @@ class UserStats(Base):
     user = relationship("User")
 
 
+class LeaderboardWindow(enum.StrEnum):
+    ALL = "all"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class UserStatsPeriod(Base):
+    """A user's results within one day, week or month
+
+    Day buckets are added to as games finish; week and month buckets are
+    rolled up from them.
+    """
+
+    __tablename__ = "user_stats_periods"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    period = Column(String(5), primary_key=True)  # day, week or month
+    period_start = Column(Date, primary_key=True)
+    games_played = Column(Integer, nullable=False, default=0)
+    games_won = Column(Integer, nullable=False, default=0)
+    games_lost = Column(Integer, nullable=False, default=0)
+    games_drawn = Column(Integer, nullable=False, default=0)
+    total_moves = Column(Integer, nullable=False, default=0)
+    win_rate = Column(Float, nullable=False, default=0.0)
+    avg_moves_per_game = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        # Ranking within a window, and the rollup's scan of a range of days
+        Index(
+            "ix_user_stats_periods_ranking",
+            period,
+            period_start,
+            win_rate.desc(),
+            games_played.desc(),
+        ),
+    )
+
+
 # Pydantic models
 class UserStatsResponse(BaseModel):
     user_id: int
@@ -1,10 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.connection import get_db
-from app.models.user import Token, User, UserCreate, UserLogin, UserResponse
-from app.services.user_service import UserService
+from app.database.connection import get_async_db
+from app.models.user import Token, UserCreate, UserLogin, UserResponse
+from app.services.rate_limit_service import (
+    TOO_MANY_REQUESTS,
+    USER_LIMITS,
+    USERNAME_LIMITS,
+    rate_limiter,
+    retry_after_header,
+)
+from app.services.user_service import (
+    AsyncUserService,
+    PasswordHasherBusyError,
+    UserService,
+    user_cache,
+)
 
 router = APIRouter()
 security = HTTPBearer()
@@ -12,10 +24,9 @@ security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """Get current authenticated user"""
-    user = UserService.get_user_from_token(db, credentials.credentials)
+) -> UserResponse:
+    """Get current authenticated user, usually without touching the database"""
+    user = await user_cache.get_user_from_token(credentials.credentials)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -25,23 +36,61 @@ async def get_current_user(
     return user
 
 
+def rate_limited(action: str):
+    """Dependency getting the current user, if they are within the
+    USER_LIMITS[action] rate limit"""
+
+    async def check_rate_limit(
+        current_user: UserResponse = Depends(get_current_user),
+    ) -> UserResponse:
+        retry_after = await rate_limiter.hit(
+            f"user:{action}", current_user.id, USER_LIMITS[action]
+        )
+        if retry_after is not None:
+            raise throttled(retry_after)
+        return current_user
+
+    return check_rate_limit
+
+
+def throttled(retry_after: float) -> HTTPException:
+    """429 telling the client how long to back off"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=TOO_MANY_REQUESTS,
+        headers=retry_after_header(retry_after),
+    )
+
+
+def busy(e: PasswordHasherBusyError) -> HTTPException:
+    """503 for a sign-in turned away because password hashing is saturated"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=Token)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    if UserService.get_user_by_username(db, user_data.username):
+    if await AsyncUserService.get_user_by_username(db, user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered",
         )
 
-    if UserService.get_user_by_email(db, user_data.email):
+    if await AsyncUserService.get_user_by_email(db, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
-    user = UserService.create_user(db, user_data)
-    access_token = UserService.create_access_token({"sub": user.username})
+    try:
+        user = await AsyncUserService.create_user(db, user_data)
+    except PasswordHasherBusyError as e:
+        raise busy(e) from e
+    access_token = UserService.create_user_token(user)
 
     return Token(
         access_token=access_token,
@@ -51,9 +100,20 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login user"""
-    user = UserService.authenticate_user(db, user_data.username, user_data.password)
+    # Guessing one account's password from many addresses is still limited
+    retry_after = await rate_limiter.hit(
+        "username:login", user_data.username, USERNAME_LIMITS["login"]
+    )
+    if retry_after is not None:
+        raise throttled(retry_after)
+    try:
+        user = await AsyncUserService.authenticate_user(
+            db, user_data.username, user_data.password
+        )
+    except PasswordHasherBusyError as e:
+        raise busy(e) from e
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,7 +121,7 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = UserService.create_access_token({"sub": user.username})
+    access_token = UserService.create_user_token(user)
 
     return Token(
         access_token=access_token,
@@ -71,6 +131,8 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: UserResponse = Depends(get_current_user),
+):
     """Get current user information"""
-    return UserResponse.model_validate(current_user)
+    return current_user
@@ -1,40 +1,68 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-
-from app.database.connection import get_db
-from app.models.game import GameCreate, GameListItem, GameMove, GameResponse
-from app.models.user import User
-from app.routers.auth import get_current_user
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.connection import get_async_db
+from app.models.game import (
+    GameCreate,
+    GameListItem,
+    GameMove,
+    GameMoveItem,
+    GameResponse,
+)
+from app.models.user import UserResponse
+from app.routers.auth import get_current_user, rate_limited
 from app.routers.websocket import get_websocket_manager
-from app.services.game_service import GameService
+from app.services.cache_service import game_cache, games_list_cache
+from app.services.game_service import MOVE_CONFLICT, AsyncGameService
+from app.services.live_game_store import live_game_store
 
 router = APIRouter()
 
 
+async def get_game_response(db: AsyncSession, game_id: int) -> GameResponse | None:
+    """Get a game's details; finished games are served from game_cache"""
+
+    async def load() -> GameResponse | None:
+        game = await live_game_store.get_game(db, game_id)
+        return GameResponse.from_orm(game) if game else None
+
+    return await game_cache.get(str(game_id), load)
+
+
+async def notify_games_list_change(db: AsyncSession, game_id: int):
+    """Queue a game's current games-list entry for lobby subscribers"""
+    item = await AsyncGameService.get_list_item(db, game_id)
+    await get_websocket_manager().notify_games_list_update(
+        game_id, jsonable_encoder(item) if item else None
+    )
+
+
 @router.get("/", response_model=list[GameListItem])
 async def get_active_games(
     limit: int = 50,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Get list of active games"""
-    return GameService.get_active_games(db, limit)
+    return await games_list_cache.get(
+        str(limit), lambda: AsyncGameService.get_active_games(db, limit)
+    )
 
 
 @router.post("/", response_model=GameResponse)
 async def create_game(
     game_data: GameCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(rate_limited("create_game")),
 ):
     """Create a new game"""
-    game = GameService.create_game(
+    game = await AsyncGameService.create_game(
         db, current_user.id, game_data.player2_id, game_data.player2_type
     )
 
-    # Notify all users about the new game
-    websocket_manager = get_websocket_manager()
-    await websocket_manager.notify_games_list_update()
+    # Tell lobby subscribers about the new game
+    await notify_games_list_change(db, game.id)
 
     return GameResponse.from_orm(game)
 
@@ -42,26 +70,40 @@ async def create_game(
 @router.get("/{game_id}", response_model=GameResponse)
 async def get_game(
     game_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Get game details"""
-    game = GameService.get_game(db, game_id)
+    game = await get_game_response(db, game_id)
     if not game:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Game not found"
         )
-    return GameResponse.from_orm(game)
+    return game
+
+
+@router.get("/{game_id}/moves", response_model=list[GameMoveItem])
+async def get_game_moves(
+    game_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Get a game's moves in the order they were played"""
+    if not await get_game_response(db, game_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Game not found"
+        )
+    return await live_game_store.get_moves(db, game_id)
 
 
 @router.post("/{game_id}/join", response_model=GameResponse)
 async def join_game(
     game_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Join a game as player 2"""
-    game = GameService.join_game(db, game_id, current_user.id)
+    game = await AsyncGameService.join_game(db, game_id, current_user.id)
     if not game:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot join this game"
@@ -70,9 +112,9 @@ async def join_game(
     # Notify about game update and games list update
     websocket_manager = get_websocket_manager()
     await websocket_manager.notify_game_update(
-        game_id, GameResponse.from_orm(game).dict()
+        game_id, jsonable_encoder(GameResponse.from_orm(game))
     )
-    await websocket_manager.notify_games_list_update()
+    await notify_games_list_change(db, game_id)
 
     return GameResponse.from_orm(game)
 
@@ -80,11 +122,11 @@ async def join_game(
 @router.post("/{game_id}/observe")
 async def observe_game(
     game_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Join a game as observer"""
-    success = GameService.add_observer(db, game_id, current_user.id)
+    success = await AsyncGameService.add_observer(db, game_id, current_user.id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot observe this game"
@@ -101,22 +143,22 @@ async def observe_game(
 async def make_move(
     game_id: int,
     move: GameMove,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(rate_limited("move")),
 ):
     """Make a move in the game"""
-    game, message = GameService.make_move(db, game_id, current_user.id, move.position)
-    if not game:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
-
-    # Notify all observers about the game update
-    websocket_manager = get_websocket_manager()
-    await websocket_manager.notify_game_update(
-        game_id, GameResponse.from_orm(game).dict()
+    game, message, events = await live_game_store.make_move(
+        db, game_id, current_user.id, move.position
     )
+    if not game:
+        code = (
+            status.HTTP_409_CONFLICT
+            if message == MOVE_CONFLICT
+            else status.HTTP_400_BAD_REQUEST
+        )
+        raise HTTPException(status_code=code, detail=message)
 
-    # If game ended, also update the games list
-    if game.status in ["finished", "draw"]:
-        await websocket_manager.notify_games_list_update()
+    # Send observers each move rather than the whole game
+    await get_websocket_manager().notify_moves(jsonable_encoder(events))
 
     return GameResponse.from_orm(game)
@@ -1,38 +1,108 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.connection import get_db
-from app.models.leaderboard import LeaderboardResponse, UserStatsResponse
-from app.models.user import User
+from app.database.connection import get_async_db
+from app.models.leaderboard import (
+    LeaderboardEntry,
+    LeaderboardResponse,
+    LeaderboardWindow,
+    UserStatsResponse,
+)
+from app.models.user import UserResponse
 from app.routers.auth import get_current_user
-from app.services.leaderboard_service import LeaderboardService
+from app.services.cache_service import leaderboard_cache
+from app.services.leaderboard_service import AsyncLeaderboardService, RedisLeaderboard
+from app.services.redis_service import RedisManager
 
 router = APIRouter()
 
+# Global Redis leaderboard instance
+_redis_leaderboard: RedisLeaderboard | None = None
+
+
+def get_redis_leaderboard() -> RedisLeaderboard:
+    """Get the Redis leaderboard instance"""
+    if _redis_leaderboard is None:
+        raise RuntimeError("Redis leaderboard not initialized")
+    return _redis_leaderboard
+
+
+def set_redis_leaderboard(redis_manager: RedisManager) -> RedisLeaderboard:
+    """Set the Redis leaderboard with Redis dependency"""
+    global _redis_leaderboard
+    _redis_leaderboard = RedisLeaderboard(redis_manager)
+    return _redis_leaderboard
+
 
 @router.get("/", response_model=LeaderboardResponse)
 async def get_leaderboard(
-    limit: int = 20,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    window: LeaderboardWindow = LeaderboardWindow.ALL,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    """Get leaderboard with top players"""
-    return LeaderboardService.get_leaderboard(db, limit)
+    """Get leaderboard with top players, all-time or for the current period"""
+
+    async def load() -> LeaderboardResponse:
+        if window != LeaderboardWindow.ALL:
+            return await AsyncLeaderboardService.get_leaderboard(
+                db, limit, offset, window
+            )
+        try:
+            return await get_redis_leaderboard().get_leaderboard(limit, offset)
+        except (RedisError, RuntimeError) as e:
+            print(f"Redis leaderboard unavailable, reading the database: {e}")
+            return await AsyncLeaderboardService.get_leaderboard(db, limit, offset)
+
+    return await leaderboard_cache.get(f"{window}:{limit}:{offset}", load)
 
 
 @router.get("/user/{user_id}", response_model=UserStatsResponse)
 async def get_user_stats(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Get statistics for a specific user"""
-    return LeaderboardService.get_user_stats(db, user_id)
+    return await AsyncLeaderboardService.get_user_stats(db, user_id)
 
 
 @router.get("/me", response_model=UserStatsResponse)
 async def get_my_stats(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Get current user's statistics"""
-    return LeaderboardService.get_user_stats(db, current_user.id)
+    return await AsyncLeaderboardService.get_user_stats(db, current_user.id)
+
+
+@router.get("/me/rank", response_model=LeaderboardEntry)
+async def get_my_rank(current_user: UserResponse = Depends(get_current_user)):
+    """Get current user's leaderboard entry"""
+    try:
+        entry = await get_redis_leaderboard().get_rank(current_user.id)
+    except (RedisError, RuntimeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        ) from e
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Not ranked yet"
+        )
+    return entry
+
+
+@router.get("/me/around", response_model=list[LeaderboardEntry])
+async def get_players_around_me(
+    radius: int = Query(5, ge=0, le=50),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """Get the players ranked just above and below the current user"""
+    try:
+        return await get_redis_leaderboard().get_around(current_user.id, radius)
+    except (RedisError, RuntimeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        ) from e
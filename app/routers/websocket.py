@@ -1,9 +1,20 @@
 import json
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
 
-from app.models.game import WebSocketMessage
+from app.database.connection import AsyncSessionLocal
+from app.models.game import GameResponse, WebSocketMessage
+from app.models.user import UserResponse
+from app.services.cache_service import game_cache, games_list_cache
+from app.services.live_game_store import live_game_store
+from app.services.rate_limit_service import (
+    TOO_MANY_REQUESTS,
+    USER_LIMITS,
+    rate_limiter,
+)
 from app.services.redis_service import RedisManager
+from app.services.user_service import user_cache
 from app.services.websocket_service import WebSocketManager
 
 router = APIRouter()
@@ -25,13 +36,62 @@ def set_websocket_manager(redis_manager: RedisManager):
     global _websocket_manager, _redis_manager
     _redis_manager = redis_manager
     _websocket_manager = WebSocketManager(redis_manager)
+    _websocket_manager.snapshot_loader = load_game_snapshot
+    _websocket_manager.move_handler = play_move
+    _websocket_manager.games_list_listener = games_list_cache.clear
+
+
+async def load_game_snapshot(game_id: int) -> dict | None:
+    """Load a game's full state for WebSocket snapshots"""
+
+    async def load() -> GameResponse | None:
+        async with AsyncSessionLocal() as db:
+            game = await live_game_store.get_game(db, game_id)
+        return GameResponse.from_orm(game) if game else None
+
+    game = await game_cache.get(str(game_id), load)
+    return jsonable_encoder(game) if game else None
+
+
+async def play_move(
+    user_id: int, game_id: int, position: int
+) -> tuple[dict | None, str]:
+    """Apply a move sent over the socket and notify the game's observers"""
+    if await rate_limiter.hit("user:move", user_id, USER_LIMITS["move"]) is not None:
+        return None, TOO_MANY_REQUESTS
+    async with AsyncSessionLocal() as db:
+        game, message, events = await live_game_store.make_move(
+            db, game_id, user_id, position
+        )
+    if not game:
+        return None, message
+    await get_websocket_manager().notify_moves(jsonable_encoder(events))
+    return jsonable_encoder(GameResponse.from_orm(game)), message
+
+
+async def authenticate(token: str) -> UserResponse | None:
+    """Resolve the user a WebSocket token belongs to"""
+    return await user_cache.get_user_from_token(token)
 
 
 @router.websocket("/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: int):
-    """WebSocket endpoint for real-time game updates"""
+async def websocket_endpoint(
+    websocket: WebSocket, user_id: int, token: str | None = Query(None)
+):
+    """WebSocket endpoint for real-time game updates
+
+    Connections that pass a token for user_id may also make moves.
+    """
+    authenticated = False
+    if token is not None:
+        user = await authenticate(token)
+        if not user or user.id != user_id:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        authenticated = True
+
     manager = get_websocket_manager()
-    await manager.connect(websocket, user_id)
+    connection_id = await manager.connect(websocket, user_id, authenticated)
 
     try:
         while True:
@@ -41,10 +101,10 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int):
             message = WebSocketMessage(**message_data)
 
             # Handle different message types
-            await manager.handle_message(user_id, message)
+            await manager.handle_message(user_id, message, connection_id)
 
     except WebSocketDisconnect:
-        await manager.disconnect(user_id)
+        await manager.disconnect(user_id, connection_id)
     except Exception as e:
         print(f"WebSocket error: {e}")
-        await manager.disconnect(user_id)
+        await manager.disconnect(user_id, connection_id)
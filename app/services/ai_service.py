@@ -1,36 +1,48 @@
+import os
 import random
+from array import array
+
+from app.models.board import BOARD_CODES, FULL_MASK, WIN_MASKS, Board
+from app.services.metrics_service import metrics
+from app.services.worker_pool import BoundedWorkerPool, WorkerPoolFullError
+
+# AI worker pool settings
+AI_WORKERS = int(os.getenv("AI_WORKERS", "2"))
+AI_MAX_PENDING = int(os.getenv("AI_MAX_PENDING", "64"))
+AI_MOVE_TIMEOUT = float(os.getenv("AI_MOVE_TIMEOUT", "0.5"))
 
 
 class AIService:
     """AI service for computer opponents with different difficulty levels"""
 
     @staticmethod
-    def get_ai_move(board_state: list[str], difficulty: str = "medium") -> int:
+    def get_ai_move(board_state: Board | list[str], difficulty: str = "medium") -> int:
         """
         Get AI move based on difficulty level
 
         Args:
-            board_state: Current board state as list of 9 strings
+            board_state: Current board, as a Board or list of 9 strings
             difficulty: "easy", "medium", or "hard"
 
         Returns:
             Position (0-8) for AI move
         """
+        board = Board.coerce(board_state)
         if difficulty == "easy":
-            return AIService._get_random_move(board_state)
+            return AIService._get_random_move(board)
         elif difficulty == "medium":
-            return AIService._get_medium_move(board_state)
+            return AIService._get_medium_move(board)
         else:  # hard
-            return AIService._get_optimal_move(board_state)
+            return AIService._get_optimal_move(board)
 
     @staticmethod
-    def _get_random_move(board_state: list[str]) -> int:
+    def _get_random_move(board_state: Board | list[str]) -> int:
         """Get random valid move"""
-        empty_positions = [i for i, cell in enumerate(board_state) if cell == ""]
+        empty_positions = Board.coerce(board_state).empty_positions()
         return random.choice(empty_positions) if empty_positions else -1
 
     @staticmethod
-    def _get_medium_move(board_state: list[str]) -> int:
+    def _get_medium_move(board_state: Board | list[str]) -> int:
         """Medium difficulty: 70% optimal, 30% random"""
         if random.random() < 0.7:
             return AIService._get_optimal_move(board_state)
@@ -38,86 +50,128 @@ class AIService:
             return AIService._get_random_move(board_state)
 
     @staticmethod
-    def _get_optimal_move(board_state: list[str]) -> int:
-        """Get optimal move using minimax algorithm"""
-
-        def minimax(
-            board: list[str],
-            depth: int,
-            is_maximizing: bool,
-            alpha: float = float("-inf"),
-            beta: float = float("inf"),
-        ) -> float:
-            winner = AIService._check_winner(board)
-
-            if winner == "O":  # AI wins
-                return 10 - depth
-            elif winner == "X":  # Human wins
-                return depth - 10
-            elif AIService._is_board_full(board):  # Draw
-                return 0
-
-            if is_maximizing:  # AI turn
-                max_eval = float("-inf")
-                for i in range(9):
-                    if board[i] == "":
-                        board[i] = "O"
-                        eval_score = minimax(board, depth + 1, False, alpha, beta)
-                        board[i] = ""
-                        max_eval = max(max_eval, eval_score)
-                        alpha = max(alpha, eval_score)
-                        if beta <= alpha:
-                            break
-                return max_eval
-            else:  # Human turn
-                min_eval = float("inf")
-                for i in range(9):
-                    if board[i] == "":
-                        board[i] = "X"
-                        eval_score = minimax(board, depth + 1, True, alpha, beta)
-                        board[i] = ""
-                        min_eval = min(min_eval, eval_score)
-                        beta = min(beta, eval_score)
-                        if beta <= alpha:
-                            break
-                return min_eval
-
-        best_move = -1
-        best_value = float("-inf")
+    def _get_optimal_move(board_state: Board | list[str]) -> int:
+        """Get optimal move from the precomputed perfect-play table"""
+        best_move, _ = AIService.lookup(board_state)
+        return best_move if best_move != -1 else AIService._get_random_move(board_state)
 
-        for i in range(9):
-            if board_state[i] == "":
-                board_state[i] = "O"
-                move_value = minimax(board_state, 0, False)
-                board_state[i] = ""
+    @staticmethod
+    def lookup(board_state: Board | list[str]) -> tuple[int, int]:
+        """
+        Look up the solved position for the AI (O) to move
 
-                if move_value > best_value:
-                    best_value = move_value
-                    best_move = i
+        Args:
+            board_state: Current board, as a Board or list of 9 strings
 
-        return best_move if best_move != -1 else AIService._get_random_move(board_state)
+        Returns:
+            Tuple of (best position or -1 if the game is over, score).
+            Positive scores are AI wins, negative are human wins and larger
+            magnitudes mean a quicker result.
+        """
+        code = Board.coerce(board_state).code
+        return _BEST_MOVES[code], _BEST_SCORES[code]
 
     @staticmethod
-    def _check_winner(board: list[str]) -> str | None:
+    def _check_winner(board: Board | list[str]) -> str | None:
         """Check if there's a winner on the board"""
-        winning_combinations = [
-            [0, 1, 2],
-            [3, 4, 5],
-            [6, 7, 8],  # Rows
-            [0, 3, 6],
-            [1, 4, 7],
-            [2, 5, 8],  # Columns
-            [0, 4, 8],
-            [2, 4, 6],  # Diagonals
-        ]
-
-        for combo in winning_combinations:
-            if board[combo[0]] == board[combo[1]] == board[combo[2]] != "":
-                return board[combo[0]]
-
-        return None
+        return Board.coerce(board).winner()
 
     @staticmethod
-    def _is_board_full(board: list[str]) -> bool:
+    def _is_board_full(board: Board | list[str]) -> bool:
         """Check if board is full"""
-        return all(cell != "" for cell in board)
+        return Board.coerce(board).is_full()
+
+
+class AIWorkerPool(BoundedWorkerPool):
+    """Computes AI moves on worker threads so searches never block the event loop.
+
+    At most max_pending moves may be queued or running; beyond that, or when
+    a search exceeds the time budget, a random valid move is played instead.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = AI_WORKERS,
+        max_pending: int = AI_MAX_PENDING,
+        timeout: float = AI_MOVE_TIMEOUT,
+    ):
+        super().__init__("ai-move", max_workers, max_pending)
+        self.timeout = timeout
+        metrics.register_gauge("ai.pending", lambda: self.pending)
+
+    async def get_move(self, board: Board, difficulty: str = "medium") -> int:
+        """Get AI move within the time budget, falling back to a random move"""
+        try:
+            return await self.run(
+                AIService.get_ai_move, board, difficulty, timeout=self.timeout
+            )
+        except WorkerPoolFullError:
+            metrics.increment("ai.rejected")
+        except TimeoutError:
+            metrics.increment("ai.timeouts")
+        return AIService._get_random_move(board)
+
+
+def _build_tables() -> tuple[array, array]:
+    """Solve every position with the AI (O) to move.
+
+    Scores are from the AI's point of view: a win is worth 1 + remaining
+    empty cells so quicker wins (and slower losses) are preferred. Ties keep
+    the lowest position, matching the previous minimax search.
+    """
+    best_moves = array("b", [-1]) * BOARD_CODES
+    best_scores = array("b", [0]) * BOARD_CODES
+    solved: dict[tuple[int, int, bool], tuple[int, int]] = {}
+
+    has_line = [
+        any(mask & line == line for line in WIN_MASKS) for mask in range(FULL_MASK + 1)
+    ]
+
+    def solve(x: int, o: int, ai_turn: bool) -> tuple[int, int]:
+        key = (x, o, ai_turn)
+        if key in solved:
+            return solved[key]
+
+        best_score = None
+        best_move = -1
+        occupied = x | o
+        for i in range(9):
+            bit = 1 << i
+            if occupied & bit:
+                continue
+            empty = 8 - occupied.bit_count()
+            if ai_turn:
+                child_x, child_o = x, o | bit
+                won = has_line[child_o]
+            else:
+                child_x, child_o = x | bit, o
+                won = has_line[child_x]
+            if won:
+                score = 1 + empty if ai_turn else -1 - empty
+            elif not empty:
+                score = 0
+            else:
+                score, _ = solve(child_x, child_o, not ai_turn)
+            if best_score is None or (
+                score > best_score if ai_turn else score < best_score
+            ):
+                best_score = score
+                best_move = i
+
+        solved[key] = best_score, best_move
+        return best_score, best_move
+
+    for x in range(FULL_MASK + 1):
+        if has_line[x]:
+            continue
+        for o in range(FULL_MASK + 1):
+            if x & o or x | o == FULL_MASK or has_line[o]:
+                continue
+            code = Board(x, o).code
+            best_scores[code], best_moves[code] = solve(x, o, True)
+
+    return best_moves, best_scores
+
+
+_BEST_MOVES, _BEST_SCORES = _build_tables()
+ai_worker_pool = AIWorkerPool()
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from app.models.game import GameListItem, GameResponse, GameStatus
+from app.models.leaderboard import LeaderboardResponse
+from app.services.live_game_store import live_game_store
+from app.services.metrics_service import metrics
+from app.services.redis_service import RedisManager
+
+# Workers tell each other which cached entries changed on this channel
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Finished games never change, so they can be kept for a long time (seconds)
+GAME_CACHE_TTL = float(os.getenv("GAME_CACHE_TTL", "300"))
+# The lobby's games list is dropped shortly after a game is created, joined
+# or finished, and once a finished game is saved; the ttl (seconds) only
+# bounds drift in observer counts
+GAMES_LIST_CACHE_TTL = float(os.getenv("GAMES_LIST_CACHE_TTL", "5"))
+# Leaderboard pages are only refreshed by expiry (seconds)
+LEADERBOARD_CACHE_TTL = float(os.getenv("LEADERBOARD_CACHE_TTL", "10"))
+
+
+class CacheBus:
+    """Connects caches to Redis: their shared tier, and invalidations
+    published by other workers"""
+
+    def __init__(self):
+        self.redis_manager: RedisManager | None = None
+        self._caches: dict[str, TwoTierCache] = {}
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+
+    def register(self, cache: "TwoTierCache"):
+        """Route invalidations for cache.name to cache"""
+        self._caches[cache.name] = cache
+
+    async def start(self, redis_manager: RedisManager):
+        """Use Redis and listen for other workers' invalidations"""
+        self.redis_manager = redis_manager
+        if self._listener is not None:
+            return
+        pubsub = redis_manager.pubsub()
+        try:
+            await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+        except Exception as e:
+            print(f"Cache invalidation disabled, Redis pub/sub unavailable: {e}")
+            await pubsub.aclose()
+            return
+        self._pubsub = pubsub
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop listening for invalidations"""
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+        await self._pubsub.aclose()
+        self._pubsub = None
+
+    async def publish(self, name: str, keys: list[str] | None):
+        """Tell every worker to drop keys of a cache, or all of it for None"""
+        await self.redis_manager.publish(
+            CACHE_INVALIDATION_CHANNEL, json.dumps({"cache": name, "keys": keys})
+        )
+
+    async def _listen(self):
+        """Drop local entries other workers invalidated"""
+        while True:
+            try:
+                async for item in self._pubsub.listen():
+                    self._dispatch(item["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache invalidation listener error: {e}")
+                await asyncio.sleep(1)
+
+    def _dispatch(self, data: str):
+        """Apply one invalidation message"""
+        message = json.loads(data)
+        cache = self._caches.get(message["cache"])
+        if cache is not None:
+            cache.drop_local(message["keys"])
+
+
+class TwoTierCache:
+    """Read-through cache: a bounded per-worker LRU in front of Redis
+
+    Reads are served from memory when possible, then from Redis, and only
+    then loaded from the source, which fills both tiers. Values are models
+    described by adapter; they are shared between readers and must not be
+    changed. Without a bus (or before it has Redis) only memory is used.
+
+    With single_key the Redis tier is one hash, so clear() is a single DEL;
+    its entries then all expire redis_ttl after the first was written.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        adapter: TypeAdapter,
+        max_size: int,
+        ttl: float,
+        redis_ttl: float | None = None,
+        bus: CacheBus | None = None,
+        keep: Callable[[Any], bool] | None = None,
+        single_key: bool = False,
+    ):
+        self.name = name
+        self.adapter = adapter
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis_ttl = ttl if redis_ttl is None else redis_ttl
+        self.bus = bus
+        # Whether a loaded value may be cached at all
+        self.keep = keep
+        self.single_key = single_key
+        # Key -> (monotonic expiry, value), least recently used first
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if bus is not None:
+            bus.register(self)
+        metrics.register_gauge(f"cache.{name}.size", lambda: len(self._entries))
+        metrics.register_gauge(f"cache.{name}.hit_rate", self.hit_rate)
+
+    def hit_rate(self) -> float:
+        """Share of reads answered without loading from the source"""
+        reads = self.hits + self.misses
+        return self.hits / reads if reads else 0.0
+
+    async def get(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Get a value, loading and caching it on a miss
+
+        None from load means there is nothing to cache.
+        """
+        cached = self._entries.get(key)
+        if cached is not None:
+            expires, value = cached
+            if expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hit("local")
+                return value
+            del self._entries[key]
+
+        value = await self._get_shared(key)
+        if value is not None:
+            self._hit("redis")
+        else:
+            self.misses += 1
+            metrics.increment(f"cache.{self.name}.misses")
+            value = await load()
+            if value is None or (self.keep is not None and not self.keep(value)):
+                return value
+            await self._share(key, value)
+        self._remember(key, value)
+        return value
+
+    async def put(self, key: str, value: Any):
+        """Cache a value already read from the source"""
+        await self._share(key, value)
+        self._remember(key, value)
+
+    async def invalidate(self, *keys: str):
+        """Drop entries here, in Redis and on every other worker"""
+        self.drop_local(list(keys))
+        await self._tell_others(list(keys))
+
+    async def clear(self):
+        """Drop every entry here, in Redis and on every other worker"""
+        if not self.single_key:
+            raise TypeError(f"Cache {self.name} is not kept under a single key")
+        self.drop_local(None)
+        await self._tell_others(None)
+
+    def drop_local(self, keys: list[str] | None):
+        """Drop entries from this worker's memory, or all of them for None"""
+        if keys is None:
+            self._entries.clear()
+        for key in keys or []:
+            self._entries.pop(key, None)
+
+    @property
+    def _redis_manager(self) -> RedisManager | None:
+        return self.bus.redis_manager if self.bus is not None else None
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.name}:{key}"
+
+    @property
+    def _redis_hash(self) -> str:
+        return f"cache:{self.name}"
+
+    def _hit(self, tier: str):
+        self.hits += 1
+        metrics.increment(f"cache.{self.name}.{tier}_hits")
+
+    def _remember(self, key: str, value: Any):
+        """Keep a value in memory, dropping the least recently used"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _get_shared(self, key: str) -> Any:
+        """Get the value another worker cached, if Redis is reachable"""
+        if self._redis_manager is None:
+            return None
+        try:
+            if self.single_key:
+                data = await self._redis_manager.get_cached_field(self._redis_hash, key)
+            else:
+                data = await self._redis_manager.get_cached(self._redis_key(key))
+        except Exception as e:
+            print(f"Error reading cache {self.name}: {e}")
+            return None
+        return None if data is None else self.adapter.validate_python(data)
+
+    async def _share(self, key: str, value: Any):
+        """Cache a value in Redis for the other workers"""
+        if self._redis_manager is None:
+            return
+        data = self.adapter.dump_python(value, mode="json")
+        try:
+            if self.single_key:
+                await self._redis_manager.set_cached_field(
+                    self._redis_hash, key, data, self.redis_ttl
+                )
+            else:
+                await self._redis_manager.set_cached(
+                    self._redis_key(key), data, self.redis_ttl
+                )
+        except Exception as e:
+            print(f"Error writing cache {self.name}: {e}")
+
+    async def _tell_others(self, keys: list[str] | None):
+        """Remove entries from Redis and have other workers drop theirs"""
+        redis_manager = self._redis_manager
+        if redis_manager is None:
+            return
+        try:
+            if keys is None:
+                await redis_manager.delete_cached(self._redis_hash)
+            elif self.single_key:
+                await redis_manager.delete_cached_fields(self._redis_hash, *keys)
+            else:
+                await redis_manager.delete_cached(*map(self._redis_key, keys))
+            await self.bus.publish(self.name, keys)
+        except Exception as e:
+            print(f"Error invalidating cache {self.name}: {e}")
+
+
+def _finished(game: GameResponse) -> bool:
+    """Whether a game can no longer change: it is over, and saved rather than
+    only held in memory, where a flush conflict could still undo it"""
+    return (
+        game.status not in (GameStatus.WAITING, GameStatus.IN_PROGRESS)
+        and live_game_store.get(game.id) is None
+    )
+
+
+cache_bus = CacheBus()
+game_cache = TwoTierCache(
+    "games",
+    TypeAdapter(GameResponse),
+    max_size=1000,
+    ttl=GAME_CACHE_TTL,
+    bus=cache_bus,
+    keep=_finished,
+)
+games_list_cache = TwoTierCache(
+    "games_list",
+    TypeAdapter(list[GameListItem]),
+    max_size=16,
+    ttl=GAMES_LIST_CACHE_TTL,
+    bus=cache_bus,
+    single_key=True,
+)
+leaderboard_cache = TwoTierCache(
+    "leaderboard",
+    TypeAdapter(LeaderboardResponse),
+    max_size=256,
+    ttl=LEADERBOARD_CACHE_TTL,
+    bus=cache_bus,
+)
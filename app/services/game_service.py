@@ -1,12 +1,30 @@
-import json
+import os
 from datetime import datetime
 
-from sqlalchemy.orm import Session
-
-from app.models.game import Game, GameListItem, GameObserver, GameStatus, PlayerType
-from app.models.leaderboard import UserStats
+from sqlalchemy import and_, case, func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.database.connection import dialect_insert
+from app.models.board import Board
+from app.models.game import (
+    Game,
+    GameListItem,
+    GameMoveEvent,
+    GameMoveRecord,
+    GameObserver,
+    GameStatus,
+    PlayerType,
+)
+from app.models.leaderboard import LeaderboardWindow, UserStats, UserStatsPeriod
 from app.models.user import User
-from app.services.ai_service import AIService
+from app.services.ai_service import AIService, ai_worker_pool
+from app.services.metrics_service import metrics
+
+# Attempts at a move that keeps losing the race for the game row
+MOVE_RETRIES = int(os.getenv("MOVE_RETRIES", "3"))
+MOVE_CONFLICT = "Game was changed by another move, try again"
 
 
 class GameService:
@@ -24,7 +42,7 @@ class GameService:
             player1_id=player1_id,
             player2_id=player2_id,
             player2_type=player2_type,
-            board_state='["","","","","","","","",""]',
+            board_code=Board().code,
             current_turn="X",
             status=(
                 GameStatus.WAITING
@@ -45,42 +63,67 @@ class GameService:
     @staticmethod
     def get_active_games(db: Session, limit: int = 50) -> list[GameListItem]:
         """Get list of active games"""
-        games = (
-            db.query(Game)
-            .filter(Game.status.in_([GameStatus.WAITING, GameStatus.IN_PROGRESS]))
+        return GameService._list_items(db, limit=limit)
+
+    @staticmethod
+    def get_list_item(db: Session, game_id: int) -> GameListItem | None:
+        """Get a game's games-list entry, or None if it is no longer listed"""
+        items = GameService._list_items(db, Game.id == game_id, limit=1)
+        return items[0] if items else None
+
+    @staticmethod
+    def _list_items(db: Session, *criteria, limit: int) -> list[GameListItem]:
+        """Query active games as games-list entries"""
+        player1 = aliased(User)
+        player2 = aliased(User)
+        observer_counts = (
+            db.query(
+                GameObserver.game_id,
+                func.count(GameObserver.id).label("observer_count"),
+            )
+            .group_by(GameObserver.game_id)
+            .subquery()
+        )
+
+        rows = (
+            db.query(
+                Game.id,
+                Game.player2_type,
+                Game.status,
+                Game.created_at,
+                player1.username.label("player1_username"),
+                player2.username.label("player2_username"),
+                func.coalesce(observer_counts.c.observer_count, 0).label(
+                    "observer_count"
+                ),
+            )
+            .outerjoin(player1, player1.id == Game.player1_id)
+            .outerjoin(player2, player2.id == Game.player2_id)
+            .outerjoin(observer_counts, observer_counts.c.game_id == Game.id)
+            .filter(
+                Game.status.in_([GameStatus.WAITING, GameStatus.IN_PROGRESS]),
+                *criteria,
+            )
             .order_by(Game.created_at.desc())
             .limit(limit)
             .all()
         )
 
         result = []
-        for game in games:
-            # Get observer count
-            observer_count = (
-                db.query(GameObserver).filter(GameObserver.game_id == game.id).count()
-            )
-
-            # Get usernames
-            player1_username = (
-                db.query(User.username).filter(User.id == game.player1_id).scalar()
-            )
-            player2_username = None
-            if game.player2_id:
-                player2_username = (
-                    db.query(User.username).filter(User.id == game.player2_id).scalar()
-                )
-            elif game.player2_type == PlayerType.AI:
+        for row in rows:
+            player2_username = row.player2_username
+            if player2_username is None and row.player2_type == PlayerType.AI:
                 player2_username = "AI"
 
             result.append(
                 GameListItem(
-                    id=game.id,
-                    player1_username=player1_username or "Unknown",
+                    id=row.id,
+                    player1_username=row.player1_username or "Unknown",
                     player2_username=player2_username,
-                    player2_type=game.player2_type,
-                    status=game.status,
-                    created_at=game.created_at,
-                    observer_count=observer_count,
+                    player2_type=row.player2_type,
+                    status=row.status,
+                    created_at=row.created_at,
+                    observer_count=row.observer_count,
                 )
             )
 
@@ -95,208 +138,495 @@ class GameService:
 
         game.player2_id = user_id
         game.status = GameStatus.IN_PROGRESS
-        db.commit()
+        try:
+            db.commit()
+        except StaleDataError:
+            # Someone else joined first
+            db.rollback()
+            return None
         db.refresh(game)
         return game
 
     @staticmethod
     def add_observer(db: Session, game_id: int, user_id: int) -> bool:
         """Add observer to a game"""
-        # Check if already observing
-        existing = (
-            db.query(GameObserver)
-            .filter(GameObserver.game_id == game_id, GameObserver.user_id == user_id)
-            .first()
+        # Already observing is a no-op; an unknown game or user still raises
+        db.execute(
+            dialect_insert(db)(GameObserver)
+            .values(game_id=game_id, user_id=user_id)
+            .on_conflict_do_nothing(index_elements=["game_id", "user_id"])
         )
-
-        if existing:
-            return True
-
-        observer = GameObserver(game_id=game_id, user_id=user_id)
-        db.add(observer)
         db.commit()
         return True
 
     @staticmethod
     def make_move(
-        db: Session, game_id: int, user_id: int, position: int
+        db: Session, game_id: int, user_id: int, position: int, play_ai: bool = True
     ) -> tuple[Game | None, str]:
-        """Make a move in the game"""
-        game = GameService.get_game(db, game_id)
-        if not game:
-            return None, "Game not found"
+        """Make a move in the game
+
+        A move the AI replies to is committed with the reply, in one
+        transaction. With play_ai=False the reply is left to the caller (see
+        AsyncGameService.make_move), which computes it off the event loop
+        and must then commit both with apply_ai_move.
+
+        The move is validated and applied by one conditional UPDATE; the
+        game is only read when that matches nothing, to say why. A move
+        that was valid on that read lost a race and is tried again, up to
+        MOVE_RETRIES times.
+        """
+        players_turn = or_(
+            and_(Game.current_turn == "X", Game.player1_id == user_id),
+            and_(Game.current_turn == "O", Game.player2_id == user_id),
+        )
+        for _ in range(MOVE_RETRIES):
+            game = GameService._play(db, game_id, position, players_turn)
+            if game:
+                break
+
+            game = db.get(Game, game_id, populate_existing=True)
+            if not game:
+                return None, "Game not found"
+            error = GameService.validate_move(game, user_id, position)
+            if error:
+                return None, error
+            metrics.increment("games.move_conflicts")
+        else:
+            return None, MOVE_CONFLICT
+
+        # If it's AI's turn and game is still in progress
+        if GameService.is_ai_turn(game):
+            if play_ai:
+                return GameService._make_ai_move(db, game)
+            return game, "Move successful"
+
+        db.commit()
+        return game, "Move successful"
 
+    @staticmethod
+    def validate_move(game: Game, user_id: int, position: int) -> str | None:
+        """Check a player's move; returns the reason it is refused, if any"""
         if game.status != GameStatus.IN_PROGRESS:
-            return None, "Game is not in progress"
+            return "Game is not in progress"
 
         # Check if it's the user's turn
         if (game.current_turn == "X" and game.player1_id != user_id) or (
             game.current_turn == "O" and game.player2_id != user_id
         ):
-            return None, "Not your turn"
-
-        # Parse board state
-        board_state = json.loads(game.board_state)
+            return "Not your turn"
 
         # Check if position is valid
-        if position < 0 or position > 8 or board_state[position] != "":
-            return None, "Invalid move"
+        if not Board.from_code(game.board_code).is_empty(position):
+            return "Invalid move"
+        return None
 
-        # Make the move
-        board_state[position] = game.current_turn
-        game.board_state = json.dumps(board_state)
+    @staticmethod
+    def apply_move(game: Game, position: int) -> bool:
+        """Play the current turn's mark at a valid position
+
+        Works on Game rows and in-memory live games alike; the caller
+        persists the result. Returns True when the move ends the game.
+        """
+        board = Board.from_code(game.board_code).play(position, game.current_turn)
+        game.board_code = board.code
         game.total_moves += 1
 
-        # Check for winner
-        winner = GameService._check_winner(board_state)
+        if GameService._complete(game, board):
+            return True
+
+        # Switch turns
+        game.current_turn = "O" if game.current_turn == "X" else "X"
+        return False
+
+    @staticmethod
+    def _complete(game: Game, board: Board) -> bool:
+        """Record the result if the board is won or full"""
+        winner = board.winner()
+        if not winner and not board.is_full():
+            return False
+
+        game.status = GameStatus.COMPLETED
+        game.completed_at = datetime.utcnow()
         if winner:
-            game.status = GameStatus.COMPLETED
-            game.completed_at = datetime.utcnow()
-            if winner == "X":
-                game.winner_id = game.player1_id
-            elif winner == "O":
-                game.winner_id = game.player2_id
-            GameService._update_user_stats(db, game)
-        elif GameService._is_board_full(board_state):
-            # Draw
-            game.status = GameStatus.COMPLETED
-            game.completed_at = datetime.utcnow()
-            GameService._update_user_stats(db, game)
-        else:
-            # Switch turns
-            game.current_turn = "O" if game.current_turn == "X" else "X"
+            # The AI has no user id, so an AI win leaves winner_id empty
+            game.winner_id = game.player1_id if winner == "X" else game.player2_id
+        return True
 
-        db.commit()
-        db.refresh(game)
+    @staticmethod
+    def _play(db: Session, game_id: int, position: int, turn) -> Game | None:
+        """Apply a move with one UPDATE ... RETURNING, logging it in the session
+
+        The UPDATE only matches an in-progress game whose position is empty
+        and whose current turn satisfies the turn criterion, so it both
+        validates and applies the move atomically. Returns None if it
+        matched nothing. A move that ends the game also marks the result
+        and stats, which are written on commit.
+        """
+        if not 0 <= position < 9:
+            return None
 
-        # If it's AI's turn and game is still in progress
-        if (
+        power = 3**position
+        statement = (
+            update(Game)
+            .where(
+                Game.id == game_id,
+                Game.status == GameStatus.IN_PROGRESS,
+                Game.board_code // power % 3 == 0,
+                turn,
+            )
+            .values(
+                board_code=Game.board_code
+                + case((Game.current_turn == "X", 1), else_=2) * power,
+                current_turn=case((Game.current_turn == "X", "O"), else_="X"),
+                total_moves=Game.total_moves + 1,
+                version=Game.version + 1,
+                updated_at=func.now(),
+            )
+            .returning(Game)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        game = db.scalars(statement).one_or_none()
+        if game is None:
+            return None
+
+        record = GameService.move_record(game, position)
+        db.add(record)
+        if GameService._complete(game, Board.from_code(game.board_code)):
+            # The turn doesn't pass once the game is over
+            game.current_turn = record.mark
+            game.updated_at = game.completed_at
+            GameService._update_user_stats(db, game)
+        return game
+
+    @staticmethod
+    def is_ai_turn(game: Game) -> bool:
+        """Check whether the AI should move next"""
+        return (
             game.status == GameStatus.IN_PROGRESS
             and game.player2_type == PlayerType.AI
             and game.current_turn == "O"
-        ):
-            return GameService._make_ai_move(db, game)
-
-        return game, "Move successful"
+        )
 
     @staticmethod
     def _make_ai_move(db: Session, game: Game) -> tuple[Game, str]:
         """Make AI move"""
-        board_state = json.loads(game.board_state)
-        ai_position = AIService.get_ai_move(board_state, "medium")
+        board = Board.from_code(game.board_code)
+        ai_position = AIService.get_ai_move(board, "medium")
+        return GameService.apply_ai_move(db, game, ai_position)
 
-        if ai_position == -1:
+    @staticmethod
+    def apply_ai_move(db: Session, game: Game, ai_position: int) -> tuple[Game, str]:
+        """Apply an already computed AI move
+
+        Commits it together with the player's move it answers, whose log
+        row is still pending in the session, so both are saved at once.
+        """
+        board = Board.from_code(game.board_code)
+        if ai_position == -1 or not board.is_empty(ai_position):
+            db.commit()
             return game, "No valid AI move"
 
         # Make AI move
-        board_state[ai_position] = "O"
-        game.board_state = json.dumps(board_state)
-        game.total_moves += 1
+        played = GameService._play(
+            db,
+            game.id,
+            ai_position,
+            and_(Game.player2_type == PlayerType.AI, Game.current_turn == "O"),
+        )
+        if not played:
+            # The game moved on while the AI was thinking; keep its state
+            metrics.increment("games.move_conflicts")
+            db.commit()
+            db.refresh(game)
+            return game, MOVE_CONFLICT
 
-        # Check for winner
-        winner = GameService._check_winner(board_state)
-        if winner:
-            game.status = GameStatus.COMPLETED
-            game.completed_at = datetime.utcnow()
-            if winner == "O":
-                game.winner_id = None  # AI won
-            GameService._update_user_stats(db, game)
-        elif GameService._is_board_full(board_state):
-            # Draw
+        db.commit()
+        return played, "AI move successful"
+
+    @staticmethod
+    def move_event(game: Game, position: int) -> GameMoveEvent:
+        """Describe the move just played at position, as of the game's state"""
+        return GameMoveEvent(
+            game_id=game.id,
+            seq=game.total_moves,
+            position=position,
+            mark=Board.from_code(game.board_code).cell(position),
+            status=game.status,
+            winner_id=game.winner_id,
+        )
+
+    @staticmethod
+    def move_record(game: Game, position: int) -> GameMoveRecord:
+        """Log entry for the move just played at position"""
+        return GameMoveRecord(
+            game_id=game.id,
+            seq=game.total_moves,
+            position=position,
+            mark=Board.from_code(game.board_code).cell(position),
+        )
+
+    @staticmethod
+    def get_moves(db: Session, game_id: int) -> list[GameMoveRecord]:
+        """Get a game's moves in the order they were played"""
+        return (
+            db.query(GameMoveRecord)
+            .filter(GameMoveRecord.game_id == game_id)
+            .order_by(GameMoveRecord.seq)
+            .all()
+        )
+
+    @staticmethod
+    def replay(moves: list[GameMoveRecord]) -> Board:
+        """Rebuild a board by playing moves in order"""
+        board = Board()
+        for move in moves:
+            board = board.play(move.position, move.mark)
+        return board
+
+    @staticmethod
+    def replay_boards(db: Session, game_ids: list[int]) -> dict[int, Board]:
+        """Rebuild the boards of many games from the log in one query"""
+        boards = dict.fromkeys(game_ids, Board())
+        moves = (
+            db.query(GameMoveRecord)
+            .filter(GameMoveRecord.game_id.in_(game_ids))
+            .order_by(GameMoveRecord.game_id, GameMoveRecord.seq)
+        )
+        for move in moves:
+            boards[move.game_id] = boards[move.game_id].play(move.position, move.mark)
+        return boards
+
+    @staticmethod
+    def rebuild_game(db: Session, game_id: int) -> Game | None:
+        """Recover a game's board, turn and result from its move log
+
+        User stats are left alone; they were counted when the game ended.
+        Returns None, leaving the row unchanged, if the game is missing or
+        its log doesn't hold every move (e.g. games older than the log).
+        """
+        game = GameService.get_game(db, game_id)
+        if not game:
+            return None
+
+        moves = GameService.get_moves(db, game_id)
+        if len(moves) != game.total_moves:
+            return None
+        board = GameService.replay(moves)
+        game.board_code = board.code
+        if moves:
+            game.current_turn = "O" if moves[-1].mark == "X" else "X"
+
+        winner = board.winner()
+        if winner or board.is_full():
             game.status = GameStatus.COMPLETED
-            game.completed_at = datetime.utcnow()
-            GameService._update_user_stats(db, game)
-        else:
-            # Switch back to player
-            game.current_turn = "X"
+            game.completed_at = game.completed_at or datetime.utcnow()
+            if winner:
+                game.winner_id = game.player1_id if winner == "X" else game.player2_id
+            game.current_turn = moves[-1].mark
 
         db.commit()
         db.refresh(game)
-        return game, "AI move successful"
+        return game
 
     @staticmethod
-    def _check_winner(board: list[str]) -> str | None:
+    def _check_winner(board: Board | list[str]) -> str | None:
         """Check if there's a winner on the board"""
-        winning_combinations = [
-            [0, 1, 2],
-            [3, 4, 5],
-            [6, 7, 8],  # Rows
-            [0, 3, 6],
-            [1, 4, 7],
-            [2, 5, 8],  # Columns
-            [0, 4, 8],
-            [2, 4, 6],  # Diagonals
-        ]
-
-        for combo in winning_combinations:
-            if board[combo[0]] == board[combo[1]] == board[combo[2]] != "":
-                return board[combo[0]]
-
-        return None
+        return Board.coerce(board).winner()
 
     @staticmethod
-    def _is_board_full(board: list[str]) -> bool:
+    def _is_board_full(board: Board | list[str]) -> bool:
         """Check if board is full"""
-        return all(cell != "" for cell in board)
+        return Board.coerce(board).is_full()
 
     @staticmethod
     def _update_user_stats(db: Session, game: Game) -> None:
-        """Update user statistics after game completion"""
-
-        def update_stats(user_id: int, won: bool, lost: bool, drawn: bool):
-            stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
-            if not stats:
-                stats = UserStats(user_id=user_id)
-                db.add(stats)
-                # TODO: when creating a new user, set initial stats
-                stats.games_played = 0
-                stats.games_won = 0
-                stats.games_lost = 0
-                stats.games_drawn = 0
-                stats.total_moves = 0
-            stats.games_played += 1
-            stats.total_moves += game.total_moves
-
-            if won:
-                stats.games_won += 1
-            elif lost:
-                stats.games_lost += 1
-            elif drawn:
-                stats.games_drawn += 1
-
-            # Calculate win rate
-            if stats.games_played > 0:
-                stats.win_rate = stats.games_won / stats.games_played
-                stats.avg_moves_per_game = stats.total_moves / stats.games_played
-
-        # Update player 1 stats
+        """Update user statistics after game completion
+
+        One INSERT ... ON CONFLICT DO UPDATE adds the game to every human
+        player's counters and recomputes the derived fields in SQL, so
+        concurrent completions for the same user can't lose an update. A
+        second one does the same for their bucket of the day the game ended.
+        Both run in the caller's transaction, alongside the game's final
+        state.
+
+        A user playing both sides gets one row holding both results, as an
+        upsert may not touch the same row twice.
+        """
+        merged: dict[int, dict] = {}
+        for user_id, result in GameService._results(game):
+            row = merged.setdefault(
+                user_id,
+                dict.fromkeys(
+                    ("games_played", "games_won", "games_lost", "games_drawn"), 0
+                )
+                | {"user_id": user_id, "total_moves": 0},
+            )
+            row["games_played"] += 1
+            row[f"games_{result}"] += 1
+            row["total_moves"] += game.total_moves
+        rows = [
+            row
+            | {
+                "win_rate": row["games_won"] / row["games_played"],
+                "avg_moves_per_game": row["total_moves"] / row["games_played"],
+            }
+            for row in merged.values()
+        ]
+        GameService._add_to_stats(
+            db, UserStats, [UserStats.user_id], rows, updated_at=func.now()
+        )
+
+        day = (game.completed_at or datetime.utcnow()).date()
+        GameService._add_to_stats(
+            db,
+            UserStatsPeriod,
+            [
+                UserStatsPeriod.user_id,
+                UserStatsPeriod.period,
+                UserStatsPeriod.period_start,
+            ],
+            [
+                {"period": LeaderboardWindow.DAY, "period_start": day, **row}
+                for row in rows
+            ],
+        )
+
+    @staticmethod
+    def _add_to_stats(db: Session, model, key: list, rows: list[dict], **extra):
+        """Upsert stats rows, adding their counters to any existing row's"""
+        insert = dialect_insert(db)(model).values(rows)
+
+        def total(column: str):
+            return func.coalesce(getattr(model, column), 0) + getattr(
+                insert.excluded, column
+            )
+
+        played = total("games_played")
+        db.execute(
+            insert.on_conflict_do_update(
+                index_elements=key,
+                set_={
+                    "games_played": played,
+                    "games_won": total("games_won"),
+                    "games_lost": total("games_lost"),
+                    "games_drawn": total("games_drawn"),
+                    "total_moves": total("total_moves"),
+                    "win_rate": total("games_won") / played,
+                    "avg_moves_per_game": total("total_moves") / played,
+                    **extra,
+                },
+            )
+        )
+
+    @staticmethod
+    def _results(game: Game) -> list[tuple[int, str]]:
+        """Each human player's result in a finished game: won, lost or drawn"""
         if game.winner_id == game.player1_id:
-            update_stats(game.player1_id, True, False, False)
+            results = [(game.player1_id, "won")]
         elif game.winner_id is None:  # Draw or AI won
+            board = Board.from_code(game.board_code or 0)
             if (
                 game.player2_type == PlayerType.AI
                 and game.status == GameStatus.COMPLETED
+                and (board.winner() or not board.is_full())
             ):
-                # Check if it's a draw
-                board_state = json.loads(game.board_state)
-                if GameService._is_board_full(
-                    board_state
-                ) and not GameService._check_winner(board_state):
-                    update_stats(game.player1_id, False, False, True)  # Draw
-                else:
-                    update_stats(game.player1_id, False, True, False)  # Lost to AI
+                results = [(game.player1_id, "lost")]  # Lost to AI
             else:
-                update_stats(game.player1_id, False, False, True)  # Draw
+                results = [(game.player1_id, "drawn")]
         else:
-            update_stats(game.player1_id, False, True, False)
+            results = [(game.player1_id, "lost")]
 
-        # Update player 2 stats (if human)
         if game.player2_id and game.player2_type == PlayerType.HUMAN:
-            if game.winner_id == game.player2_id:
-                update_stats(game.player2_id, True, False, False)
-            elif game.winner_id is None:
-                update_stats(game.player2_id, False, False, True)  # Draw
-            else:
-                update_stats(game.player2_id, False, True, False)
+            # The other side of player 1's result, even when they are the
+            # same user playing both sides
+            opposite = {"won": "lost", "lost": "won", "drawn": "drawn"}
+            results.append((game.player2_id, opposite[results[0][1]]))
+        return results
 
-        db.commit()
+
+class AsyncGameService:
+    """Async variant of GameService for AsyncSession callers.
+
+    Each method runs the GameService implementation through
+    AsyncSession.run_sync, so database I/O awaits on the event loop while the
+    game logic stays in one place.
+    """
+
+    @staticmethod
+    async def create_game(
+        db: AsyncSession,
+        player1_id: int,
+        player2_id: int | None = None,
+        player2_type: PlayerType = PlayerType.HUMAN,
+    ) -> Game:
+        """Create a new game"""
+        return await db.run_sync(
+            GameService.create_game, player1_id, player2_id, player2_type
+        )
+
+    @staticmethod
+    async def get_game(db: AsyncSession, game_id: int) -> Game | None:
+        """Get game by ID"""
+        return await db.run_sync(GameService.get_game, game_id)
+
+    @staticmethod
+    async def get_active_games(db: AsyncSession, limit: int = 50) -> list[GameListItem]:
+        """Get list of active games"""
+        return await db.run_sync(GameService.get_active_games, limit)
+
+    @staticmethod
+    async def get_list_item(db: AsyncSession, game_id: int) -> GameListItem | None:
+        """Get a game's games-list entry, or None if it is no longer listed"""
+        return await db.run_sync(GameService.get_list_item, game_id)
+
+    @staticmethod
+    async def get_moves(db: AsyncSession, game_id: int) -> list[GameMoveRecord]:
+        """Get a game's moves in the order they were played"""
+        return await db.run_sync(GameService.get_moves, game_id)
+
+    @staticmethod
+    async def rebuild_game(db: AsyncSession, game_id: int) -> Game | None:
+        """Recover a game's state from its move log, if it is complete"""
+        return await db.run_sync(GameService.rebuild_game, game_id)
+
+    @staticmethod
+    async def join_game(db: AsyncSession, game_id: int, user_id: int) -> Game | None:
+        """Join an existing game as player 2"""
+        return await db.run_sync(GameService.join_game, game_id, user_id)
+
+    @staticmethod
+    async def add_observer(db: AsyncSession, game_id: int, user_id: int) -> bool:
+        """Add observer to a game"""
+        return await db.run_sync(GameService.add_observer, game_id, user_id)
+
+    @staticmethod
+    async def make_move(
+        db: AsyncSession, game_id: int, user_id: int, position: int
+    ) -> tuple[Game | None, str, list[GameMoveEvent]]:
+        """Make a move in the game, computing any AI reply on the AI worker pool
+
+        Also returns an event for each move played, the AI reply included.
+        The game's row stays locked while the reply is computed, which the
+        AI worker pool bounds to AI_MOVE_TIMEOUT.
+        """
+        game, message = await db.run_sync(
+            GameService.make_move, game_id, user_id, position, False
+        )
+        if game is None:
+            return game, message, []
+        events = [GameService.move_event(game, position)]
+        if not GameService.is_ai_turn(game):
+            return game, message, events
+
+        # The move is saved with the reply, in one transaction
+        try:
+            ai_position = await ai_worker_pool.get_move(
+                Board.from_code(game.board_code), "medium"
+            )
+        except Exception:
+            await db.commit()
+            raise
+        game, message = await db.run_sync(GameService.apply_ai_move, game, ai_position)
+        if message == "AI move successful":
+            events.append(GameService.move_event(game, ai_position))
+        return game, message, events
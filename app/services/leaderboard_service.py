@@ -1,51 +1,184 @@
-from sqlalchemy import desc
+import argparse
+import asyncio
+import os
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, String, desc, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 
+from app.database.connection import AsyncSessionLocal, dialect_insert
 from app.models.leaderboard import (
     LeaderboardEntry,
     LeaderboardResponse,
+    LeaderboardWindow,
     UserStats,
+    UserStatsPeriod,
     UserStatsResponse,
 )
 from app.models.user import User
+from app.services.metrics_service import metrics
+from app.services.redis_service import RedisManager
+
+# Games a player needs before they are ranked
+MIN_GAMES = 5
+# How often (seconds) week and month buckets catch up with finished games
+STATS_ROLLUP_INTERVAL = float(os.getenv("STATS_ROLLUP_INTERVAL", "60"))
+# Sorted-set scores hold the win rate in millionths above games played
+_GAMES_SCALE = 10**9
+
+
+def leaderboard_score(stats: UserStats) -> float:
+    """Sorted-set score that orders players like the leaderboard query"""
+    return round((stats.win_rate or 0) * 10**6) * _GAMES_SCALE + min(
+        stats.games_played or 0, _GAMES_SCALE - 1
+    )
+
+
+def period_bounds(window: LeaderboardWindow, day: date) -> tuple[date, date]:
+    """First day of the window holding day, and the first day after it
+
+    Days are UTC dates and weeks start on Monday.
+    """
+    if window == LeaderboardWindow.DAY:
+        return day, day + timedelta(days=1)
+    if window == LeaderboardWindow.WEEK:
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    start = day.replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def leaderboard_fields(stats: UserStats | UserStatsPeriod, user: User) -> dict:
+    """A player's leaderboard entry, less the rank"""
+    return {
+        "user_id": user.id,
+        "username": user.username,
+        "games_played": stats.games_played,
+        "games_won": stats.games_won,
+        "games_lost": stats.games_lost,
+        "games_drawn": stats.games_drawn,
+        "win_rate": stats.win_rate,
+        "avg_moves_per_game": stats.avg_moves_per_game,
+    }
 
 
 class LeaderboardService:
     """Service for managing leaderboard and user statistics"""
 
     @staticmethod
-    def get_leaderboard(db: Session, limit: int = 20) -> LeaderboardResponse:
-        """Get leaderboard with top players"""
+    def get_leaderboard(
+        db: Session,
+        limit: int = 20,
+        offset: int = 0,
+        window: LeaderboardWindow = LeaderboardWindow.ALL,
+        day: date | None = None,
+    ) -> LeaderboardResponse:
+        """Get leaderboard with top players
+
+        Windows other than all-time rank the current day, week or month
+        (the one holding day) from its precomputed bucket.
+        """
+        if window == LeaderboardWindow.ALL:
+            source, criteria = UserStats, []
+        else:
+            start, _ = period_bounds(window, day or datetime.utcnow().date())
+            source = UserStatsPeriod
+            criteria = [
+                UserStatsPeriod.period == window,
+                UserStatsPeriod.period_start == start,
+            ]
+        criteria.append(source.games_played >= MIN_GAMES)
+
         # Query users with stats, ordered by win rate and games played
         stats_query = (
-            db.query(UserStats, User)
-            .join(User)
-            .filter(UserStats.games_played >= 5)  # Minimum games for leaderboard
-            .order_by(desc(UserStats.win_rate), desc(UserStats.games_played))
+            db.query(source, User)
+            .join(User, User.id == source.user_id)
+            .filter(*criteria)
+            .order_by(desc(source.win_rate), desc(source.games_played))
+            .offset(offset)
             .limit(limit)
             .all()
         )
 
-        entries = []
-        for rank, (stats, user) in enumerate(stats_query, 1):
-            entries.append(
-                LeaderboardEntry(
-                    rank=rank,
-                    user_id=user.id,
-                    username=user.username,
-                    games_played=stats.games_played,
-                    games_won=stats.games_won,
-                    games_lost=stats.games_lost,
-                    games_drawn=stats.games_drawn,
-                    win_rate=stats.win_rate,
-                    avg_moves_per_game=stats.avg_moves_per_game,
-                )
-            )
+        entries = [
+            LeaderboardEntry(rank=rank, **leaderboard_fields(stats, user))
+            for rank, (stats, user) in enumerate(stats_query, offset + 1)
+        ]
 
-        total_users = db.query(UserStats).filter(UserStats.games_played >= 5).count()
+        total_users = db.query(source).filter(*criteria).count()
 
         return LeaderboardResponse(entries=entries, total_users=total_users)
 
+    @staticmethod
+    def get_leaderboard_rows(
+        db: Session, user_ids: list[int] | None = None
+    ) -> list[tuple[UserStats, User]]:
+        """Stats and user rows of the given users, or of every ranked player"""
+        query = db.query(UserStats, User).join(User)
+        if user_ids is None:
+            query = query.filter(UserStats.games_played >= MIN_GAMES)
+        else:
+            query = query.filter(UserStats.user_id.in_(user_ids))
+        return query.all()
+
+    @staticmethod
+    def roll_up(db: Session, day: date | None = None):
+        """Recompute the week and month buckets holding day and the day before
+
+        Each bucket is replaced by the sum of its day buckets, so running
+        this again, or on several workers at once, is harmless. The day
+        before is included so games finished just before midnight still
+        reach last week's and last month's totals.
+        """
+        day = day or datetime.utcnow().date()
+        windows = {
+            (window, *period_bounds(window, d))
+            for window in (LeaderboardWindow.WEEK, LeaderboardWindow.MONTH)
+            for d in (day - timedelta(days=1), day)
+        }
+        counters = [
+            "games_played",
+            "games_won",
+            "games_lost",
+            "games_drawn",
+            "total_moves",
+        ]
+        for window, start, end in sorted(windows):
+            totals = {c: func.sum(getattr(UserStatsPeriod, c)) for c in counters}
+            rollup = (
+                select(
+                    UserStatsPeriod.user_id,
+                    literal(window.value, String),
+                    literal(start, Date),
+                    *totals.values(),
+                    totals["games_won"] / totals["games_played"],
+                    totals["total_moves"] / totals["games_played"],
+                )
+                .where(
+                    UserStatsPeriod.period == LeaderboardWindow.DAY,
+                    UserStatsPeriod.period_start >= start,
+                    UserStatsPeriod.period_start < end,
+                )
+                .group_by(UserStatsPeriod.user_id)
+            )
+            columns = [
+                "user_id",
+                "period",
+                "period_start",
+                *counters,
+                "win_rate",
+                "avg_moves_per_game",
+            ]
+            insert = dialect_insert(db)(UserStatsPeriod).from_select(columns, rollup)
+            db.execute(
+                insert.on_conflict_do_update(
+                    index_elements=columns[:3],
+                    set_={c: insert.excluded[c] for c in columns[3:]},
+                )
+            )
+        db.commit()
+
     @staticmethod
     def get_user_stats(db: Session, user_id: int) -> UserStatsResponse:
         """Get statistics for a specific user"""
@@ -82,3 +215,181 @@ class LeaderboardService:
             win_rate=stats.win_rate,
             avg_moves_per_game=stats.avg_moves_per_game,
         )
+
+
+class AsyncLeaderboardService:
+    """Async variant of LeaderboardService for AsyncSession callers"""
+
+    @staticmethod
+    async def get_leaderboard(
+        db: AsyncSession,
+        limit: int = 20,
+        offset: int = 0,
+        window: LeaderboardWindow = LeaderboardWindow.ALL,
+    ) -> LeaderboardResponse:
+        """Get leaderboard with top players"""
+        return await db.run_sync(
+            LeaderboardService.get_leaderboard, limit, offset, window
+        )
+
+    @staticmethod
+    async def roll_up(db: AsyncSession):
+        """Recompute the current week and month buckets"""
+        await db.run_sync(LeaderboardService.roll_up)
+
+    @staticmethod
+    async def get_user_stats(db: AsyncSession, user_id: int) -> UserStatsResponse:
+        """Get statistics for a specific user"""
+        return await db.run_sync(LeaderboardService.get_user_stats, user_id)
+
+
+class RedisLeaderboard:
+    """Leaderboard served from a Redis sorted set
+
+    Pages, a player's rank and their neighbours are O(log n) lookups rather
+    than a sort of user_stats per request. The database stays the source
+    of truth: players are pushed here as their stats change, and rebuild()
+    reloads everyone.
+    """
+
+    def __init__(self, redis_manager: RedisManager):
+        self.redis_manager = redis_manager
+
+    async def get_leaderboard(
+        self, limit: int = 20, offset: int = 0
+    ) -> LeaderboardResponse:
+        """Get a page of the leaderboard, best players first"""
+        entries = await self.redis_manager.get_leaderboard_range(
+            offset, offset + limit - 1
+        )
+        return LeaderboardResponse(
+            entries=self._ranked(entries, offset),
+            total_users=await self.redis_manager.get_leaderboard_size(),
+        )
+
+    async def get_rank(self, user_id: int) -> LeaderboardEntry | None:
+        """Get a player's entry, or None if they aren't ranked"""
+        rank = await self.redis_manager.get_leaderboard_rank(user_id)
+        if rank is None:
+            return None
+        entries = await self.redis_manager.get_leaderboard_range(rank, rank)
+        return next(iter(self._ranked(entries, rank)), None)
+
+    async def get_around(self, user_id: int, radius: int = 5) -> list[LeaderboardEntry]:
+        """Get a player's entry with up to radius players either side"""
+        rank = await self.redis_manager.get_leaderboard_rank(user_id)
+        if rank is None:
+            return []
+        start = max(rank - radius, 0)
+        entries = await self.redis_manager.get_leaderboard_range(start, rank + radius)
+        return self._ranked(entries, start)
+
+    async def update_users(self, db: AsyncSession, user_ids: list[int]):
+        """Push players' current stats, ranking or unranking them"""
+        rows = await db.run_sync(LeaderboardService.get_leaderboard_rows, user_ids)
+        ranked = self._scored(rows)
+        removed = [user_id for user_id in user_ids if user_id not in ranked]
+        await self.redis_manager.update_leaderboard(ranked, removed)
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """Reload the whole leaderboard from the database
+
+        Returns the number of ranked players.
+        """
+        rows = await db.run_sync(LeaderboardService.get_leaderboard_rows)
+        ranked = self._scored(rows)
+        await self.redis_manager.replace_leaderboard(ranked)
+        return len(ranked)
+
+    async def ensure_built(self, db: AsyncSession):
+        """Build the leaderboard if Redis doesn't have one yet"""
+        if not await self.redis_manager.has_leaderboard():
+            await self.rebuild(db)
+
+    @staticmethod
+    def _scored(rows: list[tuple[UserStats, User]]) -> dict[int, tuple[float, dict]]:
+        """Score and entry of each player with enough games to rank"""
+        return {
+            user.id: (leaderboard_score(stats), leaderboard_fields(stats, user))
+            for stats, user in rows
+            if (stats.games_played or 0) >= MIN_GAMES
+        }
+
+    @staticmethod
+    def _ranked(entries: list[dict], offset: int) -> list[LeaderboardEntry]:
+        """Number entries that start at 0-based rank offset"""
+        return [
+            LeaderboardEntry(rank=rank, **entry)
+            for rank, entry in enumerate(entries, offset + 1)
+        ]
+
+
+class StatsRollup:
+    """Rolls day buckets up into week and month buckets in the background"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        interval: float = STATS_ROLLUP_INTERVAL,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        """Start rolling up every interval seconds"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._roll_up_periodically())
+
+    async def stop(self):
+        """Stop the background job"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def roll_up(self):
+        """Recompute the current week and month buckets now"""
+        start = asyncio.get_running_loop().time()
+        async with self.session_factory() as db:
+            await AsyncLeaderboardService.roll_up(db)
+        metrics.observe("leaderboard.rollup", asyncio.get_running_loop().time() - start)
+
+    async def _roll_up_periodically(self):
+        """Roll up every interval seconds, surviving database errors"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.roll_up()
+            except Exception as e:
+                print(f"Error rolling up leaderboard periods: {e}")
+                metrics.increment("leaderboard.rollup_errors")
+
+
+stats_rollup = StatsRollup()
+
+
+async def rebuild_leaderboard():
+    """Rebuild the Redis leaderboard from the database"""
+    redis_manager = RedisManager()
+    try:
+        async with AsyncSessionLocal() as db:
+            count = await RedisLeaderboard(redis_manager).rebuild(db)
+    finally:
+        await redis_manager.close()
+    print(f"Leaderboard rebuilt with {count} ranked players")
+
+
+if __name__ == "__main__":
+    # python -m app.services.leaderboard_service rebuild|rollup
+    parser = argparse.ArgumentParser(description="Leaderboard maintenance")
+    parser.add_argument("command", choices=["rebuild", "rollup"])
+    args = parser.parse_args()
+    if args.command == "rebuild":
+        asyncio.run(rebuild_leaderboard())
+    else:
+        asyncio.run(StatsRollup().roll_up())
@@ -0,0 +1,463 @@
+import asyncio
+import dataclasses
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.database.connection import AsyncSessionLocal
+from app.models.board import Board
+from app.models.game import (
+    Game,
+    GameMoveEvent,
+    GameMoveItem,
+    GameMoveRecord,
+    GameStatus,
+    PlayerType,
+)
+from app.services.ai_service import ai_worker_pool
+from app.services.game_service import AsyncGameService, GameService
+from app.services.metrics_service import metrics
+
+# Serve in-progress games from memory. Off by default: it needs every move
+# of a game to reach the same process, so only turn it on with a single
+# uvicorn worker or a proxy that routes each game's requests to one worker.
+# Otherwise two workers can each hold, play and broadcast their own copy.
+LIVE_GAME_STORE = os.getenv("LIVE_GAME_STORE", "false").lower() == "true"
+# How often unsaved moves are written back, and how many games per write
+GAME_FLUSH_INTERVAL = float(os.getenv("GAME_FLUSH_INTERVAL", "0.2"))
+GAME_FLUSH_BATCH = int(os.getenv("GAME_FLUSH_BATCH", "500"))
+# Saved games untouched this long (seconds) are dropped from memory
+GAME_IDLE_TIMEOUT = float(os.getenv("GAME_IDLE_TIMEOUT", "1800"))
+
+# Columns a move can change
+_PERSISTED_FIELDS = (
+    "board_code",
+    "current_turn",
+    "status",
+    "winner_id",
+    "total_moves",
+    "updated_at",
+    "completed_at",
+)
+
+# Compare-and-swap write of one game; matches no row if another writer got
+# there first
+_games = Game.__table__
+_CAS_UPDATE = (
+    update(_games)
+    .where(_games.c.id == bindparam("_id"), _games.c.version == bindparam("_version"))
+    .values(version=bindparam("_version") + 1)
+)
+
+
+@dataclass
+class LiveGame:
+    """In-progress game held in memory, shaped like a Game row"""
+
+    id: int
+    player1_id: int
+    player2_id: int | None
+    player2_type: PlayerType
+    board_code: int
+    current_turn: str
+    status: GameStatus
+    winner_id: int | None
+    total_moves: int
+    created_at: datetime | None
+    updated_at: datetime | None
+    completed_at: datetime | None
+    # Version of the row as last read or written
+    version: int
+
+    @classmethod
+    def from_game(cls, game: Game) -> "LiveGame":
+        """Copy a Game row"""
+        return cls(**{f.name: getattr(game, f.name) for f in dataclasses.fields(cls)})
+
+
+class LiveGameStore:
+    """Owns in-progress games: moves are applied in memory and written back
+    to the database in batches by a background task"""
+
+    def __init__(
+        self,
+        enabled: bool = LIVE_GAME_STORE,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        flush_interval: float = GAME_FLUSH_INTERVAL,
+        batch_size: int = GAME_FLUSH_BATCH,
+        idle_timeout: float = GAME_IDLE_TIMEOUT,
+    ):
+        # When disabled every call goes straight to AsyncGameService
+        self.enabled = enabled
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self._games: dict[int, LiveGame] = {}
+        # Monotonic time each game was last loaded or played
+        self._last_used: dict[int, float] = {}
+        # One move at a time per game
+        self._locks: dict[int, asyncio.Lock] = {}
+        # Games with moves not yet in the database, in the order they changed
+        self._unsaved: dict[int, None] = {}
+        # Move log rows not yet in the database, per game
+        self._moves: dict[int, list[dict]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
+        self._early_flushes: set[asyncio.Task] = set()
+        # Awaited with a session and the ids of players whose stats were
+        # just saved, e.g. to update the Redis leaderboard
+        self.stats_listener: (
+            Callable[[AsyncSession, list[int]], Awaitable[None]] | None
+        ) = None
+        # Awaited with the ids of games another writer changed, whose
+        # players need the saved state, e.g. sent as WebSocket snapshots
+        self.conflict_listener: Callable[[list[int]], Awaitable[None]] | None = None
+        # Awaited with the ids of games just saved as finished, e.g. to drop
+        # cached games lists read while the database still had them in play
+        self.finished_listener: Callable[[list[int]], Awaitable[None]] | None = None
+        metrics.register_gauge("games.live", lambda: len(self._games))
+        metrics.register_gauge("games.unsaved", lambda: len(self._unsaved))
+
+    def get(self, game_id: int) -> LiveGame | None:
+        """Get a game held in memory"""
+        return self._games.get(game_id)
+
+    async def get_game(self, db: AsyncSession, game_id: int) -> LiveGame | Game | None:
+        """Get a game, preferring the in-memory state over the database row"""
+        return self._games.get(game_id) or await AsyncGameService.get_game(db, game_id)
+
+    async def get_moves(self, db: AsyncSession, game_id: int) -> list[GameMoveItem]:
+        """Get a game's move log, including moves not saved yet"""
+        saved = await AsyncGameService.get_moves(db, game_id)
+        pending = self._moves.get(game_id, [])
+        return [GameMoveItem.model_validate(move) for move in saved] + [
+            GameMoveItem(**move) for move in pending
+        ]
+
+    async def _load(self, db: AsyncSession, game_id: int) -> LiveGame | Game | None:
+        """Get a game, taking ownership of it if it is in progress"""
+        live = self._games.get(game_id)
+        if live is None:
+            game = await AsyncGameService.get_game(db, game_id)
+            if game is None or game.status != GameStatus.IN_PROGRESS:
+                return game
+            live = self._games.setdefault(game_id, LiveGame.from_game(game))
+        self._last_used[game_id] = time.monotonic()
+        return live
+
+    async def make_move(
+        self, db: AsyncSession, game_id: int, user_id: int, position: int
+    ) -> tuple[LiveGame | None, str, list[GameMoveEvent]]:
+        """Make a move and any AI reply in memory
+
+        Same contract as AsyncGameService.make_move; the database catches
+        up on the next flush.
+        """
+        if not self.enabled:
+            result = await AsyncGameService.make_move(db, game_id, user_id, position)
+            game = result[0]
+            if game is not None and game.status == GameStatus.COMPLETED:
+                await self._stats_saved([game])
+            return result
+
+        game = await self._load(db, game_id)
+        if game is None:
+            return None, "Game not found", []
+        if game_id not in self._games:
+            # Not in progress, so there is nothing to lock
+            return None, GameService.validate_move(game, user_id, position), []
+
+        async with self._locks.setdefault(game_id, asyncio.Lock()):
+            # A flush may have let go of the game while this move waited
+            game = self._games.get(game_id) or await self._load(db, game_id)
+            if game is None:
+                return None, "Game not found", []
+
+            error = GameService.validate_move(game, user_id, position)
+            if error:
+                if game_id not in self._games:
+                    # Reloaded after it finished; don't keep its lock
+                    self._locks.pop(game_id, None)
+                return None, error, []
+
+            self._play(game, position)
+            events = [GameService.move_event(game, position)]
+            message = "Move successful"
+
+            if GameService.is_ai_turn(game):
+                board = Board.from_code(game.board_code)
+                ai_position = await ai_worker_pool.get_move(board, "medium")
+                # A flush may have rebased the game while the AI thought
+                if (
+                    ai_position == -1
+                    or game.board_code != board.code
+                    or not board.is_empty(ai_position)
+                ):
+                    message = "No valid AI move"
+                else:
+                    self._play(game, ai_position)
+                    events.append(GameService.move_event(game, ai_position))
+                    message = "AI move successful"
+
+        metrics.increment("games.moves", len(events))
+        if len(self._unsaved) >= self.batch_size:
+            self._start_flush()
+        return game, message, events
+
+    def _play(self, game: LiveGame, position: int):
+        """Apply a validated move and queue the game for writing"""
+        GameService.apply_move(game, position)
+        game.updated_at = datetime.utcnow()
+        self._moves.setdefault(game.id, []).append(
+            {
+                "game_id": game.id,
+                "seq": game.total_moves,
+                "position": position,
+                "mark": Board.from_code(game.board_code).cell(position),
+            }
+        )
+        self._unsaved.pop(game.id, None)
+        self._unsaved[game.id] = None
+
+    async def start(self):
+        """Start writing unsaved moves in the background"""
+        if self.enabled and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stop the background writer and save everything still in memory"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        while self._unsaved:
+            if not await self.flush():
+                break
+
+    async def _flush_periodically(self):
+        """Flush unsaved games every flush_interval seconds"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            while self._unsaved and await self.flush():
+                pass
+            self.evict_idle()
+
+    def _start_flush(self):
+        """Flush now instead of waiting for the next interval"""
+        if not self._flush_lock.locked():
+            task = asyncio.create_task(self.flush())
+            self._early_flushes.add(task)
+            task.add_done_callback(self._early_flushes.discard)
+
+    def evict_idle(self):
+        """Drop saved games nobody has played for idle_timeout seconds"""
+        cutoff = time.monotonic() - self.idle_timeout
+        for game_id, last_used in list(self._last_used.items()):
+            if last_used < cutoff and game_id not in self._unsaved:
+                self._forget(game_id)
+
+    def _forget(self, game_id: int):
+        """Stop holding a game in memory"""
+        self._games.pop(game_id, None)
+        self._locks.pop(game_id, None)
+        self._last_used.pop(game_id, None)
+
+    async def flush(self) -> bool:
+        """Write one batch of unsaved games in a single transaction
+
+        Returns False if the write failed; the games stay queued.
+        """
+        finished = []
+        resync = []
+        async with self._flush_lock:
+            game_ids = list(self._unsaved)[: self.batch_size]
+            if not game_ids:
+                return True
+            # Copy so moves made while writing aren't half-saved
+            batch = [dataclasses.replace(self._games[i]) for i in game_ids]
+            moves = {i: self._moves.pop(i, []) for i in game_ids}
+            for game_id in game_ids:
+                del self._unsaved[game_id]
+
+            start = asyncio.get_running_loop().time()
+            try:
+                async with self.session_factory() as db:
+                    conflicts, rebased = await db.run_sync(self._persist, batch, moves)
+            except Exception as e:
+                print(f"Error saving live games: {e}")
+                metrics.increment("games.flush_errors")
+                # Requeue ahead of newer changes, keeping their order
+                self._unsaved = dict.fromkeys(game_ids) | self._unsaved
+                for game_id, taken in moves.items():
+                    self._moves[game_id] = taken + self._moves.get(game_id, [])
+                return False
+            metrics.observe("games.flush", asyncio.get_running_loop().time() - start)
+            metrics.increment("games.flushed", len(batch) - len(conflicts))
+
+            for game in batch:
+                if game.id in conflicts or game.id in rebased:
+                    # Another writer changed the row; players need its state
+                    metrics.increment("games.flush_conflicts")
+                    resync.append(game.id)
+                if game.id in conflicts:
+                    # The moves made here no longer apply; the row wins
+                    self._moves.pop(game.id, None)
+                    self._unsaved.pop(game.id, None)
+                    self._forget(game.id)
+                elif game.id in rebased:
+                    if self._rebase(rebased[game.id]):
+                        finished.append(rebased[game.id])
+                elif game.status != GameStatus.IN_PROGRESS:
+                    # Finished games are saved for good; stop holding them
+                    finished.append(game)
+                    self._forget(game.id)
+                else:
+                    self._games[game.id].version = game.version + 1
+
+        if finished:
+            await self._stats_saved(finished)
+            await self._finished_saved([game.id for game in finished])
+        if resync:
+            await self._resync(resync)
+        return True
+
+    def _rebase(self, saved: LiveGame) -> bool:
+        """Hold the state written on top of another writer's, replaying any
+        moves made here while it was written
+
+        Returns True if the game is finished and saved for good.
+        """
+        live = self._games[saved.id]
+        state = dataclasses.replace(saved, version=saved.version + 1)
+        played = dataclasses.replace(state)
+        later = self._replay(played, self._moves.get(saved.id, []))
+        if later is None:
+            # They no longer apply; the saved state wins
+            later = []
+            self._unsaved.pop(saved.id, None)
+        else:
+            state = played
+        # Update in place: moves waiting on the game's lock hold this object
+        for field in dataclasses.fields(LiveGame):
+            setattr(live, field.name, getattr(state, field.name))
+        if later:
+            self._moves[saved.id] = later
+        else:
+            self._moves.pop(saved.id, None)
+        if saved.id in self._unsaved or live.status == GameStatus.IN_PROGRESS:
+            return False
+        self._forget(saved.id)
+        return True
+
+    async def _finished_saved(self, game_ids: list[int]):
+        """Tell the finished listener which games were saved as finished"""
+        if self.finished_listener is None:
+            return
+        try:
+            await self.finished_listener(game_ids)
+        except Exception as e:
+            print(f"Error reporting finished games: {e}")
+
+    async def _resync(self, game_ids: list[int]):
+        """Tell the conflict listener which games were changed elsewhere"""
+        if self.conflict_listener is None:
+            return
+        try:
+            await self.conflict_listener(game_ids)
+        except Exception as e:
+            print(f"Error resyncing games: {e}")
+
+    @staticmethod
+    def _replay(game: LiveGame, moves: list[dict]) -> list[dict] | None:
+        """Play logged moves again on game, renumbering them
+
+        Returns None if one no longer applies, leaving game part-played.
+        """
+        replayed = []
+        for move in moves:
+            if (
+                game.status != GameStatus.IN_PROGRESS
+                or game.current_turn != move["mark"]
+                or not Board.from_code(game.board_code).is_empty(move["position"])
+            ):
+                return None
+            GameService.apply_move(game, move["position"])
+            game.updated_at = datetime.utcnow()
+            replayed.append({**move, "seq": game.total_moves})
+        return replayed
+
+    async def _stats_saved(self, games: list[Game | LiveGame]):
+        """Tell the stats listener about the players of finished games"""
+        if self.stats_listener is None:
+            return
+        user_ids = [
+            user_id for game in games for user_id, _ in GameService._results(game)
+        ]
+        try:
+            async with self.session_factory() as db:
+                await self.stats_listener(db, user_ids)
+        except Exception as e:
+            print(f"Error reporting saved stats: {e}")
+
+    @staticmethod
+    def _persist(
+        db: Session, games: list[LiveGame], moves: dict[int, list[dict]]
+    ) -> tuple[set[int], dict[int, LiveGame]]:
+        """Save game states, their new moves and the stats of finished games
+
+        Each game is written with a compare-and-swap on its version, one
+        statement per game since executemany row counts aren't reliable on
+        every driver. A game another writer changed has its new moves
+        replayed on the row as that writer left it. Returns the ids of games
+        whose moves no longer applied, so nothing of theirs was saved, and
+        the states saved for those that were replayed.
+        """
+        conflicts = {game.id for game in games if not LiveGameStore._write(db, game)}
+        # Replayed moves are renumbered; the caller's copy is kept for retries
+        moves = dict(moves)
+        rebased = {}
+        for game_id in conflicts:
+            row = db.get(Game, game_id, populate_existing=True)
+            game = LiveGame.from_game(row)
+            replayed = LiveGameStore._replay(game, moves[game_id])
+            if replayed is not None and LiveGameStore._write(db, game):
+                rebased[game_id] = game
+                moves[game_id] = replayed
+        conflicts -= rebased.keys()
+
+        saved = [game for game in games if game.id not in conflicts]
+        saved = [rebased.get(game.id, game) for game in saved]
+        rows = [row for game in saved for row in moves[game.id]]
+        if rows:
+            db.execute(insert(GameMoveRecord), rows)
+        for game in saved:
+            if game.status == GameStatus.COMPLETED:
+                GameService._update_user_stats(db, game)
+        db.commit()
+        return conflicts, rebased
+
+    @staticmethod
+    def _write(db: Session, game: LiveGame) -> bool:
+        """Compare-and-swap a game's row; False if another writer changed it"""
+        result = db.execute(
+            _CAS_UPDATE,
+            {
+                "_id": game.id,
+                "_version": game.version,
+                **{f: getattr(game, f) for f in _PERSISTED_FIELDS},
+            },
+        )
+        return result.rowcount == 1
+
+
+live_game_store = LiveGameStore()
@@ -0,0 +1,62 @@
+import threading
+from collections.abc import Callable
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and timers exposed at /api/metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+        self._gauges: dict[str, float] = {}
+        self._live_gauges: dict[str, Callable[[], float]] = {}
+        self._timers: dict[str, dict[str, float]] = {}
+
+    def increment(self, name: str, value: int = 1):
+        """Add to a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        """Set a gauge to its current value"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def register_gauge(self, name: str, read: Callable[[], float]):
+        """Register a gauge whose value is read when metrics are collected"""
+        with self._lock:
+            self._live_gauges[name] = read
+
+    def observe(self, name: str, seconds: float):
+        """Record a duration"""
+        with self._lock:
+            timer = self._timers.setdefault(
+                name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            )
+            timer["count"] += 1
+            timer["total_seconds"] += seconds
+            timer["max_seconds"] = max(timer["max_seconds"], seconds)
+
+    def snapshot(self) -> dict:
+        """Get all current metric values"""
+        with self._lock:
+            gauges = dict(self._gauges)
+            live_gauges = dict(self._live_gauges)
+            result = {
+                "counters": dict(self._counters),
+                "timers": {name: dict(timer) for name, timer in self._timers.items()},
+            }
+        for name, read in live_gauges.items():
+            gauges[name] = read()
+        result["gauges"] = gauges
+        return result
+
+    def reset(self):
+        """Clear recorded values (live gauges stay registered)"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timers.clear()
+
+
+metrics = MetricsRegistry()
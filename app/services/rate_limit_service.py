@@ -0,0 +1,151 @@
+import math
+import os
+import re
+from dataclasses import dataclass
+
+from fastapi.responses import JSONResponse
+
+from app.services.metrics_service import metrics
+from app.services.redis_service import RedisManager
+
+# Set false to turn every limit off, e.g. for load tests
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """At most limit requests in any window seconds"""
+
+    limit: int
+    window: float
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Read a limit written as "requests/seconds", e.g. "10/60" """
+        limit, window = value.split("/")
+        return cls(int(limit), float(window))
+
+
+def _limit(name: str, default: str) -> RateLimit:
+    """Limit set by the RATE_LIMIT_<NAME> environment variable"""
+    return RateLimit.parse(os.getenv(f"RATE_LIMIT_{name}", default))
+
+
+# Per client IP, checked by RateLimitMiddleware before the request is read
+IP_LIMITS = {
+    "login": _limit("LOGIN_IP", "10/60"),
+    "register": _limit("REGISTER_IP", "5/300"),
+    "create_game": _limit("CREATE_GAME_IP", "60/60"),
+    "move": _limit("MOVE_IP", "600/60"),
+}
+# Per signed-in user, checked by the rate_limited dependency and on
+# WebSocket moves
+USER_LIMITS = {
+    "create_game": _limit("CREATE_GAME_USER", "20/60"),
+    "move": _limit("MOVE_USER", "120/60"),
+}
+# Per username signed in as, however many addresses the attempts come from
+USERNAME_LIMITS = {
+    "login": _limit("LOGIN_USERNAME", "10/300"),
+}
+
+# Requests RateLimitMiddleware limits: method, path and the IP_LIMITS entry
+_LIMITED_ROUTES = [
+    ("POST", re.compile(r"/api/auth/login"), "login"),
+    ("POST", re.compile(r"/api/auth/register"), "register"),
+    ("POST", re.compile(r"/api/games/?"), "create_game"),
+    ("POST", re.compile(r"/api/games/\d+/move"), "move"),
+]
+
+
+class RateLimiter:
+    """Counts requests per client against sliding-window limits in Redis
+
+    Limits are shared by every worker. While Redis is unavailable requests
+    are let through rather than turned away.
+    """
+
+    def __init__(
+        self,
+        redis_manager: RedisManager | None = None,
+        enabled: bool = RATE_LIMIT_ENABLED,
+    ):
+        self.redis_manager = redis_manager
+        self.enabled = enabled
+
+    async def hit(
+        self, action: str, client: str | int, limit: RateLimit
+    ) -> float | None:
+        """Count a request by client; seconds it must wait if over the limit"""
+        if not self.enabled or self.redis_manager is None:
+            return None
+        try:
+            allowed, retry_after = await self.redis_manager.hit_rate_limit(
+                f"rate_limit:{action}:{client}", limit.limit, limit.window
+            )
+        except Exception as e:
+            print(f"Error checking rate limit: {e}")
+            metrics.increment("rate_limit.errors")
+            return None
+        if allowed:
+            return None
+        metrics.increment(f"rate_limit.{action}.rejected")
+        return retry_after
+
+
+# Detail of every 429 response
+TOO_MANY_REQUESTS = "Too many requests, slow down"
+
+
+def retry_after_header(seconds: float) -> dict[str, str]:
+    """Retry-After header, in whole seconds"""
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+def too_many_requests(retry_after: float) -> JSONResponse:
+    """429 telling the client how long to back off"""
+    return JSONResponse(
+        {"detail": TOO_MANY_REQUESTS},
+        status_code=429,
+        headers=retry_after_header(retry_after),
+    )
+
+
+class RateLimitMiddleware:
+    """Applies IP_LIMITS to the routes in _LIMITED_ROUTES
+
+    Runs before the body is read or the user authenticated, so floods are
+    turned away cheaply. Behind a proxy, run uvicorn with --proxy-headers and
+    --forwarded-allow-ips so the client address is the caller's, not the
+    proxy's, and have the proxy overwrite X-Forwarded-For rather than append.
+    """
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            action = self._action(scope["method"], scope["path"])
+            if action is not None:
+                client = scope.get("client")
+                retry_after = await self.limiter.hit(
+                    f"ip:{action}",
+                    client[0] if client else "unknown",
+                    IP_LIMITS[action],
+                )
+                if retry_after is not None:
+                    await too_many_requests(retry_after)(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _action(method: str, path: str) -> str | None:
+        """The limited action a request is, if any"""
+        for route_method, pattern, action in _LIMITED_ROUTES:
+            if method == route_method and pattern.fullmatch(path):
+                return action
+        return None
+
+
+rate_limiter = RateLimiter()
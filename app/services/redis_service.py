@@ -1,8 +1,35 @@
 import json
 import os
+from uuid import uuid4
 
 import redis.asyncio as redis
 
+# Leaderboard: user ids scored by rank order, plus each entry's details
+LEADERBOARD_KEY = "leaderboard"
+LEADERBOARD_ENTRIES_KEY = "leaderboard:entries"
+
+# Sliding-window log: KEYS[1] is a sorted set of the requests allowed in the
+# last ARGV[2] microseconds, scored by when they were made. Uses the Redis
+# clock so every worker agrees on the window. Returns {1, 0} if the request
+# is allowed and recorded, else {0, microseconds until a slot frees up}.
+RATE_LIMIT_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000000 + tonumber(time[2])
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], math.ceil(window / 1000))
+    return {1, 0}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if #oldest == 0 then
+    return {0, window}
+end
+return {0, tonumber(oldest[2]) + window - now}
+"""
+
 
 class RedisManager:
     """Redis manager for caching and session management"""
@@ -10,6 +37,7 @@ class RedisManager:
     def __init__(self):
         redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
         self.redis = redis.from_url(redis_url, decode_responses=True)
+        self._rate_limit_script = None
 
     async def close(self):
         """Close Redis connection"""
@@ -36,8 +64,11 @@ class RedisManager:
     # WebSocket connection tracking
     async def add_user_connection(self, user_id: int, connection_id: str):
         """Track user WebSocket connection"""
-        await self.redis.sadd(f"connections:{user_id}", connection_id)
-        await self.redis.expire(f"connections:{user_id}", 3600)  # 1 hour
+        # One round trip, and the set never exists without its expiry
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(f"connections:{user_id}", connection_id)
+            pipe.expire(f"connections:{user_id}", 3600)  # 1 hour
+            await pipe.execute()
 
     async def remove_user_connection(self, user_id: int, connection_id: str):
         """Remove user WebSocket connection"""
@@ -48,11 +79,25 @@ class RedisManager:
         connections = await self.redis.smembers(f"connections:{user_id}")
         return set(connections)
 
+    async def get_user_connections_many(
+        self, user_ids: list[int]
+    ) -> dict[int, set[str]]:
+        """Get the connections of several users in one round trip"""
+        results = await self._smembers_many(
+            [f"connections:{user_id}" for user_id in user_ids]
+        )
+        return {
+            user_id: set(connections)
+            for user_id, connections in zip(user_ids, results, strict=True)
+        }
+
     # Game observers tracking
     async def add_game_observer(self, game_id: int, user_id: int):
         """Add observer to a game"""
-        await self.redis.sadd(f"game_observers:{game_id}", str(user_id))
-        await self.redis.expire(f"game_observers:{game_id}", 86400)  # 24 hours
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(f"game_observers:{game_id}", str(user_id))
+            pipe.expire(f"game_observers:{game_id}", 86400)  # 24 hours
+            await pipe.execute()
 
     async def remove_game_observer(self, game_id: int, user_id: int):
         """Remove observer from a game"""
@@ -63,52 +108,165 @@ class RedisManager:
         observers = await self.redis.smembers(f"game_observers:{game_id}")
         return {int(user_id) for user_id in observers}
 
-    # Game state caching
-    async def cache_game_state(
-        self, game_id: int, game_data: dict, expire_seconds: int = 3600
-    ):
-        """Cache game state for faster access"""
-        await self.redis.setex(
-            f"game_state:{game_id}", expire_seconds, json.dumps(game_data)
+    async def get_game_observers_many(self, game_ids: list[int]) -> dict[int, set[int]]:
+        """Get the observers of several games in one round trip"""
+        results = await self._smembers_many(
+            [f"game_observers:{game_id}" for game_id in game_ids]
         )
+        return {
+            game_id: {int(user_id) for user_id in observers}
+            for game_id, observers in zip(game_ids, results, strict=True)
+        }
 
-    async def get_cached_game_state(self, game_id: int) -> dict | None:
-        """Get cached game state"""
-        data = await self.redis.get(f"game_state:{game_id}")
-        return json.loads(data) if data else None
+    async def _smembers_many(self, keys: list[str]) -> list[set[str]]:
+        """Read several sets in one pipelined round trip"""
+        if not keys:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.smembers(key)
+            return await pipe.execute()
 
-    async def invalidate_game_cache(self, game_id: int):
-        """Remove cached game state"""
-        await self.redis.delete(f"game_state:{game_id}")
+    # Pub/sub for cross-worker broadcasts
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish a message, returning how many subscribers received it"""
+        return await self.redis.publish(channel, message)
 
-    # Rate limiting
-    async def check_rate_limit(
-        self, user_id: int, action: str, limit: int = 10, window_seconds: int = 60
-    ) -> bool:
-        """Check if user has exceeded rate limit for an action"""
-        key = f"rate_limit:{user_id}:{action}"
-        current = await self.redis.get(key)
+    async def publish_many(self, messages: list[tuple[str, str]]) -> list[int]:
+        """Publish (channel, message) pairs in order, in one round trip"""
+        if not messages:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for channel, message in messages:
+                pipe.publish(channel, message)
+            return await pipe.execute()
+
+    def pubsub(self):
+        """Create a pub/sub client on the shared connection pool"""
+        return self.redis.pubsub(ignore_subscribe_messages=True)
+
+    # Leaderboard sorted set
+    async def update_leaderboard(
+        self, entries: dict[int, tuple[float, dict]], removed: list[int] | None = None
+    ):
+        """Set users' scores and details, and drop users who no longer rank"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if entries:
+                pipe.zadd(
+                    LEADERBOARD_KEY,
+                    {str(user_id): score for user_id, (score, _) in entries.items()},
+                )
+                pipe.hset(
+                    LEADERBOARD_ENTRIES_KEY,
+                    mapping={
+                        str(user_id): json.dumps(entry)
+                        for user_id, (_, entry) in entries.items()
+                    },
+                )
+            if removed:
+                members = [str(user_id) for user_id in removed]
+                pipe.zrem(LEADERBOARD_KEY, *members)
+                pipe.hdel(LEADERBOARD_ENTRIES_KEY, *members)
+            await pipe.execute()
+
+    async def replace_leaderboard(self, entries: dict[int, tuple[float, dict]]):
+        """Swap in a whole new leaderboard atomically"""
+        building = f"{LEADERBOARD_KEY}:building"
+        building_entries = f"{LEADERBOARD_ENTRIES_KEY}:building"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(building, building_entries)
+            if entries:
+                pipe.zadd(
+                    building,
+                    {str(user_id): score for user_id, (score, _) in entries.items()},
+                )
+                pipe.hset(
+                    building_entries,
+                    mapping={
+                        str(user_id): json.dumps(entry)
+                        for user_id, (_, entry) in entries.items()
+                    },
+                )
+                pipe.rename(building, LEADERBOARD_KEY)
+                pipe.rename(building_entries, LEADERBOARD_ENTRIES_KEY)
+            else:
+                pipe.delete(LEADERBOARD_KEY, LEADERBOARD_ENTRIES_KEY)
+            await pipe.execute()
 
-        if current is None:
-            await self.redis.setex(key, window_seconds, 1)
-            return True
+    async def has_leaderboard(self) -> bool:
+        """Check whether the leaderboard has been built"""
+        return bool(await self.redis.exists(LEADERBOARD_ENTRIES_KEY))
 
-        if int(current) >= limit:
-            return False
+    async def get_leaderboard_range(self, start: int, stop: int) -> list[dict]:
+        """Get entries by 0-based rank, best first, stop included"""
+        user_ids = await self.redis.zrevrange(LEADERBOARD_KEY, start, stop)
+        if not user_ids:
+            return []
+        entries = await self.redis.hmget(LEADERBOARD_ENTRIES_KEY, user_ids)
+        return [json.loads(entry) for entry in entries if entry]
 
-        await self.redis.incr(key)
-        return True
+    async def get_leaderboard_rank(self, user_id: int) -> int | None:
+        """Get a user's 0-based rank, or None if they aren't ranked"""
+        return await self.redis.zrevrank(LEADERBOARD_KEY, str(user_id))
 
-    # Active games list caching
-    async def cache_active_games(self, games_data: list, expire_seconds: int = 60):
-        """Cache active games list"""
-        await self.redis.setex("active_games", expire_seconds, json.dumps(games_data))
+    async def get_leaderboard_size(self) -> int:
+        """Count ranked users"""
+        return await self.redis.zcard(LEADERBOARD_KEY)
 
-    async def get_cached_active_games(self) -> list | None:
-        """Get cached active games list"""
-        data = await self.redis.get("active_games")
+    # Shared tier of the read-through caches (see cache_service)
+    async def set_cached(self, key: str, data, expire_seconds: float):
+        """Cache JSON-ready data"""
+        await self.redis.set(key, json.dumps(data), px=int(expire_seconds * 1000))
+
+    async def get_cached(self, key: str):
+        """Get cached data, or None"""
+        data = await self.redis.get(key)
+        return json.loads(data) if data else None
+
+    async def delete_cached(self, *keys: str):
+        """Remove cached data"""
+        if keys:
+            await self.redis.delete(*keys)
+
+    async def set_cached_field(self, key: str, field: str, data, expire_seconds: float):
+        """Cache JSON-ready data in a field of a hash, which expires
+        expire_seconds after its first field was set"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, field, json.dumps(data))
+            pipe.pexpire(key, int(expire_seconds * 1000), nx=True)
+            await pipe.execute()
+
+    async def get_cached_field(self, key: str, field: str):
+        """Get cached data from a field of a hash, or None"""
+        data = await self.redis.hget(key, field)
         return json.loads(data) if data else None
 
-    async def invalidate_active_games_cache(self):
-        """Invalidate active games cache"""
-        await self.redis.delete("active_games")
+    async def delete_cached_fields(self, key: str, *fields: str):
+        """Remove cached data from fields of a hash"""
+        if fields:
+            await self.redis.hdel(key, *fields)
+
+    # Rate limiting
+    async def hit_rate_limit(
+        self, key: str, limit: int, window_seconds: float
+    ) -> tuple[bool, float]:
+        """Record a request unless limit were already made in the last
+        window_seconds, in one atomic round trip
+
+        Returns whether it was allowed and, if not, seconds until it would be.
+        """
+        if self._rate_limit_script is None:
+            self._rate_limit_script = self.redis.register_script(RATE_LIMIT_SCRIPT)
+        allowed, retry_after = await self._rate_limit_script(
+            keys=[key], args=[limit, int(window_seconds * 10**6), uuid4().hex]
+        )
+        return bool(allowed), retry_after / 10**6
+
+    async def check_rate_limit(
+        self, user_id: int, action: str, limit: int = 10, window_seconds: int = 60
+    ) -> bool:
+        """Check if user has exceeded rate limit for an action"""
+        allowed, _ = await self.hit_rate_limit(
+            f"rate_limit:{user_id}:{action}", limit, window_seconds
+        )
+        return allowed
@@ -1,20 +1,44 @@
+import asyncio
 import os
 from datetime import datetime, timedelta
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 
-from app.models.user import User, UserCreate
+from app.database.connection import AsyncSessionLocal
+from app.models.user import User, UserCreate, UserResponse
+from app.services.cache_service import TwoTierCache, cache_bus
+from app.services.metrics_service import metrics
+from app.services.worker_pool import BoundedWorkerPool, WorkerPoolFullError
+
+# bcrypt cost factor for new hashes; existing hashes keep the cost they were
+# made with. Lower it (minimum 4) for load tests, never in production.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads hashing passwords, and how many hashes may be queued or running
+# before sign-ins are turned away
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", "32"))
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
 
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# User records kept per worker for authenticating requests: how many, and
+# for how long (seconds). Deactivating a user drops every worker's copy.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+# How long (seconds) the copy shared through Redis lives
+USER_CACHE_REDIS_TTL = int(os.getenv("USER_CACHE_REDIS_TTL", "300"))
+
 
 class UserService:
     """Service for user management and authentication"""
@@ -45,9 +69,12 @@ class UserService:
         return db.query(User).filter(User.id == user_id).first()
 
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> User:
-        """Create a new user"""
-        hashed_password = UserService.get_password_hash(user_data.password)
+    def create_user(
+        db: Session, user_data: UserCreate, hashed_password: str | None = None
+    ) -> User:
+        """Create a new user, hashing their password unless it already is"""
+        if hashed_password is None:
+            hashed_password = UserService.get_password_hash(user_data.password)
         user = User(
             username=user_data.username,
             email=user_data.email,
@@ -62,12 +89,28 @@ class UserService:
     def authenticate_user(db: Session, username: str, password: str) -> User | None:
         """Authenticate a user"""
         user = UserService.get_user_by_username(db, username)
-        if not user:
+        if not user or not user.is_active:
             return None
         if not UserService.verify_password(password, user.password_hash):
             return None
         return user
 
+    @staticmethod
+    def deactivate_user(db: Session, user_id: int) -> User | None:
+        """Stop a user from signing in or using their tokens"""
+        user = UserService.get_user_by_id(db, user_id)
+        if user is None:
+            return None
+        user.is_active = False
+        db.commit()
+        db.refresh(user)
+        return user
+
+    @staticmethod
+    def create_user_token(user: User) -> str:
+        """Create an access token carrying the user's id and username"""
+        return UserService.create_access_token({"sub": user.username, "uid": user.id})
+
     @staticmethod
     def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
         """Create access token"""
@@ -80,6 +123,14 @@ class UserService:
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return encoded_jwt
 
+    @staticmethod
+    def decode_token(token: str) -> dict | None:
+        """Claims of a valid, unexpired token"""
+        try:
+            return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+
     @staticmethod
     def get_user_from_token(db: Session, token: str) -> User | None:
         """Get user from JWT token"""
@@ -93,3 +144,172 @@ class UserService:
 
         user = UserService.get_user_by_username(db, username)
         return user
+
+
+class AsyncUserService:
+    """Async variant of UserService for AsyncSession callers"""
+
+    @staticmethod
+    async def get_user_by_username(db: AsyncSession, username: str) -> User | None:
+        """Get user by username"""
+        return await db.run_sync(UserService.get_user_by_username, username)
+
+    @staticmethod
+    async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
+        """Get user by email"""
+        return await db.run_sync(UserService.get_user_by_email, email)
+
+    @staticmethod
+    async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
+        """Get user by ID"""
+        return await db.run_sync(UserService.get_user_by_id, user_id)
+
+    @staticmethod
+    async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
+        """Create a new user, hashing their password off the event loop"""
+        hashed_password = await password_hasher.hash(user_data.password)
+        return await db.run_sync(UserService.create_user, user_data, hashed_password)
+
+    @staticmethod
+    async def authenticate_user(
+        db: AsyncSession, username: str, password: str
+    ) -> User | None:
+        """Authenticate a user, checking their password off the event loop"""
+        user = await AsyncUserService.get_user_by_username(db, username)
+        if not user or not user.is_active:
+            return None
+        if not await password_hasher.verify(password, user.password_hash):
+            return None
+        return user
+
+    @staticmethod
+    async def get_user_from_token(db: AsyncSession, token: str) -> User | None:
+        """Get user from JWT token"""
+        return await db.run_sync(UserService.get_user_from_token, token)
+
+    @staticmethod
+    async def deactivate_user(db: AsyncSession, user_id: int) -> User | None:
+        """Stop a user from signing in or using their tokens"""
+        user = await db.run_sync(UserService.deactivate_user, user_id)
+        if user is not None:
+            await user_cache.invalidate(user_id)
+        return user
+
+
+class PasswordHasherBusyError(Exception):
+    """Too many password hashes are already queued"""
+
+
+class PasswordHasher(BoundedWorkerPool):
+    """Hashes and checks passwords on worker threads
+
+    bcrypt takes a few hundred milliseconds of CPU, which would otherwise
+    stall every request and WebSocket on the worker. At most max_pending
+    hashes may be queued or running; beyond that PasswordHasherBusyError is
+    raised so a burst of sign-ins fails fast instead of queueing forever.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = PASSWORD_WORKERS,
+        max_pending: int = PASSWORD_MAX_PENDING,
+    ):
+        super().__init__("password-hash", max_workers, max_pending)
+        metrics.register_gauge("auth.hash_pending", lambda: self.pending)
+
+    async def hash(self, password: str) -> str:
+        """Hash a new password"""
+        return await self._run(UserService.get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Check a password against its hash"""
+        return await self._run(UserService.verify_password, password, hashed_password)
+
+    async def _run(self, fn, *args):
+        """Run fn on the pool, if there is room in the queue"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            result = await self.run(fn, *args)
+        except WorkerPoolFullError as e:
+            metrics.increment("auth.hash_rejected")
+            raise PasswordHasherBusyError("Too many sign-ins, try again shortly") from e
+        metrics.observe("auth.hash", loop.time() - start)
+        return result
+
+
+class UserCache:
+    """Who a token belongs to, answered without a database query
+
+    User records are read through a TwoTierCache: a small per-worker LRU,
+    shared between workers through Redis, and read from the database only
+    when neither has them.
+    """
+
+    def __init__(
+        self,
+        cache: TwoTierCache | None = None,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+    ):
+        self.cache = cache or TwoTierCache(
+            "users",
+            TypeAdapter(UserResponse),
+            max_size=USER_CACHE_SIZE,
+            ttl=USER_CACHE_TTL,
+            redis_ttl=USER_CACHE_REDIS_TTL,
+        )
+        self.session_factory = session_factory
+
+    async def get_user_from_token(self, token: str) -> UserResponse | None:
+        """Get the active user a token belongs to"""
+        payload = UserService.decode_token(token)
+        if payload is None:
+            return None
+        user_id = payload.get("uid")
+        if user_id is None:
+            # Issued before tokens carried the id
+            user = await self._load_by_username(payload.get("sub"))
+        else:
+            user = await self.get(user_id)
+        if user is None or not user.is_active:
+            return None
+        return user
+
+    async def get(self, user_id: int) -> UserResponse | None:
+        """Get a user's record, from memory, Redis or the database"""
+
+        async def load() -> UserResponse | None:
+            async with self.session_factory() as db:
+                row = await AsyncUserService.get_user_by_id(db, user_id)
+            return None if row is None else UserResponse.model_validate(row)
+
+        return await self.cache.get(str(user_id), load)
+
+    async def invalidate(self, user_id: int):
+        """Forget a user's record, on every worker, so it is read afresh"""
+        await self.cache.invalidate(str(user_id))
+
+    async def _load_by_username(self, username: str | None) -> UserResponse | None:
+        """Read a user by username and cache them under their id"""
+        if username is None:
+            return None
+        async with self.session_factory() as db:
+            row = await AsyncUserService.get_user_by_username(db, username)
+        if row is None:
+            return None
+        user = UserResponse.model_validate(row)
+        await self.cache.put(str(user.id), user)
+        return user
+
+
+password_hasher = PasswordHasher()
+user_cache = UserCache(
+    TwoTierCache(
+        "users",
+        TypeAdapter(UserResponse),
+        max_size=USER_CACHE_SIZE,
+        ttl=USER_CACHE_TTL,
+        redis_ttl=USER_CACHE_REDIS_TTL,
+        bus=cache_bus,
+    )
+)
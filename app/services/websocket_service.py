@@ -1,79 +1,373 @@
+import asyncio
 import json
+import os
 import uuid
+from collections.abc import Awaitable, Callable
 
 from fastapi import WebSocket
+from pydantic import ValidationError
 
-from app.models.game import WebSocketMessage
+from app.models.game import GameMove, GameStatus, WebSocketMessage
+from app.services.metrics_service import metrics
 from app.services.redis_service import RedisManager
 
+# Pub/sub channels shared by every worker
+GAME_CHANNEL_PREFIX = "ws:game:"
+LOBBY_CHANNEL = "ws:lobby"
+BROADCAST_CHANNEL = "ws:all"
+# Published messages already waiting are delivered together, up to this many
+PUBSUB_BATCH_SIZE = 100
+
+# Games-list changes are coalesced and sent to lobby subscribers at most this often
+LOBBY_DEBOUNCE_MS = int(os.getenv("LOBBY_DEBOUNCE_MS", "250"))
+
+# Per-connection send queue; a client this far behind is a slow consumer
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+# "disconnect" closes slow consumers, "drop" discards messages they can't take
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "disconnect")
+# Close code sent to disconnected slow consumers (try again later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
 
 class WebSocketManager:
     """Manages WebSocket connections for real-time game updates"""
 
-    def __init__(self, redis_manager: RedisManager = None):
+    def __init__(
+        self,
+        redis_manager: RedisManager = None,
+        send_queue_size: int = WS_SEND_QUEUE_SIZE,
+        slow_consumer_policy: str = WS_SLOW_CONSUMER_POLICY,
+        lobby_debounce: float = LOBBY_DEBOUNCE_MS / 1000,
+    ):
         # Active connections: connection_id -> websocket
         self.active_connections: dict[str, WebSocket] = {}
         # Connection mapping: user_id -> connection_id
         self.user_connections: dict[int, str] = {}
         # Redis manager for persistent data
         self.redis_manager = redis_manager or RedisManager()
+        # Pub/sub listener; until it runs, broadcasts only reach local sockets
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+        # Outgoing queues and writer tasks: connection_id -> queue / task
+        self.send_queue_size = send_queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self._outboxes: dict[str, asyncio.Queue[str]] = {}
+        self._writers: dict[str, asyncio.Task] = {}
+        self._closing: set[asyncio.Task] = set()
+        # Users on this worker watching the games list
+        self.lobby_subscribers: set[int] = set()
+        # Pending games-list diff: game_id -> list entry, or None once removed
+        self.lobby_debounce = lobby_debounce
+        self._lobby_changes: dict[int, dict | None] = {}
+        self._lobby_flush: asyncio.Task | None = None
+        # Loads a game as a JSON-ready GameResponse dict for snapshots
+        self.snapshot_loader: Callable[[int], Awaitable[dict | None]] | None = None
+        # Connections that proved who their user is with a token
+        self.authenticated_connections: set[str] = set()
+        # Plays (user_id, game_id, position) -> (GameResponse dict | None, message)
+        self.move_handler: (
+            Callable[[int, int, int], Awaitable[tuple[dict | None, str]]] | None
+        ) = None
+        # Told when games-list changes are sent, e.g. to drop cached copies
+        self.games_list_listener: Callable[[], Awaitable[None]] | None = None
+        metrics.register_gauge("ws.connections", lambda: len(self.active_connections))
+        metrics.register_gauge(
+            "ws.queued_messages",
+            lambda: sum(outbox.qsize() for outbox in self._outboxes.values()),
+        )
+
+    @property
+    def fanout_enabled(self) -> bool:
+        """Whether broadcasts go through Redis to every worker"""
+        return self._listener is not None
+
+    async def start(self):
+        """Subscribe to broadcast channels so every worker reaches its own sockets"""
+        if self._listener is not None:
+            return
+        pubsub = self.redis_manager.pubsub()
+        try:
+            await pubsub.psubscribe(f"{GAME_CHANNEL_PREFIX}*")
+            await pubsub.subscribe(LOBBY_CHANNEL, BROADCAST_CHANNEL)
+        except Exception as e:
+            print(f"WebSocket fan-out disabled, Redis pub/sub unavailable: {e}")
+            await pubsub.aclose()
+            return
+        self._pubsub = pubsub
+        self._listener = asyncio.create_task(self._listen())
 
-    async def connect(self, websocket: WebSocket, user_id: int):
-        """Accept WebSocket connection"""
+    async def stop(self):
+        """Send any pending games-list diff and stop the pub/sub listener"""
+        if self._lobby_flush is not None:
+            self._lobby_flush.cancel()
+            self._lobby_flush = None
+            await self.flush_lobby()
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+        await self._pubsub.aclose()
+        self._pubsub = None
+
+    async def _listen(self):
+        """Deliver published broadcasts to local connections"""
+        while True:
+            try:
+                async for item in self._pubsub.listen():
+                    # Take whatever else has arrived too, so the observers of
+                    # every game in the batch are read in one round trip
+                    batch = [item]
+                    while len(batch) < PUBSUB_BATCH_SIZE and (
+                        item := await self._pubsub.get_message(timeout=0)
+                    ):
+                        batch.append(item)
+                    messages = [
+                        (item["channel"], item["data"])
+                        for item in batch
+                        if item["type"] in ("message", "pmessage")
+                    ]
+                    if messages:
+                        await self._dispatch(messages)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"WebSocket pub/sub listener error: {e}")
+                await asyncio.sleep(1)
+
+    async def _dispatch(self, messages: list[tuple[str, str]]):
+        """Route published (channel, payload) pairs, in order, to the matching
+        local delivery"""
+        game_ids = {
+            channel: int(channel[len(GAME_CHANNEL_PREFIX) :])
+            for channel, _ in messages
+            if channel.startswith(GAME_CHANNEL_PREFIX)
+        }
+        observers = {}
+        if game_ids:
+            observers = await self.redis_manager.get_game_observers_many(
+                list(set(game_ids.values()))
+            )
+
+        # The payload is already serialized; it goes out to sockets as-is
+        for channel, data in messages:
+            if channel == LOBBY_CHANNEL:
+                self._deliver_to_lobby(data)
+            elif channel == BROADCAST_CHANNEL:
+                self._deliver_to_all(data)
+            elif channel in game_ids:
+                for user_id in observers[game_ids[channel]]:
+                    self._enqueue(data, user_id)
+
+    async def connect(
+        self, websocket: WebSocket, user_id: int, authenticated: bool = False
+    ) -> str:
+        """Accept WebSocket connection and return its id"""
         await websocket.accept()
         connection_id = str(uuid.uuid4())
 
+        # A reconnecting user replaces their previous connection
+        previous_id = self.user_connections.get(user_id)
+        if previous_id is not None:
+            self.active_connections.pop(previous_id, None)
+            self.authenticated_connections.discard(previous_id)
+            self._close_outbox(previous_id)
+
         # Store connection
         self.active_connections[connection_id] = websocket
         self.user_connections[user_id] = connection_id
+        self._open_outbox(connection_id, user_id, websocket)
+        if authenticated:
+            self.authenticated_connections.add(connection_id)
 
         # Track connection in Redis
         await self.redis_manager.add_user_connection(user_id, connection_id)
 
         print(f"User {user_id} connected via WebSocket with connection {connection_id}")
+        return connection_id
+
+    async def disconnect(self, user_id: int, connection_id: str | None = None):
+        """Remove WebSocket connection
 
-    async def disconnect(self, user_id: int):
-        """Remove WebSocket connection"""
-        if user_id in self.user_connections:
-            connection_id = self.user_connections[user_id]
+        Given a connection_id, only that connection is removed, so a socket
+        closing after its user reconnected leaves the newer one alone.
+        """
+        current_id = self.user_connections.get(user_id)
+        if current_id is not None and connection_id in (None, current_id):
+            connection_id = current_id
 
             # Remove from local storage
             if connection_id in self.active_connections:
                 del self.active_connections[connection_id]
             del self.user_connections[user_id]
+            self.lobby_subscribers.discard(user_id)
+            self.authenticated_connections.discard(connection_id)
+            self._close_outbox(connection_id)
 
             # Remove from Redis
             await self.redis_manager.remove_user_connection(user_id, connection_id)
 
             print(f"User {user_id} disconnected from WebSocket")
 
+    def _open_outbox(self, connection_id: str, user_id: int, websocket: WebSocket):
+        """Start the bounded send queue and writer task for a connection"""
+        outbox: asyncio.Queue[str] = asyncio.Queue(maxsize=self.send_queue_size)
+        self._outboxes[connection_id] = outbox
+        self._writers[connection_id] = asyncio.create_task(
+            self._write(connection_id, user_id, websocket, outbox)
+        )
+
+    def _close_outbox(self, connection_id: str):
+        """Stop a connection's writer task and discard unsent messages"""
+        outbox = self._outboxes.pop(connection_id, None)
+        # Settle unsent messages so drain() never waits on a dead connection
+        while outbox is not None and not outbox.empty():
+            outbox.get_nowait()
+            outbox.task_done()
+        writer = self._writers.pop(connection_id, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+
+    async def _write(
+        self,
+        connection_id: str,
+        user_id: int,
+        websocket: WebSocket,
+        outbox: asyncio.Queue,
+    ):
+        """Send queued payloads to one socket, in order"""
+        while True:
+            payload = await outbox.get()
+            try:
+                await websocket.send_text(payload)
+            except Exception as e:
+                print(f"Error sending message to user {user_id}: {e}")
+                await self.disconnect(user_id, connection_id)
+                return
+            finally:
+                outbox.task_done()
+
+    def _enqueue(self, payload: str, user_id: int):
+        """Queue a serialized payload for a user without waiting on the socket"""
+        connection_id = self.user_connections.get(user_id)
+        outbox = self._outboxes.get(connection_id)
+        if outbox is None:
+            return
+        try:
+            outbox.put_nowait(payload)
+        except asyncio.QueueFull:
+            self._handle_slow_consumer(user_id, connection_id)
+
+    def _handle_slow_consumer(self, user_id: int, connection_id: str):
+        """Apply the slow-consumer policy to a connection with a full queue"""
+        if self.slow_consumer_policy == "drop":
+            metrics.increment("ws.dropped_messages")
+            return
+        metrics.increment("ws.slow_consumer_disconnects")
+        print(f"Disconnecting slow WebSocket consumer {user_id}")
+        websocket = self.active_connections.get(connection_id)
+        # Detach now so later broadcasts skip it; close in the background
+        self._close_outbox(connection_id)
+        task = asyncio.create_task(
+            self._drop_connection(user_id, connection_id, websocket)
+        )
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _drop_connection(
+        self, user_id: int, connection_id: str, websocket: WebSocket | None
+    ):
+        """Disconnect a user's connection and close its socket"""
+        await self.disconnect(user_id, connection_id)
+        if websocket is not None:
+            try:
+                await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+            except Exception:
+                pass
+
+    async def drain(self):
+        """Wait until every queued message has been handed to its socket"""
+        await asyncio.gather(*(outbox.join() for outbox in self._outboxes.values()))
+
     async def send_personal_message(self, message: dict, user_id: int):
         """Send message to specific user"""
-        if user_id in self.user_connections:
-            connection_id = self.user_connections[user_id]
-            if connection_id in self.active_connections:
-                try:
-                    await self.active_connections[connection_id].send_text(
-                        json.dumps(message)
-                    )
-                except Exception as e:
-                    print(f"Error sending message to user {user_id}: {e}")
-                    await self.disconnect(user_id)
+        self._enqueue(json.dumps(message), user_id)
 
     async def broadcast_to_game(self, message: dict, game_id: int):
-        """Broadcast message to all users in a game"""
+        """Broadcast message to all users in a game, on every worker"""
+        payload = json.dumps(message)
+        if self.fanout_enabled:
+            await self.redis_manager.publish(f"{GAME_CHANNEL_PREFIX}{game_id}", payload)
+        else:
+            await self._deliver_to_game(payload, game_id)
+
+    async def broadcast_to_games(self, messages: list[tuple[dict, int]]):
+        """Broadcast (message, game_id) pairs in order, on every worker,
+        with one Redis round trip for the lot"""
+        payloads = [(json.dumps(message), game_id) for message, game_id in messages]
+        if self.fanout_enabled:
+            await self.redis_manager.publish_many(
+                [
+                    (f"{GAME_CHANNEL_PREFIX}{game_id}", payload)
+                    for payload, game_id in payloads
+                ]
+            )
+        else:
+            await self._deliver_to_games(payloads)
+
+    async def broadcast_to_all(self, message: dict):
+        """Broadcast message to all connected users, on every worker"""
+        payload = json.dumps(message)
+        if self.fanout_enabled:
+            await self.redis_manager.publish(BROADCAST_CHANNEL, payload)
+        else:
+            self._deliver_to_all(payload)
+
+    async def broadcast_to_lobby(self, message: dict):
+        """Broadcast message to games-list subscribers, on every worker"""
+        payload = json.dumps(message)
+        if self.fanout_enabled:
+            await self.redis_manager.publish(LOBBY_CHANNEL, payload)
+        else:
+            self._deliver_to_lobby(payload)
+
+    async def _deliver_to_game(self, payload: str, game_id: int):
+        """Queue a payload for game observers connected to this worker"""
         # Get observers from Redis
         observers = await self.redis_manager.get_game_observers(game_id)
         for user_id in observers:
-            await self.send_personal_message(message, user_id)
+            self._enqueue(payload, user_id)
 
-    async def broadcast_to_all(self, message: dict):
-        """Broadcast message to all connected users"""
+    async def _deliver_to_games(self, payloads: list[tuple[str, int]]):
+        """Queue (payload, game_id) pairs for the observers connected to this
+        worker, reading every game's observers at once"""
+        game_ids = list(dict.fromkeys(game_id for _, game_id in payloads))
+        observers = await self.redis_manager.get_game_observers_many(game_ids)
+        for payload, game_id in payloads:
+            for user_id in observers[game_id]:
+                self._enqueue(payload, user_id)
+
+    def _deliver_to_all(self, payload: str):
+        """Queue a payload for every user connected to this worker"""
         for user_id in list(self.user_connections.keys()):
-            await self.send_personal_message(message, user_id)
+            self._enqueue(payload, user_id)
+
+    def _deliver_to_lobby(self, payload: str):
+        """Queue a payload for games-list subscribers on this worker"""
+        for user_id in list(self.lobby_subscribers):
+            self._enqueue(payload, user_id)
 
-    async def handle_message(self, user_id: int, message: WebSocketMessage):
-        """Handle incoming WebSocket message"""
+    async def handle_message(
+        self, user_id: int, message: WebSocketMessage, connection_id: str
+    ):
+        """Handle a message received on one of user_id's connections"""
+        if self.user_connections.get(user_id) != connection_id:
+            # Sent on a socket the user has since replaced with a newer one
+            metrics.increment("ws.stale_messages")
+            return
         message_type = message.type
         data = message.data
 
@@ -83,6 +377,16 @@ class WebSocketManager:
             await self._handle_leave_game(user_id, data)
         elif message_type == "game_update":
             await self._handle_game_update(user_id, data)
+        elif message_type == "make_move":
+            await self._handle_make_move(
+                user_id, data, connection_id in self.authenticated_connections
+            )
+        elif message_type == "resync_game":
+            await self._handle_resync_game(user_id, data)
+        elif message_type == "subscribe_lobby":
+            self.lobby_subscribers.add(user_id)
+        elif message_type == "unsubscribe_lobby":
+            self.lobby_subscribers.discard(user_id)
         else:
             print(f"Unknown message type: {message_type}")
 
@@ -94,6 +398,8 @@ class WebSocketManager:
 
         # Add user to game observers in Redis
         await self.redis_manager.add_game_observer(game_id, user_id)
+        # Move events only carry deltas, so start from a full snapshot
+        await self._send_snapshot(user_id, game_id)
 
         # Notify other players
         await self.broadcast_to_game(
@@ -116,6 +422,54 @@ class WebSocketManager:
             game_id,
         )
 
+    async def _handle_make_move(self, user_id: int, data: dict, authenticated: bool):
+        """Handle a move sent over the socket and acknowledge it"""
+        ack = {"game_id": data.get("game_id"), "request_id": data.get("request_id")}
+        game = None
+        if not authenticated:
+            message = "Not authenticated"
+        elif self.move_handler is None:
+            message = "Moves are not accepted over WebSocket"
+        else:
+            try:
+                game_id = int(data["game_id"])
+                position = GameMove(position=data.get("position")).position
+            except (KeyError, TypeError, ValueError, ValidationError):
+                message = "Invalid move"
+            else:
+                game, message = await self.move_handler(user_id, game_id, position)
+        await self.send_personal_message(
+            {
+                "type": "move_ack",
+                "data": {
+                    **ack,
+                    "ok": game is not None,
+                    "message": message,
+                    "game": game,
+                },
+            },
+            user_id,
+        )
+
+    async def _handle_resync_game(self, user_id: int, data: dict):
+        """Handle a client that missed move events"""
+        game_id = data.get("game_id")
+        if not game_id:
+            return
+        await self._send_snapshot(user_id, game_id)
+
+    async def _send_snapshot(self, user_id: int, game_id: int):
+        """Send one user the full game state"""
+        if self.snapshot_loader is None:
+            return
+        game = await self.snapshot_loader(game_id)
+        if game is None:
+            return
+        await self.send_personal_message(
+            {"type": "game_update", "data": {"game_id": game_id, "game": game}},
+            user_id,
+        )
+
     async def _handle_game_update(self, user_id: int, data: dict):
         """Handle game state update"""
         _ = user_id  # Parameter kept for interface consistency
@@ -133,6 +487,63 @@ class WebSocketManager:
             game_id,
         )
 
-    async def notify_games_list_update(self):
-        """Notify all users that the games list has been updated"""
-        await self.broadcast_to_all({"type": "games_list_update", "data": {}})
+    async def resync_games(self, game_ids: list[int]):
+        """Send the observers of each game its full state, replacing move
+        events that no longer match it"""
+        if self.snapshot_loader is None:
+            return
+        messages = []
+        for game_id in game_ids:
+            game = await self.snapshot_loader(game_id)
+            if game is not None:
+                messages.append(
+                    (
+                        {
+                            "type": "game_update",
+                            "data": {"game_id": game_id, "game": game},
+                        },
+                        game_id,
+                    )
+                )
+        if messages:
+            await self.broadcast_to_games(messages)
+
+    async def notify_moves(self, events: list[dict]):
+        """Send move events in order; a finished game leaves the games list"""
+        await self.broadcast_to_games(
+            [({"type": "move", "data": event}, event["game_id"]) for event in events]
+        )
+        if events and events[-1]["status"] not in (
+            GameStatus.WAITING,
+            GameStatus.IN_PROGRESS,
+        ):
+            await self.notify_games_list_update(events[-1]["game_id"])
+
+    async def notify_games_list_update(self, game_id: int, game: dict | None = None):
+        """Queue a games-list change; None means the game left the list"""
+        self._lobby_changes[game_id] = game
+        if self._lobby_flush is None:
+            self._lobby_flush = asyncio.create_task(self._flush_lobby_later())
+
+    async def _flush_lobby_later(self):
+        """Send the pending games-list diff once the debounce window closes"""
+        await asyncio.sleep(self.lobby_debounce)
+        self._lobby_flush = None
+        await self.flush_lobby()
+
+    async def flush_lobby(self):
+        """Send the pending games-list diff to lobby subscribers now"""
+        changes, self._lobby_changes = self._lobby_changes, {}
+        if not changes:
+            return
+        # Once per debounce window, before subscribers re-read the list
+        if self.games_list_listener is not None:
+            await self.games_list_listener()
+        diff = {
+            "updated": [game for game in changes.values() if game is not None],
+            "removed": [game_id for game_id, game in changes.items() if game is None],
+        }
+        try:
+            await self.broadcast_to_lobby({"type": "games_list_update", "data": diff})
+        except Exception as e:
+            print(f"Error sending games list update: {e}")
@@ -0,0 +1,48 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class WorkerPoolFullError(Exception):
+    """Too many calls are already queued or running on the pool"""
+
+
+class BoundedWorkerPool:
+    """Runs blocking calls on worker threads, with a bound on the backlog
+
+    At most max_pending calls may be queued or running; beyond that
+    WorkerPoolFullError is raised so callers fail fast or fall back instead
+    of queueing forever. Threads are started on first use.
+    """
+
+    def __init__(self, thread_name_prefix: str, max_workers: int, max_pending: int):
+        self.thread_name_prefix = thread_name_prefix
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def run(self, fn, *args, timeout: float | None = None):
+        """Run fn on a worker thread, if there is room in the queue"""
+        if self.pending >= self.max_pending:
+            raise WorkerPoolFullError(f"{self.thread_name_prefix} pool is full")
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=self.thread_name_prefix,
+            )
+
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, fn, *args), timeout
+            )
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        """Stop worker threads; they are recreated on the next call"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -5,21 +5,63 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.database.connection import AsyncSessionLocal
 from app.routers import auth, games, leaderboard, websocket
+from app.services.ai_service import ai_worker_pool
+from app.services.cache_service import cache_bus, games_list_cache
+from app.services.leaderboard_service import stats_rollup
+from app.services.live_game_store import live_game_store
+from app.services.metrics_service import metrics
+from app.services.rate_limit_service import RateLimitMiddleware, rate_limiter
 from app.services.redis_service import RedisManager
+from app.services.user_service import password_hasher
 
 # Initialize Redis manager
 redis_manager = RedisManager()
 
 
+async def drop_games_list(game_ids: list[int]):
+    """Drop cached games lists, which may still show these games in play"""
+    await games_list_cache.clear()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    # Share cached users, games and leaderboard pages between workers, and
+    # drop this worker's copies when another invalidates them
+    await cache_bus.start(redis_manager)
+    # Count requests against rate limits shared by every worker
+    rate_limiter.redis_manager = redis_manager
     # Initialize WebSocket manager with Redis
     websocket.set_websocket_manager(redis_manager)
+    # Fan broadcasts out to sockets on every worker
+    await websocket.get_websocket_manager().start()
+    # Resend games whose moves were replayed on another writer's
+    live_game_store.conflict_listener = websocket.get_websocket_manager().resync_games
+    # Drop cached games lists once finished games are saved, not before
+    live_game_store.finished_listener = drop_games_list
+    # Rank players from a Redis sorted set, updated as their games finish
+    redis_leaderboard = leaderboard.set_redis_leaderboard(redis_manager)
+    live_game_store.stats_listener = redis_leaderboard.update_users
+    try:
+        async with AsyncSessionLocal() as db:
+            await redis_leaderboard.ensure_built(db)
+    except Exception as e:
+        print(f"Redis leaderboard not built, Redis unavailable: {e}")
+    # Roll daily leaderboard buckets up into weeks and months
+    await stats_rollup.start()
+    # Write moves played in memory back to the database
+    await live_game_store.start()
     yield
     # Shutdown
+    await live_game_store.stop()
+    await stats_rollup.stop()
+    await websocket.get_websocket_manager().stop()
+    await cache_bus.stop()
     await redis_manager.close()
+    ai_worker_pool.shutdown()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -44,6 +86,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-IP limits on sign-in, game creation and moves
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(games.router, prefix="/api/games", tags=["games"])
@@ -60,6 +105,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+# Not served publicly: nginx.conf refuses it, leaving it to the internal network
+@app.get("/api/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,46 @@
+"""Add game moves log
+
+Revision ID: 5b1e9d3c2f4a
+Revises: c07c938c288c
+Create Date: 2026-10-17 11:02:36.518470
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1e9d3c2f4a"
+down_revision: str | None = "c07c938c288c"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create the append-only game_moves table.
+
+    Existing games keep their board_code; the order of their moves was never
+    stored, so there is nothing to backfill.
+    """
+    op.create_table(
+        "game_moves",
+        sa.Column("game_id", sa.Integer(), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("position", sa.SmallInteger(), nullable=False),
+        sa.Column("mark", sa.String(length=1), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["game_id"], ["games.id"]),
+        sa.PrimaryKeyConstraint("game_id", "seq"),
+    )
+
+
+def downgrade() -> None:
+    """Drop the game_moves table."""
+    op.drop_table("game_moves")
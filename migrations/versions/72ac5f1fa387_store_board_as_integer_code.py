@@ -0,0 +1,95 @@
+"""Store board as integer code
+
+Revision ID: 72ac5f1fa387
+Revises: a890291a707f
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+
+import json
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "72ac5f1fa387"
+down_revision: str | None = "a890291a707f"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Base-3 digits per cell, kept local so the migration does not depend on app code
+CELL_DIGITS = {"": 0, "X": 1, "O": 2}
+DIGIT_CELLS = ["", "X", "O"]
+
+
+def encode(cells: list[str]) -> int:
+    return sum(CELL_DIGITS[cell or ""] * 3**i for i, cell in enumerate(cells))
+
+
+def decode(code: int) -> list[str]:
+    return [DIGIT_CELLS[code // 3**i % 3] for i in range(9)]
+
+
+def upgrade() -> None:
+    """Replace games.board_state JSON with games.board_code integer."""
+    op.add_column(
+        "games",
+        sa.Column("board_code", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    connection = op.get_bind()
+    games_table = sa.table(
+        "games",
+        sa.column("id", sa.Integer),
+        sa.column("board_code", sa.Integer),
+    )
+
+    rows = connection.execute(
+        sa.text("SELECT id, board_state FROM games WHERE board_state IS NOT NULL")
+    ).fetchall()
+    updates = []
+    for game_id, board_state in rows:
+        # JSON columns come back decoded on PostgreSQL and as text on SQLite
+        cells = json.loads(board_state) if isinstance(board_state, str) else board_state
+        code = encode(cells)
+        if code:
+            updates.append({"game_id": game_id, "board_code": code})
+
+    if updates:
+        connection.execute(
+            games_table.update()
+            .where(games_table.c.id == sa.bindparam("game_id"))
+            .values(board_code=sa.bindparam("board_code")),
+            updates,
+        )
+
+    with op.batch_alter_table("games") as batch_op:
+        batch_op.drop_column("board_state")
+
+
+def downgrade() -> None:
+    """Restore games.board_state JSON from games.board_code."""
+    op.add_column("games", sa.Column("board_state", sa.JSON(), nullable=True))
+
+    connection = op.get_bind()
+    games_table = sa.table(
+        "games",
+        sa.column("id", sa.Integer),
+        sa.column("board_state", sa.JSON),
+    )
+
+    rows = connection.execute(sa.text("SELECT id, board_code FROM games")).fetchall()
+    if rows:
+        connection.execute(
+            games_table.update()
+            .where(games_table.c.id == sa.bindparam("game_id"))
+            .values(board_state=sa.bindparam("board_state")),
+            [
+                {"game_id": game_id, "board_state": decode(code or 0)}
+                for game_id, code in rows
+            ],
+        )
+
+    with op.batch_alter_table("games") as batch_op:
+        batch_op.drop_column("board_code")
@@ -0,0 +1,32 @@
+"""Add games version
+
+Revision ID: 9e4f2a7c1d3b
+Revises: 5b1e9d3c2f4a
+Create Date: 2026-10-17 12:14:08.203915
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e4f2a7c1d3b"
+down_revision: str | None = "5b1e9d3c2f4a"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add the optimistic concurrency counter to games."""
+    op.add_column(
+        "games",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    """Drop the games version counter."""
+    with op.batch_alter_table("games") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,57 @@
+"""Add games and observers indexes
+
+Revision ID: c07c938c288c
+Revises: 72ac5f1fa387
+Create Date: 2026-10-17 10:05:17.642931
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c07c938c288c"
+down_revision: str | None = "72ac5f1fa387"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add indexes used by the games list, moves and observer tracking."""
+    # Active games list: WHERE status IN (...) ORDER BY created_at DESC
+    op.create_index(
+        "ix_games_status_created_at",
+        "games",
+        ["status", sa.text("created_at DESC")],
+    )
+    op.create_index("ix_games_player1_id", "games", ["player1_id"])
+    # AI games have no player2, so only index human opponents
+    op.create_index(
+        "ix_games_player2_id",
+        "games",
+        ["player2_id"],
+        postgresql_where=sa.text("player2_id IS NOT NULL"),
+        sqlite_where=sa.text("player2_id IS NOT NULL"),
+    )
+
+    # Drop duplicate observer rows before enforcing one row per pair
+    op.execute(
+        "DELETE FROM game_observers WHERE id NOT IN "
+        "(SELECT MIN(id) FROM game_observers GROUP BY game_id, user_id)"
+    )
+    op.create_index(
+        "uq_game_observers_game_user",
+        "game_observers",
+        ["game_id", "user_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Remove games and observers indexes."""
+    op.drop_index("uq_game_observers_game_user", table_name="game_observers")
+    op.drop_index("ix_games_player2_id", table_name="games")
+    op.drop_index("ix_games_player1_id", table_name="games")
+    op.drop_index("ix_games_status_created_at", table_name="games")
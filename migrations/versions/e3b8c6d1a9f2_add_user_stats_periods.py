@@ -0,0 +1,58 @@
+"""Add user stats periods
+
+Revision ID: e3b8c6d1a9f2
+Revises: 9e4f2a7c1d3b
+Create Date: 2026-10-17 13:41:52.907213
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e3b8c6d1a9f2"
+down_revision: str | None = "9e4f2a7c1d3b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create per-day, week and month stats buckets for windowed leaderboards.
+
+    Buckets start filling from the next finished game; past games are not
+    backfilled.
+    """
+    op.create_table(
+        "user_stats_periods",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("period", sa.String(length=5), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("games_played", sa.Integer(), nullable=False),
+        sa.Column("games_won", sa.Integer(), nullable=False),
+        sa.Column("games_lost", sa.Integer(), nullable=False),
+        sa.Column("games_drawn", sa.Integer(), nullable=False),
+        sa.Column("total_moves", sa.Integer(), nullable=False),
+        sa.Column("win_rate", sa.Float(), nullable=False),
+        sa.Column("avg_moves_per_game", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "period", "period_start"),
+    )
+    # Ranking within a window, and the rollup's scan of a range of days
+    op.create_index(
+        "ix_user_stats_periods_ranking",
+        "user_stats_periods",
+        [
+            "period",
+            "period_start",
+            sa.text("win_rate DESC"),
+            sa.text("games_played DESC"),
+        ],
+    )
+
+
+def downgrade() -> None:
+    """Drop the stats buckets."""
+    op.drop_index("ix_user_stats_periods_ranking", table_name="user_stats_periods")
+    op.drop_table("user_stats_periods")
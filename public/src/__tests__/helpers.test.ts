@@ -1,4 +1,4 @@
-import { calculateWinRate, formatGameTime, formatPlayerStats, formatUserName, generateGameId, getUserDisplayName, isValidEmail, validateEmail } from '../utils/helpers';
+import { applyLobbyDiff, applyMoveEvent, calculateWinRate, formatGameTime, formatPlayerStats, formatUserName, generateGameId, getUserDisplayName, isValidEmail, validateEmail } from '../utils/helpers';
 
 describe('Helper Functions', () => {
   describe('formatUserName', () => {
@@ -94,4 +94,60 @@ describe('Helper Functions', () => {
       expect(getUserDisplayName('mary_jane_watson')).toBe('Mary Jane Watson');
     });
   });
+
+  describe('applyLobbyDiff', () => {
+    const game = (id: number, created_at: string) => ({
+      id,
+      player1_username: 'alice',
+      player2_type: 'human' as const,
+      status: 'waiting' as const,
+      created_at,
+      observer_count: 0,
+    });
+
+    test('adds, updates and removes games, newest first', () => {
+      const games = [game(2, '2023-01-02T00:00:00'), game(1, '2023-01-01T00:00:00')];
+      const result = applyLobbyDiff(games, {
+        updated: [game(3, '2023-01-03T00:00:00'), { ...game(2, '2023-01-02T00:00:00'), observer_count: 4 }],
+        removed: [1],
+      });
+      expect(result.map(g => g.id)).toEqual([3, 2]);
+      expect(result[1].observer_count).toBe(4);
+    });
+
+    test('ignores removals of unknown games', () => {
+      const games = [game(1, '2023-01-01T00:00:00')];
+      expect(applyLobbyDiff(games, { updated: [], removed: [9] })).toEqual(games);
+    });
+  });
+
+  describe('applyMoveEvent', () => {
+    const game = {
+      id: 7,
+      player1_id: 1,
+      player2_id: 2,
+      player2_type: 'human' as const,
+      board_state: ['X', '', '', '', '', '', '', '', ''],
+      current_turn: 'O' as const,
+      status: 'in_progress' as const,
+      total_moves: 1,
+      created_at: '2023-01-01T00:00:00',
+    };
+    const move = { game_id: 7, position: 4, mark: 'O' as const, status: 'in_progress' as const };
+
+    test('applies the next move', () => {
+      const result = applyMoveEvent(game, { ...move, seq: 2 });
+      expect(result?.board_state[4]).toBe('O');
+      expect(result?.total_moves).toBe(2);
+      expect(result?.current_turn).toBe('X');
+    });
+
+    test('ignores moves already in the snapshot', () => {
+      expect(applyMoveEvent(game, { ...move, seq: 1 })).toBe(game);
+    });
+
+    test('reports a sequence gap', () => {
+      expect(applyMoveEvent(game, { ...move, seq: 3 })).toBeNull();
+    });
+  });
 });
@@ -1,8 +1,9 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useAuthStore } from '../hooks/useAuthStore';
 import { useWebSocket } from '../hooks/useWebSocket';
 import apiService from '../services/api';
-import type { GameData } from '../types';
+import type { GameData, GameMoveEvent } from '../types';
+import { applyMoveEvent } from '../utils/helpers';
 
 interface GameBoardProps {
   gameId: number;
@@ -15,8 +16,10 @@ const GameBoard: React.FC<GameBoardProps> = ({ gameId, onLeaveGame }) => {
   const [error, setError] = useState('');
   const [isObserver, setIsObserver] = useState(false);
 
-  const { user } = useAuthStore();
-  const { messages, joinGame, leaveGame } = useWebSocket(user?.id ?? null);
+  const { user, token } = useAuthStore();
+  const { isConnected, messages, joinGame, leaveGame, makeMove: sendMove, resyncGame } =
+    useWebSocket(user?.id ?? null, token);
+  const processedMessages = useRef(0);
 
   useEffect(() => {
     loadGame();
@@ -31,18 +34,39 @@ const GameBoard: React.FC<GameBoardProps> = ({ gameId, onLeaveGame }) => {
     };
   }, [gameId, user?.id]);
 
-  // Listen for game updates via WebSocket
+  // Listen for snapshots and move events via WebSocket
   useEffect(() => {
-    const gameUpdates = messages.filter(
-      msg => msg.type === 'game_update' && msg.data.game_id === gameId
-    );
-
-    if (gameUpdates.length > 0) {
-      const latestUpdate = gameUpdates[gameUpdates.length - 1];
-      if (latestUpdate.data.game) {
-        setGame(latestUpdate.data.game as GameData);
+    const pending = messages.slice(processedMessages.current);
+    processedMessages.current = messages.length;
+
+    let next = game;
+    let missedMoves = false;
+    for (const msg of pending) {
+      if (msg.data?.game_id !== gameId) {
+        continue;
+      }
+      if ((msg.type === 'game_update' || msg.type === 'move_ack') && msg.data.game) {
+        next = msg.data.game as GameData;
+        missedMoves = false;
+      } else if (msg.type === 'move_ack') {
+        setError(msg.data.message);
+      } else if (msg.type === 'move' && next) {
+        const applied = applyMoveEvent(next, msg.data as GameMoveEvent);
+        if (applied) {
+          next = applied;
+        } else {
+          missedMoves = true;
+        }
       }
     }
+
+    if (next !== game) {
+      setGame(next);
+    }
+    if (missedMoves) {
+      // A sequence gap: ask for a snapshot to replace this state
+      resyncGame(gameId);
+    }
   }, [messages, gameId]);
 
   const loadGame = async () => {
@@ -82,6 +106,13 @@ const GameBoard: React.FC<GameBoardProps> = ({ gameId, onLeaveGame }) => {
       return;
     }
 
+    // An authenticated socket skips the HTTP round trip; the ack has the new state
+    if (isConnected && token) {
+      setError('');
+      sendMove(gameId, position);
+      return;
+    }
+
     try {
       setError('');
       const updatedGame = await apiService.makeMove(gameId, position) as GameData;
@@ -1,8 +1,9 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useWebSocket } from '../hooks/useWebSocket';
 import { useAuthStore } from '../hooks/useAuthStore';
 import apiService from '../services/api';
-import type { GameLobbyItem } from '../types';
+import type { GameLobbyDiff, GameLobbyItem } from '../types';
+import { applyLobbyDiff } from '../utils/helpers';
 
 interface GameLobbyProps {
   onJoinGame: (gameId: number) => void;
@@ -15,17 +16,31 @@ const GameLobby: React.FC<GameLobbyProps> = ({ onJoinGame }) => {
   const [creatingGame, setCreatingGame] = useState(false);
   
   const { user } = useAuthStore();
-  const { messages } = useWebSocket(user?.id ?? null);
+  const { isConnected, messages, sendMessage } = useWebSocket(user?.id ?? null);
+  const appliedUpdates = useRef(0);
 
   useEffect(() => {
     loadGames();
   }, []);
 
-  // Listen for WebSocket updates
+  // Only lobby viewers receive games list updates
+  useEffect(() => {
+    if (!isConnected) {
+      return;
+    }
+    sendMessage({ type: 'subscribe_lobby', data: {} });
+    return () => sendMessage({ type: 'unsubscribe_lobby', data: {} });
+  }, [isConnected]);
+
+  // Apply games list diffs pushed over the WebSocket
   useEffect(() => {
     const gameListUpdates = messages.filter(msg => msg.type === 'games_list_update');
-    if (gameListUpdates.length > 0) {
-      loadGames();
+    const pending = gameListUpdates.slice(appliedUpdates.current);
+    appliedUpdates.current = gameListUpdates.length;
+    if (pending.length > 0) {
+      setGames(prev =>
+        pending.reduce((games, msg) => applyLobbyDiff(games, msg.data as GameLobbyDiff), prev)
+      );
     }
   }, [messages]);
 
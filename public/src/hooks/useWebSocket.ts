@@ -6,7 +6,8 @@ interface WebSocketMessage {
   data: any;
 }
 
-export const useWebSocket = (userId: number | null) => {
+// Pass the auth token to also allow making moves over the socket
+export const useWebSocket = (userId: number | null, token?: string | null) => {
   const [isConnected, setIsConnected] = useState(false);
   const [messages, setMessages] = useState<WebSocketMessage[]>([]);
   const socketRef = useRef<Socket | null>(null);
@@ -19,7 +20,8 @@ export const useWebSocket = (userId: number | null) => {
     // Determine WebSocket URL based on environment
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     const host = window.location.host;
-    const wsUrl = `${protocol}//${host}/ws/${userId}`;
+    const query = token ? `?token=${encodeURIComponent(token)}` : '';
+    const wsUrl = `${protocol}//${host}/ws/${userId}${query}`;
 
     // Connect to WebSocket
     const socket = io(wsUrl, {
@@ -48,6 +50,14 @@ export const useWebSocket = (userId: number | null) => {
       setMessages(prev => [...prev, { type: 'game_update', data }]);
     });
 
+    socket.on('move', (data: any) => {
+      setMessages(prev => [...prev, { type: 'move', data }]);
+    });
+
+    socket.on('move_ack', (data: any) => {
+      setMessages(prev => [...prev, { type: 'move_ack', data }]);
+    });
+
     socket.on('games_list_update', (data: any) => {
       console.log('Games list update received:', data);
       setMessages(prev => [...prev, { type: 'games_list_update', data }]);
@@ -67,7 +77,7 @@ export const useWebSocket = (userId: number | null) => {
     return () => {
       socket.disconnect();
     };
-  }, [userId]);
+  }, [userId, token]);
 
   const sendMessage = (message: WebSocketMessage) => {
     if (socketRef.current && isConnected) {
@@ -89,6 +99,20 @@ export const useWebSocket = (userId: number | null) => {
     });
   };
 
+  const makeMove = (gameId: number, position: number) => {
+    sendMessage({
+      type: 'make_move',
+      data: { game_id: gameId, position }
+    });
+  };
+
+  const resyncGame = (gameId: number) => {
+    sendMessage({
+      type: 'resync_game',
+      data: { game_id: gameId }
+    });
+  };
+
   const clearMessages = () => {
     setMessages([]);
   };
@@ -99,6 +123,8 @@ export const useWebSocket = (userId: number | null) => {
     sendMessage,
     joinGame,
     leaveGame,
+    makeMove,
+    resyncGame,
     clearMessages,
   };
 };
@@ -32,6 +32,20 @@ export interface GameLobbyItem {
   observer_count: number;
 }
 
+export interface GameLobbyDiff {
+  updated: GameLobbyItem[];
+  removed: number[];
+}
+
+export interface GameMoveEvent {
+  game_id: number;
+  seq: number;
+  position: number;
+  mark: 'X' | 'O';
+  status: GameData['status'];
+  winner_id?: number | null;
+}
+
 export interface GameData {
   id: number;
   player1_id: number;
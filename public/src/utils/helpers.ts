@@ -1,3 +1,5 @@
+import type { GameData, GameLobbyDiff, GameLobbyItem, GameMoveEvent } from '../types';
+
 /**
  * Basic utility functions for testing
  */
@@ -43,3 +45,29 @@ export function formatPlayerStats(wins: number, losses: number, draws: number):
     const winRate = calculateWinRate(wins, total);
     return `${wins}W-${losses}L-${draws}D (${winRate}%)`;
 }
+
+export function applyLobbyDiff(games: GameLobbyItem[], diff: GameLobbyDiff): GameLobbyItem[] {
+    const changed = new Set([...diff.removed, ...diff.updated.map(game => game.id)]);
+    return [...games.filter(game => !changed.has(game.id)), ...diff.updated]
+        .sort((a, b) => b.created_at.localeCompare(a.created_at));
+}
+
+/**
+ * Apply a move event to a game snapshot. Returns the game unchanged for
+ * events it already includes, or null when events were missed and the
+ * client should resync.
+ */
+export function applyMoveEvent(game: GameData, event: GameMoveEvent): GameData | null {
+    if (event.seq <= game.total_moves) return game;
+    if (event.seq !== game.total_moves + 1) return null;
+    const board_state = [...game.board_state];
+    board_state[event.position] = event.mark;
+    return {
+        ...game,
+        board_state,
+        total_moves: event.seq,
+        status: event.status,
+        winner_id: event.winner_id ?? undefined,
+        current_turn: event.mark === 'X' ? 'O' : 'X',
+    };
+}
@@ -0,0 +1,32 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base, to_async_url
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """SQLite file shared by the sync and async sessions"""
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def file_session(database_url):
+    """Sync session on the file database, for setting up and checking it"""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_factory(database_url, file_session):
+    """Async sessions on the file database"""
+    engine = create_async_engine(to_async_url(database_url))
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    await engine.dispose()
@@ -1,4 +1,10 @@
-from app.services.ai_service import AIService
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.models.board import Board
+from app.services.ai_service import AIService, AIWorkerPool
 
 
 class TestAIService:
@@ -128,3 +134,83 @@ class TestAIService:
         # This should test the else clause in _get_medium_move
         move = AIService._get_medium_move(board)
         assert 0 <= move <= 8
+
+    def test_lookup_winning_score(self):
+        """Test table lookup returns the immediate win with a positive score"""
+        board = ["O", "O", "", "X", "X", "", "", "", ""]
+        move, score = AIService.lookup(board)
+        assert move == 2
+        assert score > 0
+
+    def test_lookup_draw_after_center_opening(self):
+        """Test perfect play after a center opening is a draw"""
+        board = ["", "", "", "", "X", "", "", "", ""]
+        move, score = AIService.lookup(board)
+        assert move in [0, 2, 6, 8]
+        assert score == 0
+
+    def test_lookup_finished_game(self):
+        """Test table lookup on a finished game has no move"""
+        board = ["X", "X", "X", "O", "O", "", "", "", ""]
+        assert AIService.lookup(board) == (-1, 0)
+
+    def test_lookup_does_not_mutate_board(self):
+        """Test table lookup leaves the board untouched"""
+        board = ["X", "", "", "", "O", "", "", "", "X"]
+        AIService.lookup(board)
+        assert board == ["X", "", "", "", "O", "", "", "", "X"]
+
+    def test_get_ai_move_accepts_board(self):
+        """Test AI move accepts the bitboard form"""
+        board = Board.from_list(["X", "X", "", "O", "", "", "", "", ""])
+        assert AIService.get_ai_move(board, "hard") == 2
+
+
+class TestAIWorkerPool:
+    """Test AI move computation off the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_get_move(self):
+        """Test worker pool returns the table move"""
+        pool = AIWorkerPool(max_workers=1)
+        board = Board.from_list(["X", "X", "", "O", "", "", "", "", ""])
+        assert await pool.get_move(board, "hard") == 2
+        assert pool.pending == 0
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_get_move_timeout_falls_back(self):
+        """Test a search over budget falls back to a valid random move"""
+        pool = AIWorkerPool(max_workers=1, timeout=0.01)
+        board = Board.from_list(["X", "", "", "", "O", "", "", "", ""])
+
+        def slow_move(board_state, difficulty):
+            time.sleep(0.2)
+            return 1
+
+        with patch.object(AIService, "get_ai_move", side_effect=slow_move):
+            move = await pool.get_move(board, "hard")
+
+        assert move in board.empty_positions()
+        assert pool.pending == 0
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_get_move_queue_full_falls_back(self):
+        """Test a full queue plays a random move without queuing"""
+        pool = AIWorkerPool(max_workers=1, max_pending=0)
+        board = Board.from_list(["X", "", "", "", "", "", "", "", ""])
+
+        with patch.object(AIService, "get_ai_move") as get_ai_move:
+            move = await pool.get_move(board, "hard")
+
+        get_ai_move.assert_not_called()
+        assert move in board.empty_positions()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_recreates_executor(self):
+        """Test the pool keeps working after shutdown"""
+        pool = AIWorkerPool(max_workers=1)
+        pool.shutdown()
+        assert await pool.get_move(Board(), "easy") in range(9)
+        pool.shutdown()
@@ -0,0 +1,84 @@
+import pytest
+
+from app.models.board import BOARD_CODES, Board
+
+
+class TestBoard:
+    """Test bitboard representation"""
+
+    def test_empty_board(self):
+        """Test default board is empty"""
+        board = Board()
+        assert board.x == 0
+        assert board.o == 0
+        assert board.to_list() == [""] * 9
+        assert board.empty_positions() == list(range(9))
+
+    def test_from_list_round_trip(self):
+        """Test conversion from and to the list form"""
+        cells = ["X", "", "O", "", "X", "", "", "O", ""]
+        board = Board.from_list(cells)
+        assert board.x == 0b000010001
+        assert board.o == 0b010000100
+        assert board.to_list() == cells
+
+    def test_json_round_trip(self):
+        """Test conversion from and to the compact JSON form"""
+        text = '["X","","","","O","","","",""]'
+        board = Board.from_json(text)
+        assert board.to_json() == text
+        assert Board.from_json('["X", "", "", "", "O", "", "", "", ""]') == board
+
+    def test_from_json_empty(self):
+        """Test missing board state decodes to an empty board"""
+        assert Board.from_json(None) == Board()
+        assert Board().to_json() == '["","","","","","","","",""]'
+
+    def test_code_encoding(self):
+        """Test base-3 encoding"""
+        assert Board().code == 0
+        assert Board.from_list(["X", "", "", "", "", "", "", "", ""]).code == 1
+        assert Board.from_list(["", "O", "", "", "", "", "", "", ""]).code == 6
+        assert Board.from_list(["O"] * 9).code == BOARD_CODES - 1
+
+    @pytest.mark.parametrize("code", [0, 1, 6, 4920, BOARD_CODES - 1])
+    def test_code_round_trip(self, code):
+        """Test decoding and re-encoding a base-3 code"""
+        assert Board.from_code(code).code == code
+
+    def test_coerce(self):
+        """Test coercing lists and boards"""
+        board = Board.from_list(["X"] + [""] * 8)
+        assert Board.coerce(board) is board
+        assert Board.coerce(["X"] + [""] * 8) == board
+
+    def test_play_is_immutable(self):
+        """Test playing returns a new board"""
+        board = Board()
+        played = board.play(4, "X").play(0, "O")
+        assert board == Board()
+        assert played.cell(4) == "X"
+        assert played.cell(0) == "O"
+        assert played.cell(8) == ""
+
+    def test_is_empty(self):
+        """Test position availability"""
+        board = Board().play(3, "O")
+        assert board.is_empty(0) is True
+        assert board.is_empty(3) is False
+        assert board.is_empty(-1) is False
+        assert board.is_empty(9) is False
+
+    def test_winner(self):
+        """Test winner detection across rows, columns and diagonals"""
+        assert Board.from_list(["X", "X", "X"] + [""] * 6).winner() == "X"
+        assert Board.from_list(["", "", "O"] * 3).winner() == "O"
+        assert Board.from_list(["O", "", "", "", "O", "", "", "", "O"]).winner() == "O"
+        assert Board.from_list(["X", "O", ""] + [""] * 6).winner() is None
+
+    def test_is_full(self):
+        """Test full board detection"""
+        assert Board.from_list(["X", "O", "X", "O", "X", "O", "O", "X", "O"]).is_full()
+        assert not Board.from_list(
+            ["X", "O", "X", "O", "X", "O", "O", "X", ""]
+        ).is_full()
@@ -0,0 +1,261 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from pydantic import BaseModel, TypeAdapter
+from redis.exceptions import RedisError
+
+from app.services.cache_service import (
+    CACHE_INVALIDATION_CHANNEL,
+    CacheBus,
+    TwoTierCache,
+)
+from app.services.metrics_service import metrics
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.fixture
+def bus():
+    """Cache bus on a mock Redis"""
+    bus = CacheBus()
+    bus.redis_manager = AsyncMock()
+    bus.redis_manager.get_cached.return_value = None
+    bus.redis_manager.get_cached_field.return_value = None
+    return bus
+
+
+@pytest.fixture
+def cache(bus):
+    """Cache of items shared through the bus"""
+    return TwoTierCache("items", TypeAdapter(Item), max_size=2, ttl=30, bus=bus)
+
+
+def loader(*items):
+    """Load function returning items in turn, counting its calls"""
+    return AsyncMock(side_effect=list(items))
+
+
+class TestTwoTierCache:
+    """Test reading through memory, then Redis, then the source"""
+
+    @pytest.mark.asyncio
+    async def test_miss_loads_and_shares(self, cache, bus):
+        """Test a miss loads the value and caches it in both tiers"""
+        load = loader(Item(id=1, name="one"))
+
+        first = await cache.get("1", load)
+        second = await cache.get("1", load)
+
+        assert first == Item(id=1, name="one")
+        assert second is first
+        assert load.await_count == 1
+        bus.redis_manager.get_cached.assert_awaited_once_with("cache:items:1")
+        bus.redis_manager.set_cached.assert_awaited_once_with(
+            "cache:items:1", {"id": 1, "name": "one"}, 30
+        )
+
+    @pytest.mark.asyncio
+    async def test_redis_hit(self, cache, bus):
+        """Test another worker's value is used without loading"""
+        bus.redis_manager.get_cached.return_value = {"id": 1, "name": "shared"}
+        load = loader()
+
+        assert await cache.get("1", load) == Item(id=1, name="shared")
+        load.assert_not_awaited()
+        bus.redis_manager.set_cached.assert_not_awaited()
+        assert list(cache._entries) == ["1"]
+
+    @pytest.mark.asyncio
+    async def test_without_bus(self):
+        """Test a cache without a bus only uses memory"""
+        cache = TwoTierCache("local", TypeAdapter(Item), max_size=2, ttl=30)
+        load = loader(Item(id=1, name="one"))
+
+        await cache.get("1", load)
+        await cache.get("1", load)
+        await cache.invalidate("1")
+
+        assert load.await_count == 1
+        assert cache._entries == {}
+
+    @pytest.mark.asyncio
+    async def test_entries_expire(self, cache):
+        """Test values are loaded again once older than the ttl"""
+        cache.ttl = 0
+        load = loader(Item(id=1, name="old"), Item(id=1, name="new"))
+
+        await cache.get("1", load)
+
+        assert (await cache.get("1", load)).name == "new"
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_is_dropped(self, cache):
+        """Test the cache keeps at most max_size values"""
+        await cache.get("1", loader(Item(id=1, name="one")))
+        await cache.get("2", loader(Item(id=2, name="two")))
+        await cache.get("1", loader())
+        await cache.get("3", loader(Item(id=3, name="three")))
+
+        assert list(cache._entries) == ["1", "3"]
+
+    @pytest.mark.asyncio
+    async def test_values_not_kept(self, cache, bus):
+        """Test missing values and values keep rejects are not cached"""
+        cache.keep = lambda item: item.id > 1
+        load = loader(None, Item(id=1, name="one"), Item(id=1, name="one"))
+
+        assert await cache.get("1", load) is None
+        assert await cache.get("1", load) == Item(id=1, name="one")
+        await cache.get("1", load)
+
+        assert load.await_count == 3
+        bus.redis_manager.set_cached.assert_not_awaited()
+        assert cache._entries == {}
+
+    @pytest.mark.asyncio
+    async def test_invalidate(self, cache, bus):
+        """Test invalidating drops the value here, in Redis and elsewhere"""
+        await cache.get("1", loader(Item(id=1, name="one")))
+        await cache.get("2", loader(Item(id=2, name="two")))
+
+        await cache.invalidate("1")
+
+        assert list(cache._entries) == ["2"]
+        bus.redis_manager.delete_cached.assert_awaited_once_with("cache:items:1")
+        bus.redis_manager.publish.assert_awaited_once_with(
+            CACHE_INVALIDATION_CHANNEL, json.dumps({"cache": "items", "keys": ["1"]})
+        )
+
+    @pytest.mark.asyncio
+    async def test_single_key(self, bus):
+        """Test a single-key cache shares values as fields of one hash"""
+        cache = TwoTierCache(
+            "lists", TypeAdapter(Item), max_size=2, ttl=30, bus=bus, single_key=True
+        )
+        await cache.get("1", loader(Item(id=1, name="one")))
+        await cache.invalidate("1")
+
+        bus.redis_manager.get_cached_field.assert_awaited_once_with("cache:lists", "1")
+        bus.redis_manager.set_cached_field.assert_awaited_once_with(
+            "cache:lists", "1", {"id": 1, "name": "one"}, 30
+        )
+        bus.redis_manager.delete_cached_fields.assert_awaited_once_with(
+            "cache:lists", "1"
+        )
+        bus.redis_manager.get_cached.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_clear(self, bus):
+        """Test clearing drops every value here, in Redis and elsewhere"""
+        cache = TwoTierCache(
+            "lists", TypeAdapter(Item), max_size=2, ttl=30, bus=bus, single_key=True
+        )
+        await cache.get("1", loader(Item(id=1, name="one")))
+
+        await cache.clear()
+
+        assert cache._entries == {}
+        bus.redis_manager.delete_cached.assert_awaited_once_with("cache:lists")
+        bus.redis_manager.publish.assert_awaited_once_with(
+            CACHE_INVALIDATION_CHANNEL, json.dumps({"cache": "lists", "keys": None})
+        )
+
+    @pytest.mark.asyncio
+    async def test_clear_needs_single_key(self, cache):
+        """Test only caches kept under one Redis key can be cleared"""
+        with pytest.raises(TypeError):
+            await cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_redis_down(self, cache, bus):
+        """Test the source and memory answer while Redis is down"""
+        bus.redis_manager.get_cached.side_effect = RedisError("down")
+        bus.redis_manager.set_cached.side_effect = RedisError("down")
+        bus.redis_manager.delete_cached.side_effect = RedisError("down")
+        load = loader(Item(id=1, name="one"))
+
+        assert await cache.get("1", load) == Item(id=1, name="one")
+        assert await cache.get("1", load) == Item(id=1, name="one")
+        await cache.invalidate("1")
+
+        assert cache._entries == {}
+
+    @pytest.mark.asyncio
+    async def test_metrics(self, cache, bus):
+        """Test hits per tier and misses are counted"""
+        metrics.reset()
+        await cache.get("1", loader(Item(id=1, name="one")))
+        await cache.get("1", loader())
+        bus.redis_manager.get_cached.return_value = {"id": 2, "name": "two"}
+        await cache.get("2", loader())
+
+        snapshot = metrics.snapshot()
+        assert snapshot["counters"]["cache.items.misses"] == 1
+        assert snapshot["counters"]["cache.items.local_hits"] == 1
+        assert snapshot["counters"]["cache.items.redis_hits"] == 1
+        assert snapshot["gauges"]["cache.items.hit_rate"] == pytest.approx(2 / 3)
+        assert snapshot["gauges"]["cache.items.size"] == 2
+
+
+class TestCacheBus:
+    """Test invalidations from other workers"""
+
+    @pytest.mark.asyncio
+    async def test_dispatch(self, cache, bus):
+        """Test messages drop entries of the named cache only"""
+        await cache.get("1", loader(Item(id=1, name="one")))
+        await cache.get("2", loader(Item(id=2, name="two")))
+
+        bus._dispatch(json.dumps({"cache": "other", "keys": ["1"]}))
+        assert list(cache._entries) == ["1", "2"]
+        bus._dispatch(json.dumps({"cache": "items", "keys": ["1"]}))
+        assert list(cache._entries) == ["2"]
+        bus._dispatch(json.dumps({"cache": "items", "keys": None}))
+        assert cache._entries == {}
+
+    @pytest.mark.asyncio
+    async def test_listens_until_stopped(self, cache):
+        """Test the bus applies messages it receives until stopped"""
+        await cache.get("1", loader(Item(id=1, name="one")))
+        message = json.dumps({"cache": "items", "keys": ["1"]})
+
+        async def listen():
+            yield {"type": "message", "data": message}
+            await asyncio.Event().wait()
+
+        pubsub = Mock()
+        pubsub.subscribe = AsyncMock()
+        pubsub.aclose = AsyncMock()
+        pubsub.listen = listen
+        redis_manager = Mock()
+        redis_manager.pubsub.return_value = pubsub
+
+        await cache.bus.start(redis_manager)
+        await asyncio.sleep(0)
+
+        pubsub.subscribe.assert_awaited_once_with(CACHE_INVALIDATION_CHANNEL)
+        assert cache._entries == {}
+        await cache.bus.stop()
+        pubsub.aclose.assert_awaited_once()
+        assert cache.bus._listener is None
+
+    @pytest.mark.asyncio
+    async def test_pubsub_unavailable(self, bus):
+        """Test the bus still shares values when it cannot subscribe"""
+        pubsub = Mock()
+        pubsub.subscribe = AsyncMock(side_effect=RedisError("down"))
+        pubsub.aclose = AsyncMock()
+        redis_manager = Mock()
+        redis_manager.pubsub.return_value = pubsub
+
+        await bus.start(redis_manager)
+
+        assert bus.redis_manager is redis_manager
+        assert bus._listener is None
+        pubsub.aclose.assert_awaited_once()
+        await bus.stop()
@@ -1,7 +1,18 @@
 # -*- frontenda -*-
 
 
-from app.database.connection import DATABASE_URL, SessionLocal, engine, get_db
+import pytest
+
+from app.database.connection import (
+    DATABASE_URL,
+    AsyncSessionLocal,
+    SessionLocal,
+    async_engine,
+    engine,
+    get_async_db,
+    get_db,
+    to_async_url,
+)
 
 
 class TestDatabaseConnection:
@@ -40,3 +51,29 @@ class TestDatabaseConnection:
                 db_gen.close()
             except Exception:
                 pass
+
+    def test_async_engine_creation(self):
+        """Test async engine and session factory are created"""
+        assert async_engine is not None
+        assert AsyncSessionLocal is not None
+
+    def test_to_async_url(self):
+        """Test sync URLs map onto async drivers"""
+        assert to_async_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+        assert (
+            to_async_url("postgresql://u:p@db:5432/app")
+            == "postgresql+asyncpg://u:p@db:5432/app"
+        )
+        assert (
+            to_async_url("postgresql+psycopg2://u:p@db/app")
+            == "postgresql+asyncpg://u:p@db/app"
+        )
+        assert to_async_url("mysql://db/app") == "mysql://db/app"
+
+    @pytest.mark.asyncio
+    async def test_get_async_db_generator(self):
+        """Test async database session generator"""
+        db_gen = get_async_db()
+        session = await db_gen.__anext__()
+        assert session is not None
+        await db_gen.aclose()
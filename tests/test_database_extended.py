@@ -2,6 +2,12 @@ import datetime
 import os
 from unittest.mock import patch
 
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.database.connection import pool_options
+from app.database.pool import InstrumentedQueuePool, register_pool_gauges
+from app.models.board import Board
 from app.models.game import GameResponse
 
 
@@ -29,14 +35,68 @@ class TestDatabaseConnection:
 
             importlib.reload(connection)
             # This tests the else branch in the engine creation
+            assert isinstance(connection.engine.pool, InstrumentedQueuePool)
+            assert connection.engine.pool.size() == 5
+
+    def test_pool_options_from_env(self):
+        """Test pool settings are read from the environment"""
+        env = {
+            "DB_POOL_SIZE": "20",
+            "DB_MAX_OVERFLOW": "0",
+            "DB_POOL_TIMEOUT": "2.5",
+            "DB_POOL_RECYCLE": "600",
+            "DB_POOL_PRE_PING": "false",
+        }
+        with patch.dict(os.environ, env):
+            assert pool_options() == {
+                "pool_size": 20,
+                "max_overflow": 0,
+                "pool_timeout": 2.5,
+                "pool_recycle": 600,
+                "pool_pre_ping": False,
+            }
+
+
+class TestInstrumentedPool:
+    """Test connection pool metrics"""
+
+    def test_checkout_overflow_and_timeout(self, tmp_path):
+        """Test pool records waits, overflow events and timeouts"""
+        from app.services.metrics_service import metrics
+
+        metrics.reset()
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=1,
+            pool_timeout=0.01,
+        )
+        register_pool_gauges(engine, "test.pool")
+
+        first = engine.connect()
+        second = engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+        snapshot = metrics.snapshot()
+        assert snapshot["timers"]["db.pool.checkout_wait"]["count"] == 2
+        assert snapshot["counters"]["db.pool.overflow_events"] == 1
+        assert snapshot["counters"]["db.pool.timeouts"] == 1
+        assert snapshot["gauges"]["test.pool.in_use"] == 2
+        assert snapshot["gauges"]["test.pool.overflow"] == 1
+
+        first.close()
+        second.close()
+        engine.dispose()
 
 
 class TestGameModels:
     """Test game model methods"""
 
     def test_game_response_from_orm_with_none_board(self):
-        """Test GameResponse.from_orm with None board_state"""
-        # Create a mock game object with None board_state
+        """Test GameResponse.from_orm with None board_code"""
+        # Create a mock game object with None board_code
 
         mock_game = type(
             "MockGame",
@@ -46,7 +106,7 @@ class TestGameModels:
                 "player1_id": 1,
                 "player2_id": 2,
                 "player2_type": "human",
-                "board_state": None,  # This should trigger the else branch
+                "board_code": None,  # This should fall back to an empty board
                 "current_turn": "1",
                 "status": "in_progress",
                 "winner_id": None,
@@ -61,9 +121,7 @@ class TestGameModels:
         assert response.board_state == [""] * 9
 
     def test_game_response_from_orm_with_board_state(self):
-        """Test GameResponse.from_orm with existing board_state"""
-        import json
-
+        """Test GameResponse.from_orm with existing board_code"""
         board_state = ["X", "O", "", "", "", "", "", "", ""]
 
         mock_game = type(
@@ -74,7 +132,7 @@ class TestGameModels:
                 "player1_id": 1,
                 "player2_id": 2,
                 "player2_type": "human",
-                "board_state": json.dumps(board_state),
+                "board_code": Board.from_list(board_state).code,
                 "current_turn": "1",
                 "status": "in_progress",
                 "winner_id": None,
@@ -47,7 +47,7 @@ class TestGameService:
             player1_id=1,
             player2_id=None,
             player2_type=PlayerType.HUMAN,
-            board_state='["","","","","","","","",""]',
+            board_code=0,
             current_turn="X",
             status=GameStatus.WAITING,
         )
@@ -72,7 +72,7 @@ class TestGameService:
             player1_id=1,
             player2_id=None,
             player2_type=PlayerType.AI,
-            board_state='["","","","","","","","",""]',
+            board_code=0,
             current_turn="X",
             status=GameStatus.IN_PROGRESS,
         )
@@ -1,15 +1,18 @@
-import json
+from datetime import datetime
 from unittest.mock import patch
 
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.database.connection import Base
+from app.models.board import Board
 from app.models.game import Game, GameObserver, GameStatus, PlayerType
-from app.models.leaderboard import UserStats
+from app.models.leaderboard import UserStats, UserStatsPeriod
 from app.models.user import User
-from app.services.game_service import GameService
+from app.services.game_service import MOVE_CONFLICT, MOVE_RETRIES, GameService
 
 
 @pytest.fixture
@@ -61,7 +64,7 @@ class TestGameService:
         assert game.player2_type == PlayerType.HUMAN
         assert game.status == GameStatus.IN_PROGRESS
         assert game.current_turn == "X"
-        assert game.board_state == '["","","","","","","","",""]'
+        assert game.board_code == 0
         assert game.total_moves == 0
 
     def test_create_game_human_vs_human_waiting(self, db_session, sample_users):
@@ -131,6 +134,56 @@ class TestGameService:
         assert len(active_games) == 1
         assert active_games[0].player2_username == "AI"
 
+    def test_get_active_games_query_count(self, db_session, sample_users):
+        """Test active games list uses a fixed number of queries"""
+        engine = db_session.get_bind()
+        statements = []
+
+        def count_statement(conn, cursor, statement, parameters, context, many):
+            statements.append(statement)
+
+        def run_and_count():
+            db_session.expire_all()
+            statements.clear()
+            event.listen(engine, "before_cursor_execute", count_statement)
+            try:
+                games = GameService.get_active_games(db_session)
+            finally:
+                event.remove(engine, "before_cursor_execute", count_statement)
+            return games, len(statements)
+
+        game = GameService.create_game(db_session, player1_id=1, player2_id=2)
+        GameService.add_observer(db_session, game.id, 3)
+        games, single_game_queries = run_and_count()
+        assert len(games) == 1
+
+        for _ in range(9):
+            game = GameService.create_game(db_session, player1_id=2, player2_id=1)
+            GameService.add_observer(db_session, game.id, 3)
+        GameService.create_game(db_session, player1_id=1, player2_type=PlayerType.AI)
+        games, many_games_queries = run_and_count()
+
+        assert len(games) == 11
+        assert many_games_queries == single_game_queries == 1
+        assert {g.player2_username for g in games} == {"player1", "player2", "AI"}
+        assert sum(g.observer_count for g in games) == 10
+
+    def test_get_list_item(self, db_session, sample_users):
+        """Test getting a single games-list entry"""
+        game = GameService.create_game(db_session, player1_id=1)
+        GameService.add_observer(db_session, game.id, 3)
+        GameService.create_game(db_session, player1_id=2)
+
+        item = GameService.get_list_item(db_session, game.id)
+
+        assert item.id == game.id
+        assert item.player2_username is None
+        assert item.observer_count == 1
+
+        game.status = GameStatus.COMPLETED
+        db_session.commit()
+        assert GameService.get_list_item(db_session, game.id) is None
+
     def test_join_game_success(self, db_session, sample_users):
         """Test successfully joining a game"""
         game = GameService.create_game(db_session, player1_id=1)
@@ -186,6 +239,13 @@ class TestGameService:
         )
         assert observer_count == 1
 
+    def test_add_observer_unknown_game(self, db_session, sample_users):
+        """Test a foreign key violation isn't mistaken for already observing"""
+        db_session.execute(text("PRAGMA foreign_keys=ON"))
+
+        with pytest.raises(IntegrityError):
+            GameService.add_observer(db_session, 999, 3)
+
     def test_make_move_success(self, db_session, sample_game):
         """Test making a successful move"""
         game, message = GameService.make_move(db_session, sample_game.id, 1, 0)
@@ -195,8 +255,43 @@ class TestGameService:
         assert game.current_turn == "O"
         assert game.total_moves == 1
 
-        board_state = json.loads(game.board_state)
-        assert board_state[0] == "X"
+        board = Board.from_code(game.board_code)
+        assert board.cell(0) == "X"
+
+    def test_make_move_query_count(self, db_session, sample_users):
+        """Test a move is one UPDATE ... RETURNING plus its log row, and an
+        AI reply shares the move's transaction and log INSERT"""
+        engine = db_session.get_bind()
+        # Configured like AsyncSessionLocal, which the API uses
+        db = Session(engine, autoflush=False, expire_on_commit=False)
+        statements = []
+        commits = []
+
+        def count_statement(conn, cursor, statement, parameters, context, many):
+            statements.append(statement.split()[0])
+
+        human = GameService.create_game(db, player1_id=1, player2_id=2)
+        ai = GameService.create_game(db, player1_id=1, player2_type=PlayerType.AI)
+        event.listen(engine, "before_cursor_execute", count_statement)
+        event.listen(db, "after_commit", commits.append)
+        try:
+            GameService.make_move(db, human.id, 1, 4)
+            human_move = list(statements)
+            statements.clear()
+            commits.clear()
+            with patch(
+                "app.services.game_service.AIService.get_ai_move", return_value=0
+            ):
+                game, message = GameService.make_move(db, ai.id, 1, 4)
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+
+        assert message == "AI move successful"
+        assert human_move == ["UPDATE", "INSERT"]
+        # Both moves, then both log rows in one INSERT, committed once.
+        # SQLite can't put the UPDATE in a CTE, so the INSERT stays separate.
+        assert statements == ["UPDATE", "UPDATE", "INSERT"]
+        assert len(commits) == 1
 
     def test_make_move_invalid_position(self, db_session, sample_game):
         """Test making move to invalid position"""
@@ -271,7 +366,7 @@ class TestGameService:
 
         # Set up a winning scenario for player1 (X)
         board_state = ["X", "X", "", "", "", "", "", "", ""]
-        sample_game.board_state = json.dumps(board_state)
+        sample_game.board_code = Board.from_list(board_state).code
         sample_game.current_turn = "X"
         db_session.commit()
 
@@ -285,7 +380,7 @@ class TestGameService:
         """Test making move that results in draw"""
         # Set up a draw scenario
         board_state = ["X", "O", "X", "O", "O", "X", "O", "X", ""]
-        sample_game.board_state = json.dumps(board_state)
+        sample_game.board_code = Board.from_list(board_state).code
         sample_game.current_turn = "O"
         db_session.commit()
 
@@ -309,11 +404,147 @@ class TestGameService:
         assert result_game.current_turn == "X"  # Back to player after AI move
         assert result_game.total_moves == 2  # Player move + AI move
 
-        board_state = json.loads(result_game.board_state)
-        assert board_state[0] == "X"  # Player move
-        assert board_state[1] == "O"  # AI move
+        board = Board.from_code(result_game.board_code)
+        assert board.cell(0) == "X"  # Player move
+        assert board.cell(1) == "O"  # AI move
         mock_ai_move.assert_called_once()
 
+    def test_make_move_deferred_ai(self, db_session, sample_users):
+        """Test play_ai=False leaves the AI reply to the caller"""
+        game = GameService.create_game(
+            db_session, player1_id=1, player2_type=PlayerType.AI
+        )
+
+        result_game, message = GameService.make_move(
+            db_session, game.id, 1, 0, play_ai=False
+        )
+        assert message == "Move successful"
+        assert GameService.is_ai_turn(result_game)
+
+        # Occupied positions are rejected
+        result_game, message = GameService.apply_ai_move(db_session, result_game, 0)
+        assert message == "No valid AI move"
+
+        result_game, message = GameService.apply_ai_move(db_session, result_game, 4)
+        assert message == "AI move successful"
+        assert Board.from_code(result_game.board_code).cell(4) == "O"
+        assert result_game.current_turn == "X"
+        assert not GameService.is_ai_turn(result_game)
+
+    def test_move_event(self, db_session, sample_game):
+        """Test describing a move from the game state after it"""
+        game, _ = GameService.make_move(db_session, sample_game.id, 1, 4)
+
+        event = GameService.move_event(game, 4)
+
+        assert event.game_id == game.id
+        assert event.seq == 1
+        assert event.position == 4
+        assert event.mark == "X"
+        assert event.status == GameStatus.IN_PROGRESS
+        assert event.winner_id is None
+
+    def test_version_is_bumped_on_write(self, db_session, sample_game):
+        """Test each committed move bumps the game's version"""
+        version = sample_game.version
+
+        GameService.make_move(db_session, sample_game.id, 1, 4)
+
+        assert sample_game.version == version + 1
+
+    def test_concurrent_move_is_revalidated(self, db_session, sample_game):
+        """Test a move that lost the race is checked against the winner's state"""
+        read = {
+            "board_code": sample_game.board_code,
+            "current_turn": sample_game.current_turn,
+            "total_moves": sample_game.total_moves,
+            "version": sample_game.version,
+        }
+        # Another request plays X at 4 after this session read the game
+        db_session.execute(
+            update(Game.__table__)
+            .where(Game.__table__.c.id == sample_game.id)
+            .values(
+                board_code=Board().play(4, "X").code,
+                current_turn="O",
+                total_moves=1,
+                version=sample_game.version + 1,
+            )
+        )
+        db_session.commit()
+        for key, value in read.items():
+            set_committed_value(sample_game, key, value)
+
+        game, message = GameService.make_move(db_session, sample_game.id, 1, 0)
+
+        assert game is None
+        assert message == "Not your turn"
+        assert sample_game.board_code == Board().play(4, "X").code
+        assert GameService.get_moves(db_session, sample_game.id) == []
+
+    def test_move_conflict_after_retries(self, db_session, sample_game):
+        """Test a move that keeps losing the race is refused"""
+        with patch.object(GameService, "_play", return_value=None) as play:
+            game, message = GameService.make_move(db_session, sample_game.id, 1, 4)
+
+        assert play.call_count == MOVE_RETRIES
+        assert game is None
+        assert message == MOVE_CONFLICT
+
+    def test_moves_are_logged(self, db_session, sample_game):
+        """Test each move appends a row to the move log"""
+        GameService.make_move(db_session, sample_game.id, 1, 4)
+        GameService.make_move(db_session, sample_game.id, 2, 0)
+
+        moves = GameService.get_moves(db_session, sample_game.id)
+
+        assert [(m.seq, m.position, m.mark) for m in moves] == [
+            (1, 4, "X"),
+            (2, 0, "O"),
+        ]
+        assert GameService.replay(moves).code == sample_game.board_code
+
+    def test_replay_boards(self, db_session, sample_game):
+        """Test boards of several games are rebuilt from one query"""
+        other = GameService.create_game(db_session, player1_id=1, player2_id=2)
+        GameService.make_move(db_session, sample_game.id, 1, 8)
+
+        boards = GameService.replay_boards(db_session, [sample_game.id, other.id])
+
+        assert boards[sample_game.id].cell(8) == "X"
+        assert boards[other.id] == Board()
+
+    def test_rebuild_game(self, db_session, sample_game):
+        """Test a game's state is recovered from its move log"""
+        for user_id, position in [(1, 0), (2, 3), (1, 1), (2, 4), (1, 2)]:
+            GameService.make_move(db_session, sample_game.id, user_id, position)
+        won = (sample_game.board_code, sample_game.winner_id)
+
+        sample_game.board_code = 0
+        sample_game.status = GameStatus.IN_PROGRESS
+        sample_game.winner_id = None
+        db_session.commit()
+
+        game = GameService.rebuild_game(db_session, sample_game.id)
+
+        assert (game.board_code, game.winner_id) == won
+        assert game.status == GameStatus.COMPLETED
+        assert game.total_moves == 5
+        assert GameService.rebuild_game(db_session, 999) is None
+
+    def test_rebuild_game_without_full_log(self, db_session, sample_game):
+        """Test games whose moves predate the log are left alone"""
+        sample_game.board_code = Board().play(4, "X").code
+        sample_game.current_turn = "O"
+        sample_game.total_moves = 1
+        db_session.commit()
+
+        assert GameService.rebuild_game(db_session, sample_game.id) is None
+
+        db_session.refresh(sample_game)
+        assert Board.from_code(sample_game.board_code).cell(4) == "X"
+        assert sample_game.total_moves == 1
+
     def test_check_winner_row(self):
         """Test winner detection for rows"""
         board = ["X", "X", "X", "", "", "", "", "", ""]
@@ -374,3 +605,59 @@ class TestGameService:
         assert loser_stats.games_won == 0
         assert loser_stats.games_lost == 1
         assert loser_stats.win_rate == 0.0
+
+    def test_update_user_stats_self_play(self, db_session, sample_users):
+        """Test a game against oneself is one stats row with both results"""
+        game = GameService.create_game(db_session, player1_id=1, player2_id=1)
+        with patch.object(
+            GameService, "_add_to_stats", wraps=GameService._add_to_stats
+        ) as add_to_stats:
+            for position in (0, 3, 1, 4, 2):
+                game, _ = GameService.make_move(db_session, game.id, 1, position)
+
+        assert game.status == GameStatus.COMPLETED
+        for call in add_to_stats.call_args_list:
+            assert [row["user_id"] for row in call.args[3]] == [1]
+        stats = db_session.get(UserStats, 1)
+        assert (stats.games_played, stats.games_won, stats.games_lost) == (2, 1, 1)
+        assert stats.win_rate == 0.5
+        assert stats.avg_moves_per_game == 5.0
+
+    def test_update_user_stats_accumulates(self, db_session, sample_users):
+        """Test stats add up across games with one upsert per stats table"""
+        engine = db_session.get_bind()
+        statements = []
+
+        def count_statement(conn, cursor, statement, parameters, context, many):
+            statements.append(statement)
+
+        won = Game(player1_id=1, player2_id=2, winner_id=1, total_moves=5, board_code=0)
+        drawn = Game(
+            player1_id=1, player2_id=2, winner_id=None, total_moves=9, board_code=0
+        )
+        db_session.add_all([won, drawn])
+        db_session.commit()
+        db_session.refresh(won)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            GameService._update_user_stats(db_session, won)
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        GameService._update_user_stats(db_session, drawn)
+        db_session.commit()
+
+        # All-time stats, then the bucket of the day the game ended
+        assert [s.split()[2] for s in statements] == [
+            "user_stats",
+            "user_stats_periods",
+        ]
+        stats = {s.user_id: s for s in db_session.query(UserStats).all()}
+        assert stats[1].games_played == 2
+        assert (stats[1].games_won, stats[1].games_drawn) == (1, 1)
+        assert (stats[2].games_lost, stats[2].games_drawn) == (1, 1)
+        assert stats[1].win_rate == 0.5
+        assert stats[2].win_rate == 0.0
+        assert stats[1].avg_moves_per_game == 7.0
+        day = db_session.get(UserStatsPeriod, (1, "day", datetime.utcnow().date()))
+        assert (day.games_played, day.games_won, day.win_rate) == (2, 1, 0.5)
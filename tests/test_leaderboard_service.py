@@ -1,11 +1,18 @@
+from datetime import date
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.database.connection import Base
-from app.models.leaderboard import UserStats
+from app.models.leaderboard import LeaderboardWindow, UserStats, UserStatsPeriod
 from app.models.user import User
-from app.services.leaderboard_service import LeaderboardService
+from app.services.leaderboard_service import (
+    LeaderboardService,
+    RedisLeaderboard,
+    leaderboard_score,
+    period_bounds,
+)
 
 
 @pytest.fixture
@@ -162,3 +169,228 @@ class TestLeaderboardService:
         stats = db_session.query(UserStats).filter(UserStats.user_id == 1).first()
         assert stats is not None
         assert stats.games_played == 0
+
+
+class SyncRunner:
+    """Runs service calls on a sync session the way AsyncSession.run_sync does"""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run_sync(self, fn, *args):
+        return fn(self.session, *args)
+
+
+class FakeLeaderboardRedis:
+    """In-memory stand-in for RedisManager's leaderboard commands"""
+
+    def __init__(self):
+        self.scores = {}
+        self.entries = {}
+
+    async def update_leaderboard(self, entries, removed=None):
+        for user_id, (score, entry) in entries.items():
+            self.scores[user_id] = score
+            self.entries[user_id] = entry
+        for user_id in removed or []:
+            self.scores.pop(user_id, None)
+            self.entries.pop(user_id, None)
+
+    async def replace_leaderboard(self, entries):
+        self.scores, self.entries = {}, {}
+        await self.update_leaderboard(entries)
+
+    async def has_leaderboard(self):
+        return bool(self.entries)
+
+    def order(self):
+        return sorted(self.scores, key=lambda u: (self.scores[u], str(u)), reverse=True)
+
+    async def get_leaderboard_range(self, start, stop):
+        return [self.entries[u] for u in self.order()[start : stop + 1]]
+
+    async def get_leaderboard_rank(self, user_id):
+        return self.order().index(user_id) if user_id in self.scores else None
+
+    async def get_leaderboard_size(self):
+        return len(self.scores)
+
+
+class TestRedisLeaderboard:
+    """Test the sorted-set leaderboard"""
+
+    @pytest.fixture
+    def leaderboard(self):
+        return RedisLeaderboard(FakeLeaderboardRedis())
+
+    @pytest.fixture
+    def db(self, db_session):
+        return SyncRunner(db_session)
+
+    def test_score_orders_like_the_query(self):
+        """Test win rate ranks first and games played breaks ties"""
+        best = UserStats(win_rate=0.8, games_played=5)
+        busy = UserStats(win_rate=0.5, games_played=20)
+        less_busy = UserStats(win_rate=0.5, games_played=10)
+
+        assert leaderboard_score(best) > leaderboard_score(busy)
+        assert leaderboard_score(busy) > leaderboard_score(less_busy)
+
+    @pytest.mark.asyncio
+    async def test_rebuild_matches_database(
+        self, leaderboard, db, db_session, sample_stats
+    ):
+        """Test a rebuilt leaderboard pages like the database query"""
+        assert await leaderboard.rebuild(db) == 3
+
+        page = await leaderboard.get_leaderboard()
+
+        assert page == LeaderboardService.get_leaderboard(db_session)
+        second = await leaderboard.get_leaderboard(limit=2, offset=1)
+        assert [(e.rank, e.username) for e in second.entries] == [
+            (2, "player2"),
+            (3, "player3"),
+        ]
+        assert second.total_users == 3
+
+    @pytest.mark.asyncio
+    async def test_rank_and_neighbours(self, leaderboard, db, sample_stats):
+        """Test a player's rank and the players around them"""
+        await leaderboard.rebuild(db)
+
+        entry = await leaderboard.get_rank(2)
+        around = await leaderboard.get_around(1, radius=1)
+
+        assert (entry.rank, entry.username) == (2, "player2")
+        assert [(e.rank, e.user_id) for e in around] == [(1, 1), (2, 2)]
+        assert await leaderboard.get_rank(4) is None
+        assert await leaderboard.get_around(4) == []
+
+    @pytest.mark.asyncio
+    async def test_update_users(self, leaderboard, db, db_session, sample_stats):
+        """Test players are ranked as soon as their stats qualify"""
+        await leaderboard.rebuild(db)
+        newbie = sample_stats[3]
+        newbie.games_played, newbie.games_won, newbie.win_rate = 5, 5, 1.0
+        db_session.commit()
+
+        await leaderboard.update_users(db, [4])
+
+        entry = await leaderboard.get_rank(4)
+        assert (entry.rank, entry.games_played) == (1, 5)
+        assert (await leaderboard.get_leaderboard()).total_users == 4
+
+    @pytest.mark.asyncio
+    async def test_ensure_built(self, leaderboard, db, sample_stats):
+        """Test the leaderboard is only rebuilt when missing"""
+        await leaderboard.ensure_built(db)
+        assert await leaderboard.redis_manager.get_leaderboard_size() == 3
+
+        await leaderboard.redis_manager.update_leaderboard({}, [1])
+        await leaderboard.ensure_built(db)
+        assert await leaderboard.redis_manager.get_leaderboard_size() == 2
+
+
+def day_bucket(user_id, day, won, lost):
+    """Stats of one player for one day"""
+    return UserStatsPeriod(
+        user_id=user_id,
+        period=LeaderboardWindow.DAY,
+        period_start=day,
+        games_played=won + lost,
+        games_won=won,
+        games_lost=lost,
+        games_drawn=0,
+        total_moves=(won + lost) * 7,
+        win_rate=won / (won + lost),
+        avg_moves_per_game=7.0,
+    )
+
+
+class TestLeaderboardWindows:
+    """Test daily, weekly and monthly leaderboards"""
+
+    @pytest.fixture
+    def day_stats(self, db_session, sample_users):
+        """Days of play in the week of Wednesday 2026-10-14"""
+        db_session.add_all(
+            [
+                # Last day of the previous week and month
+                day_bucket(1, date(2026, 9, 30), won=5, lost=0),
+                day_bucket(1, date(2026, 10, 13), won=1, lost=2),
+                day_bucket(1, date(2026, 10, 14), won=1, lost=2),
+                day_bucket(2, date(2026, 10, 12), won=4, lost=1),
+                day_bucket(2, date(2026, 10, 14), won=0, lost=1),
+                day_bucket(3, date(2026, 10, 14), won=5, lost=0),
+            ]
+        )
+        db_session.commit()
+
+    def test_period_bounds(self):
+        """Test windows start on the day, the Monday and the first"""
+        wednesday = date(2026, 10, 14)
+        assert period_bounds(LeaderboardWindow.DAY, wednesday) == (
+            wednesday,
+            date(2026, 10, 15),
+        )
+        assert period_bounds(LeaderboardWindow.WEEK, wednesday) == (
+            date(2026, 10, 12),
+            date(2026, 10, 19),
+        )
+        assert period_bounds(LeaderboardWindow.MONTH, date(2026, 12, 31)) == (
+            date(2026, 12, 1),
+            date(2027, 1, 1),
+        )
+
+    def test_roll_up(self, db_session, day_stats):
+        """Test week and month buckets sum their days"""
+        LeaderboardService.roll_up(db_session, date(2026, 10, 14))
+
+        week = LeaderboardService.get_leaderboard(
+            db_session, window=LeaderboardWindow.WEEK, day=date(2026, 10, 14)
+        )
+        assert [(e.user_id, e.games_played) for e in week.entries] == [
+            (3, 5),
+            (2, 6),
+            (1, 6),
+        ]
+        assert week.entries[1].win_rate == pytest.approx(4 / 6)
+        assert week.entries[1].avg_moves_per_game == 7.0
+
+        # The last day of September is in neither this week nor this month
+        month = LeaderboardService.get_leaderboard(
+            db_session, window=LeaderboardWindow.MONTH, day=date(2026, 10, 1)
+        )
+        assert [e.user_id for e in month.entries] == [3, 2, 1]
+        assert month.entries[2].games_won == 2
+
+    def test_roll_up_is_idempotent(self, db_session, day_stats):
+        """Test rolling up twice replaces buckets instead of adding to them"""
+        LeaderboardService.roll_up(db_session, date(2026, 10, 14))
+        db_session.add(day_bucket(3, date(2026, 10, 13), won=0, lost=5))
+        db_session.commit()
+        LeaderboardService.roll_up(db_session, date(2026, 10, 14))
+
+        week = LeaderboardService.get_leaderboard(
+            db_session, window=LeaderboardWindow.WEEK, day=date(2026, 10, 14)
+        )
+        player3 = next(e for e in week.entries if e.user_id == 3)
+        assert (player3.games_played, player3.win_rate) == (10, 0.5)
+
+    def test_roll_up_includes_the_day_before(self, db_session, day_stats):
+        """Test games from just before midnight reach last month's bucket"""
+        LeaderboardService.roll_up(db_session, date(2026, 10, 1))
+
+        september = LeaderboardService.get_leaderboard(
+            db_session, window=LeaderboardWindow.MONTH, day=date(2026, 9, 15)
+        )
+        assert [(e.user_id, e.games_won) for e in september.entries] == [(1, 5)]
+
+    def test_day_window(self, db_session, day_stats):
+        """Test the daily leaderboard reads day buckets without a rollup"""
+        today = LeaderboardService.get_leaderboard(
+            db_session, window=LeaderboardWindow.DAY, day=date(2026, 10, 14)
+        )
+        # Only player 3 has enough games that day
+        assert [e.user_id for e in today.entries] == [3]
+        assert today.total_users == 1
@@ -0,0 +1,438 @@
+import dataclasses
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from sqlalchemy import update
+
+from app.models.board import Board
+from app.models.game import Game, GameStatus, PlayerType
+from app.models.leaderboard import UserStats
+from app.models.user import User
+from app.services.game_service import GameService
+from app.services.live_game_store import LiveGame, LiveGameStore
+
+
+@pytest.fixture
+def db_session(file_session):
+    """Sync session for setting up and checking the database, with two users"""
+    file_session.add_all(
+        [
+            User(id=1, username="player1", email="p1@test.com", password_hash="h"),
+            User(id=2, username="player2", email="p2@test.com", password_hash="h"),
+        ]
+    )
+    file_session.commit()
+    return file_session
+
+
+@pytest.fixture
+def session_factory(session_factory, db_session):
+    """Async sessions on the test database, once its users exist"""
+    return session_factory
+
+
+@pytest.fixture
+def store(session_factory):
+    """Live game store that only flushes when asked"""
+    return LiveGameStore(enabled=True, session_factory=session_factory)
+
+
+@pytest.fixture
+def human_game(db_session):
+    """In-progress game between two users"""
+    return GameService.create_game(db_session, player1_id=1, player2_id=2)
+
+
+def saved_game(db_session, game_id):
+    """Read a game as the database has it"""
+    db_session.expire_all()
+    return db_session.get(Game, game_id)
+
+
+class TestLiveGameStore:
+    """Test moves played in memory"""
+
+    @pytest.mark.asyncio
+    async def test_move_is_applied_in_memory(
+        self, store, session_factory, db_session, human_game
+    ):
+        """Test a move updates memory first and the database on flush"""
+        async with session_factory() as db:
+            game, message, events = await store.make_move(db, human_game.id, 1, 4)
+
+        assert message == "Move successful"
+        assert isinstance(game, LiveGame)
+        assert Board.from_code(game.board_code).cell(4) == "X"
+        assert game.current_turn == "O"
+        assert [(e.seq, e.position, e.mark) for e in events] == [(1, 4, "X")]
+        assert saved_game(db_session, human_game.id).total_moves == 0
+
+        assert await store.flush()
+
+        saved = saved_game(db_session, human_game.id)
+        assert saved.board_code == game.board_code
+        assert saved.current_turn == "O"
+        assert saved.total_moves == 1
+        assert store.get(human_game.id) is game
+
+    @pytest.mark.asyncio
+    async def test_move_log_is_written_on_flush(
+        self, store, session_factory, db_session, human_game
+    ):
+        """Test logged moves are readable before and after they are saved"""
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 1, 4)
+            await store.make_move(db, human_game.id, 2, 0)
+
+            pending = await store.get_moves(db, human_game.id)
+            assert [(m.seq, m.position, m.mark) for m in pending] == [
+                (1, 4, "X"),
+                (2, 0, "O"),
+            ]
+            assert GameService.get_moves(db_session, human_game.id) == []
+
+            assert await store.flush()
+            saved = await store.get_moves(db, human_game.id)
+
+        assert [(m.seq, m.position, m.mark) for m in saved] == [
+            (1, 4, "X"),
+            (2, 0, "O"),
+        ]
+        assert all(m.created_at is not None for m in saved)
+
+    @pytest.mark.asyncio
+    async def test_moves_are_validated(self, store, session_factory, human_game):
+        """Test the usual move rules apply to live games"""
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 1, 0)
+
+            assert await store.make_move(db, human_game.id, 1, 1) == (
+                None,
+                "Not your turn",
+                [],
+            )
+            assert await store.make_move(db, human_game.id, 2, 0) == (
+                None,
+                "Invalid move",
+                [],
+            )
+            assert await store.make_move(db, 999, 1, 0) == (
+                None,
+                "Game not found",
+                [],
+            )
+
+    @pytest.mark.asyncio
+    async def test_waiting_game_is_not_held(self, store, session_factory, db_session):
+        """Test only in-progress games are taken into memory"""
+        game = GameService.create_game(db_session, player1_id=1)
+
+        async with session_factory() as db:
+            result = await store.make_move(db, game.id, 1, 0)
+
+        assert result == (None, "Game is not in progress", [])
+        assert store.get(game.id) is None
+
+    @pytest.mark.asyncio
+    async def test_failed_moves_leave_no_lock(self, store, session_factory, db_session):
+        """Test games that aren't held don't leave a lock behind"""
+        game = GameService.create_game(db_session, player1_id=1)
+
+        async with session_factory() as db:
+            await store.make_move(db, game.id, 1, 0)
+            await store.make_move(db, 999, 1, 0)
+
+        assert store._locks == {}
+
+    @pytest.mark.asyncio
+    async def test_ai_reply(self, store, session_factory, db_session):
+        """Test the AI reply is played in memory too"""
+        game = GameService.create_game(
+            db_session, player1_id=1, player2_type=PlayerType.AI
+        )
+
+        with patch(
+            "app.services.live_game_store.ai_worker_pool.get_move",
+            AsyncMock(return_value=8),
+        ):
+            async with session_factory() as db:
+                live, message, events = await store.make_move(db, game.id, 1, 0)
+
+        assert message == "AI move successful"
+        assert [(e.seq, e.position, e.mark) for e in events] == [
+            (1, 0, "X"),
+            (2, 8, "O"),
+        ]
+        assert live.current_turn == "X"
+
+    @pytest.mark.asyncio
+    async def test_finished_game_is_saved_and_released(
+        self, store, session_factory, db_session, human_game
+    ):
+        """Test the final result and stats are written, then memory is freed"""
+        async with session_factory() as db:
+            for user_id, position in [(1, 0), (2, 3), (1, 1), (2, 4), (1, 2)]:
+                game, _, events = await store.make_move(
+                    db, human_game.id, user_id, position
+                )
+
+        assert game.status == GameStatus.COMPLETED
+        assert events[-1].winner_id == 1
+
+        assert await store.flush()
+
+        saved = saved_game(db_session, human_game.id)
+        assert saved.status == GameStatus.COMPLETED
+        assert saved.winner_id == 1
+        assert saved.completed_at is not None
+        stats = {s.user_id: s for s in db_session.query(UserStats).all()}
+        assert stats[1].games_won == 1
+        assert stats[2].games_lost == 1
+        assert store.get(human_game.id) is None
+
+    @pytest.mark.asyncio
+    async def test_stats_listener(self, store, session_factory, human_game):
+        """Test the listener hears about players once their stats are saved"""
+        store.stats_listener = AsyncMock()
+        async with session_factory() as db:
+            for user_id, position in [(1, 0), (2, 3), (1, 1), (2, 4)]:
+                await store.make_move(db, human_game.id, user_id, position)
+            await store.flush()
+            store.stats_listener.assert_not_called()
+
+            await store.make_move(db, human_game.id, 1, 2)
+        await store.flush()
+
+        store.stats_listener.assert_awaited_once()
+        assert store.stats_listener.call_args.args[1] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_finished_listener(self, store, session_factory, human_game):
+        """Test the listener hears of finished games once they are saved"""
+        store.finished_listener = AsyncMock()
+        async with session_factory() as db:
+            for user_id, position in [(1, 0), (2, 3), (1, 1), (2, 4), (1, 2)]:
+                await store.make_move(db, human_game.id, user_id, position)
+        store.finished_listener.assert_not_called()
+
+        await store.flush()
+
+        store.finished_listener.assert_awaited_once_with([human_game.id])
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_games_queued(
+        self, store, session_factory, db_session, human_game
+    ):
+        """Test games stay unsaved when the database write fails"""
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 1, 4)
+
+        store.session_factory = Mock(side_effect=ConnectionError("down"))
+        assert not await store.flush()
+        assert list(store._unsaved) == [human_game.id]
+
+        store.session_factory = session_factory
+        assert await store.flush()
+        assert saved_game(db_session, human_game.id).total_moves == 1
+        assert len(GameService.get_moves(db_session, human_game.id)) == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_conflict_replays_moves(
+        self, store, session_factory, db_session, human_game
+    ):
+        """Test moves still valid on another writer's row are saved on top"""
+        store.conflict_listener = AsyncMock()
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 1, 4)
+        # Another writer touches the row without playing
+        db_session.execute(
+            update(Game)
+            .where(Game.id == human_game.id)
+            .values(version=Game.version + 1)
+        )
+        db_session.commit()
+
+        assert await store.flush()
+
+        saved = saved_game(db_session, human_game.id)
+        assert Board.from_code(saved.board_code).cell(4) == "X"
+        assert [m.seq for m in GameService.get_moves(db_session, saved.id)] == [1]
+        assert store.get(human_game.id).version == saved.version
+        store.conflict_listener.assert_awaited_once_with([human_game.id])
+
+        # Later flushes still match the row
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 2, 0)
+        assert await store.flush()
+        assert saved_game(db_session, human_game.id).total_moves == 2
+
+    @pytest.mark.asyncio
+    async def test_flush_conflict_keeps_other_write(
+        self, store, session_factory, db_session, human_game
+    ):
+        """Test moves another writer made invalid are dropped, and their
+        players told to fetch the game again"""
+        store.conflict_listener = AsyncMock()
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 1, 4)
+        # Another process plays the same turn straight against the database
+        GameService.make_move(db_session, human_game.id, 1, 0)
+
+        assert await store.flush()
+        store.conflict_listener.assert_awaited_once_with([human_game.id])
+
+        saved = saved_game(db_session, human_game.id)
+        assert Board.from_code(saved.board_code).cell(0) == "X"
+        assert Board.from_code(saved.board_code).is_empty(4)
+        assert [m.position for m in GameService.get_moves(db_session, saved.id)] == [0]
+        assert store.get(human_game.id) is None
+        assert not store._unsaved
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("other_moves", [[], [8]])
+    async def test_rebase_replays_later_moves(
+        self, store, session_factory, human_game, other_moves
+    ):
+        """Test moves made while a rebased game was written are replayed on
+        the saved state, or dropped if they no longer apply"""
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 1, 4)
+            # The flush takes X's move; O plays while it is written
+            store._moves.pop(human_game.id)
+            store._unsaved.pop(human_game.id)
+            await store.make_move(db, human_game.id, 2, 0)
+        # What was saved on top of the other writer, who may have played O
+        board = Board().play(4, "X")
+        for position in other_moves:
+            board = board.play(position, "O")
+        saved = dataclasses.replace(
+            store.get(human_game.id),
+            board_code=board.code,
+            current_turn="O" if not other_moves else "X",
+            total_moves=1 + len(other_moves),
+            version=5,
+        )
+
+        assert store._rebase(saved) is False
+
+        live = store.get(human_game.id)
+        assert live.version == 6
+        if other_moves:
+            assert live.board_code == board.code
+            assert human_game.id not in store._unsaved
+        else:
+            assert live.board_code == board.play(0, "O").code
+            assert [m["seq"] for m in store._moves[human_game.id]] == [2]
+            assert human_game.id in store._unsaved
+
+    @pytest.mark.asyncio
+    async def test_flush_bumps_version(
+        self, store, session_factory, db_session, human_game
+    ):
+        """Test later flushes of a held game still match its row"""
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 1, 4)
+            assert await store.flush()
+            await store.make_move(db, human_game.id, 2, 0)
+            assert await store.flush()
+
+        saved = saved_game(db_session, human_game.id)
+        assert saved.total_moves == 2
+        assert saved.version == store.get(human_game.id).version
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_early(
+        self, session_factory, db_session, human_game
+    ):
+        """Test reaching the batch size writes without waiting"""
+        store = LiveGameStore(
+            enabled=True, session_factory=session_factory, batch_size=1
+        )
+
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 1, 4)
+        await next(iter(store._early_flushes))
+
+        assert saved_game(db_session, human_game.id).total_moves == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_saves_everything(
+        self, store, session_factory, db_session, human_game
+    ):
+        """Test shutdown writes remaining moves"""
+        await store.start()
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 1, 4)
+
+        await store.stop()
+
+        assert saved_game(db_session, human_game.id).total_moves == 1
+
+    @pytest.mark.asyncio
+    async def test_evict_idle(self, session_factory, human_game):
+        """Test saved games are released once idle, unsaved ones are kept"""
+        store = LiveGameStore(
+            enabled=True, session_factory=session_factory, idle_timeout=0
+        )
+        async with session_factory() as db:
+            await store.make_move(db, human_game.id, 1, 4)
+
+        store.evict_idle()
+        assert store.get(human_game.id) is not None
+
+        await store.flush()
+        store.evict_idle()
+        assert store.get(human_game.id) is None
+
+    @pytest.mark.asyncio
+    async def test_get_game_prefers_memory(self, store, session_factory, human_game):
+        """Test reads see moves that aren't saved yet"""
+        async with session_factory() as db:
+            assert (await store.get_game(db, human_game.id)).total_moves == 0
+            await store.make_move(db, human_game.id, 1, 4)
+            assert (await store.get_game(db, human_game.id)).total_moves == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_store_uses_database(
+        self, session_factory, db_session, human_game
+    ):
+        """Test a disabled store plays moves straight against the database"""
+        store = LiveGameStore(enabled=False, session_factory=session_factory)
+
+        async with session_factory() as db:
+            game, message, _ = await store.make_move(db, human_game.id, 1, 4)
+        await store.start()
+
+        assert isinstance(game, Game)
+        assert message == "Move successful"
+        assert store.get(human_game.id) is None
+        assert store._flusher is None
+        assert saved_game(db_session, human_game.id).total_moves == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_store_saves_ai_reply_with_move(
+        self, session_factory, db_session
+    ):
+        """Test a move and the AI reply are saved together, and the move
+        alone if the reply fails"""
+        store = LiveGameStore(enabled=False, session_factory=session_factory)
+        game = GameService.create_game(
+            db_session, player1_id=1, player2_type=PlayerType.AI
+        )
+
+        with patch(
+            "app.services.game_service.ai_worker_pool.get_move",
+            AsyncMock(side_effect=[8, RuntimeError("pool down")]),
+        ):
+            async with session_factory() as db:
+                _, message, events = await store.make_move(db, game.id, 1, 0)
+            assert message == "AI move successful"
+            assert len(events) == 2
+            assert saved_game(db_session, game.id).total_moves == 2
+
+            with pytest.raises(RuntimeError):
+                async with session_factory() as db:
+                    await store.make_move(db, game.id, 1, 4)
+
+        assert saved_game(db_session, game.id).total_moves == 3
+        assert len(GameService.get_moves(db_session, game.id)) == 3
@@ -0,0 +1,39 @@
+from app.services.metrics_service import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Test in-process metrics registry"""
+
+    def test_counters(self):
+        """Test counters accumulate"""
+        registry = MetricsRegistry()
+        registry.increment("requests")
+        registry.increment("requests", 4)
+        assert registry.snapshot()["counters"] == {"requests": 5}
+
+    def test_gauges(self):
+        """Test set and live gauges"""
+        registry = MetricsRegistry()
+        registry.set_gauge("queue_depth", 3)
+        registry.register_gauge("in_use", lambda: 7)
+        assert registry.snapshot()["gauges"] == {"queue_depth": 3, "in_use": 7}
+
+    def test_timers(self):
+        """Test timers keep count, total and max"""
+        registry = MetricsRegistry()
+        registry.observe("wait", 0.5)
+        registry.observe("wait", 0.25)
+        timer = registry.snapshot()["timers"]["wait"]
+        assert timer == {"count": 2, "total_seconds": 0.75, "max_seconds": 0.5}
+
+    def test_reset_keeps_live_gauges(self):
+        """Test reset clears recorded values only"""
+        registry = MetricsRegistry()
+        registry.increment("requests")
+        registry.observe("wait", 1.0)
+        registry.register_gauge("in_use", lambda: 1)
+        registry.reset()
+        snapshot = registry.snapshot()
+        assert snapshot["counters"] == {}
+        assert snapshot["timers"] == {}
+        assert snapshot["gauges"] == {"in_use": 1}
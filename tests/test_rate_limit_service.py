@@ -0,0 +1,138 @@
+import time
+from unittest.mock import AsyncMock
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from redis.exceptions import RedisError
+
+from app.services.metrics_service import metrics
+from app.services.rate_limit_service import (
+    RateLimit,
+    RateLimiter,
+    RateLimitMiddleware,
+)
+from app.services.redis_service import RedisManager
+
+
+class FakeRateLimitRedis:
+    """Sliding-window log like the Redis script, kept in memory"""
+
+    def __init__(self):
+        self.requests: dict[str, list[float]] = {}
+
+    async def hit_rate_limit(self, key, limit, window_seconds):
+        now = time.monotonic()
+        log = [t for t in self.requests.get(key, []) if t > now - window_seconds]
+        self.requests[key] = log
+        if len(log) < limit:
+            log.append(now)
+            return True, 0.0
+        return False, log[0] + window_seconds - now
+
+
+@pytest.fixture
+def limiter():
+    """Rate limiter counting in memory"""
+    return RateLimiter(redis_manager=FakeRateLimitRedis(), enabled=True)
+
+
+def rejected(action):
+    """Requests turned away for action so far"""
+    return metrics.snapshot()["counters"].get(f"rate_limit.{action}.rejected", 0)
+
+
+class TestRateLimiter:
+    """Test counting requests against limits"""
+
+    def test_parse(self):
+        """Test limits are read as requests per seconds"""
+        assert RateLimit.parse("10/60") == RateLimit(10, 60.0)
+
+    @pytest.mark.asyncio
+    async def test_limit_is_per_client(self, limiter):
+        """Test requests beyond the limit wait, other clients don't"""
+        limit = RateLimit(2, 60)
+        before = rejected("test")
+
+        assert await limiter.hit("test", 1, limit) is None
+        assert await limiter.hit("test", 1, limit) is None
+        retry_after = await limiter.hit("test", 1, limit)
+        assert 59 < retry_after <= 60
+        assert await limiter.hit("test", 2, limit) is None
+        assert rejected("test") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_window_slides(self, limiter):
+        """Test requests are allowed again once old ones leave the window"""
+        limit = RateLimit(1, 0.05)
+        assert await limiter.hit("test", 1, limit) is None
+        assert await limiter.hit("test", 1, limit) is not None
+
+        time.sleep(0.06)
+        assert await limiter.hit("test", 1, limit) is None
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, limiter):
+        """Test a disabled limiter, or one without Redis, allows everything"""
+        limiter.enabled = False
+        for _ in range(3):
+            assert await limiter.hit("test", 1, RateLimit(1, 60)) is None
+
+        assert await RateLimiter(enabled=True).hit("test", 1, RateLimit(0, 60)) is None
+
+    @pytest.mark.asyncio
+    async def test_redis_down_allows_requests(self):
+        """Test requests are let through while Redis is unavailable"""
+        redis_manager = AsyncMock()
+        redis_manager.hit_rate_limit.side_effect = RedisError("down")
+        limiter = RateLimiter(redis_manager=redis_manager, enabled=True)
+        errors = metrics.snapshot()["counters"].get("rate_limit.errors", 0)
+
+        assert await limiter.hit("test", 1, RateLimit(0, 60)) is None
+        assert metrics.snapshot()["counters"]["rate_limit.errors"] == errors + 1
+
+
+class TestRateLimitMiddleware:
+    """Test which requests the middleware limits"""
+
+    def test_limited_routes(self):
+        """Test sign-in, game creation and moves are limited by IP"""
+        action = RateLimitMiddleware._action
+        assert action("POST", "/api/auth/login") == "login"
+        assert action("POST", "/api/auth/register") == "register"
+        assert action("POST", "/api/games/") == "create_game"
+        assert action("POST", "/api/games/12/move") == "move"
+        assert action("GET", "/api/games/") is None
+        assert action("POST", "/api/games/12/join") is None
+
+
+@pytest_asyncio.fixture
+async def redis_manager():
+    """Redis manager on an in-memory Redis that runs Lua scripts"""
+    manager = RedisManager()
+    manager.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield manager
+    await manager.redis.aclose()
+
+
+class TestRateLimitScript:
+    """Test the sliding-window script itself"""
+
+    @pytest.mark.asyncio
+    async def test_window(self, redis_manager):
+        """Test requests within the limit pass and the next one waits"""
+        assert await redis_manager.hit_rate_limit("rl:test", 2, 60) == (True, 0.0)
+        assert await redis_manager.hit_rate_limit("rl:test", 2, 60) == (True, 0.0)
+
+        allowed, retry_after = await redis_manager.hit_rate_limit("rl:test", 2, 60)
+
+        assert not allowed
+        assert 59 < retry_after <= 60
+        assert await redis_manager.redis.zcard("rl:test") == 2
+        assert 0 < await redis_manager.redis.pttl("rl:test") <= 60_000
+
+    @pytest.mark.asyncio
+    async def test_zero_limit(self, redis_manager):
+        """Test a limit of zero turns every request away for a whole window"""
+        assert await redis_manager.hit_rate_limit("rl:none", 0, 30) == (False, 30.0)
@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
 import pytest_asyncio
@@ -33,6 +33,15 @@ class TestRedisIntegration:
             manager.redis = mock_client
             yield manager
 
+    @pytest.fixture
+    def pipe(self, redis_manager):
+        """Pipeline the manager's commands are queued on"""
+        pipe = MagicMock()
+        pipe.__aenter__.return_value = pipe
+        pipe.execute = AsyncMock()
+        redis_manager.redis.pipeline = Mock(return_value=pipe)
+        return pipe
+
     @pytest_asyncio.fixture
     async def websocket_manager(self, redis_manager):
         """Create WebSocket manager with Redis"""
@@ -58,16 +67,18 @@ class TestRedisIntegration:
         assert result == user_data
 
     @pytest.mark.asyncio
-    async def test_websocket_connection_tracking(self, redis_manager):
+    async def test_websocket_connection_tracking(self, redis_manager, pipe):
         """Test WebSocket connection tracking in Redis"""
         user_id = 1
         connection_id = "conn_123"
 
-        # Test adding connection
+        # Test adding connection, in one transaction
         await redis_manager.add_user_connection(user_id, connection_id)
 
-        redis_manager.redis.sadd.assert_called_with("connections:1", connection_id)
-        redis_manager.redis.expire.assert_called_with("connections:1", 3600)
+        redis_manager.redis.pipeline.assert_called_once_with(transaction=True)
+        pipe.sadd.assert_called_with("connections:1", connection_id)
+        pipe.expire.assert_called_with("connections:1", 3600)
+        pipe.execute.assert_awaited_once()
 
         # Test getting connections
         redis_manager.redis.smembers.return_value = {connection_id}
@@ -76,16 +87,18 @@ class TestRedisIntegration:
         assert connections == {connection_id}
 
     @pytest.mark.asyncio
-    async def test_game_observers_tracking(self, redis_manager):
+    async def test_game_observers_tracking(self, redis_manager, pipe):
         """Test game observers tracking in Redis"""
         game_id = 1
         user_id = 2
 
-        # Test adding observer
+        # Test adding observer, in one transaction
         await redis_manager.add_game_observer(game_id, user_id)
 
-        redis_manager.redis.sadd.assert_called_with("game_observers:1", "2")
-        redis_manager.redis.expire.assert_called_with("game_observers:1", 86400)
+        redis_manager.redis.pipeline.assert_called_once_with(transaction=True)
+        pipe.sadd.assert_called_with("game_observers:1", "2")
+        pipe.expire.assert_called_with("game_observers:1", 86400)
+        pipe.execute.assert_awaited_once()
 
         # Test getting observers
         redis_manager.redis.smembers.return_value = {"2", "3"}
@@ -93,63 +106,154 @@ class TestRedisIntegration:
 
         assert observers == {2, 3}
 
+    @pytest.mark.asyncio
+    async def test_bulk_reads(self, redis_manager, pipe):
+        """Test the observers of many games come in one round trip"""
+        pipe.execute.return_value = [{"2", "3"}, set()]
+        observers = await redis_manager.get_game_observers_many([1, 5])
+
+        assert observers == {1: {2, 3}, 5: set()}
+        redis_manager.redis.pipeline.assert_called_once_with(transaction=False)
+        assert [c.args for c in pipe.smembers.call_args_list] == [
+            ("game_observers:1",),
+            ("game_observers:5",),
+        ]
+
+        # Nothing to read, nothing sent
+        assert await redis_manager.get_game_observers_many([]) == {}
+        assert pipe.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_bulk_connection_reads(self, redis_manager, pipe):
+        """Test the connections of many users come in one round trip"""
+        pipe.execute.return_value = [{"conn_1", "conn_2"}, set()]
+
+        connections = await redis_manager.get_user_connections_many([4, 6])
+
+        assert connections == {4: {"conn_1", "conn_2"}, 6: set()}
+        redis_manager.redis.pipeline.assert_called_once_with(transaction=False)
+        assert [c.args for c in pipe.smembers.call_args_list] == [
+            ("connections:4",),
+            ("connections:6",),
+        ]
+        assert await redis_manager.get_user_connections_many([]) == {}
+        pipe.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_publish_many(self, redis_manager, pipe):
+        """Test several messages are published in one round trip"""
+        pipe.execute.return_value = [1, 0]
+
+        received = await redis_manager.publish_many([("a", "1"), ("b", "2")])
+
+        assert received == [1, 0]
+        assert [c.args for c in pipe.publish.call_args_list] == [("a", "1"), ("b", "2")]
+        assert await redis_manager.publish_many([]) == []
+
     @pytest.mark.asyncio
     async def test_rate_limiting(self, redis_manager):
-        """Test rate limiting functionality"""
-        user_id = 1
-        action = "make_move"
+        """Test rate limits are checked in one script call"""
+        script = AsyncMock(return_value=[1, 0])
+        redis_manager.redis.register_script = Mock(return_value=script)
 
-        # Test first request (should be allowed)
-        redis_manager.redis.get.return_value = None
+        # Request within the limit
         result = await redis_manager.check_rate_limit(
-            user_id, action, limit=5, window_seconds=60
+            1, "make_move", limit=5, window_seconds=60
         )
 
         assert result is True
-        redis_manager.redis.setex.assert_called_with("rate_limit:1:make_move", 60, 1)
+        kwargs = script.call_args.kwargs
+        assert kwargs["keys"] == ["rate_limit:1:make_move"]
+        assert kwargs["args"][:2] == [5, 60_000_000]
+
+        # Request exceeding the limit; the script is only registered once
+        script.return_value = [0, 2_500_000]
+        assert await redis_manager.hit_rate_limit("rate_limit:ip", 5, 60) == (
+            False,
+            2.5,
+        )
+        redis_manager.redis.register_script.assert_called_once()
 
-        # Test request within limit
-        redis_manager.redis.get.return_value = "3"
-        result = await redis_manager.check_rate_limit(
-            user_id, action, limit=5, window_seconds=60
+    @pytest.mark.asyncio
+    async def test_read_through_cache(self, redis_manager):
+        """Test the shared tier of the read-through caches"""
+        redis_manager.redis.set = AsyncMock()
+        await redis_manager.set_cached("cache:games:1", {"id": 1}, 2.5)
+        redis_manager.redis.set.assert_called_once_with(
+            "cache:games:1", '{"id": 1}', px=2500
         )
 
-        assert result is True
-        redis_manager.redis.incr.assert_called_with("rate_limit:1:make_move")
+        redis_manager.redis.get.return_value = '{"id": 1}'
+        assert await redis_manager.get_cached("cache:games:1") == {"id": 1}
+        redis_manager.redis.get.return_value = None
+        assert await redis_manager.get_cached("cache:games:2") is None
 
-        # Test request exceeding limit
-        redis_manager.redis.get.return_value = "5"
-        result = await redis_manager.check_rate_limit(
-            user_id, action, limit=5, window_seconds=60
-        )
+        await redis_manager.delete_cached()
+        redis_manager.redis.delete.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_read_through_cache_hash(self, redis_manager, pipe):
+        """Test the shared tier of a cache kept under one key"""
+        await redis_manager.set_cached_field("cache:lists", "50", [1], 5)
+        pipe.hset.assert_called_once_with("cache:lists", "50", "[1]")
+        pipe.pexpire.assert_called_once_with("cache:lists", 5000, nx=True)
+        pipe.execute.assert_awaited_once()
+
+        redis_manager.redis.hget = AsyncMock(return_value="[1]")
+        assert await redis_manager.get_cached_field("cache:lists", "50") == [1]
+        redis_manager.redis.hget.assert_awaited_once_with("cache:lists", "50")
 
-        assert result is False
+        redis_manager.redis.hdel = AsyncMock()
+        await redis_manager.delete_cached_fields("cache:lists", "50")
+        redis_manager.redis.hdel.assert_awaited_once_with("cache:lists", "50")
 
     @pytest.mark.asyncio
-    async def test_game_state_caching(self, redis_manager):
-        """Test game state caching"""
-        game_id = 1
-        game_data = {
-            "id": 1,
-            "board_state": '["X","","O","","","","","",""]',
-            "status": "in_progress",
-        }
+    async def test_publish(self, redis_manager):
+        """Test publishing a broadcast"""
+        redis_manager.redis.publish = AsyncMock(return_value=2)
 
-        # Test caching game state
-        await redis_manager.cache_game_state(game_id, game_data, 3600)
+        received = await redis_manager.publish("ws:lobby", '{"type": "ping"}')
 
-        redis_manager.redis.setex.assert_called_once()
-        call_args = redis_manager.redis.setex.call_args
-        assert call_args[0][0] == "game_state:1"
-        assert call_args[0][1] == 3600
+        assert received == 2
+        redis_manager.redis.publish.assert_called_once_with(
+            "ws:lobby", '{"type": "ping"}'
+        )
+
+    @pytest.mark.asyncio
+    async def test_leaderboard_commands(self, redis_manager, pipe):
+        """Test leaderboard updates go in one transaction and pages read back"""
+
+        await redis_manager.update_leaderboard({1: (5.0, {"user_id": 1})}, [2])
+
+        redis_manager.redis.pipeline.assert_called_once_with(transaction=True)
+        pipe.zadd.assert_called_once_with("leaderboard", {"1": 5.0})
+        pipe.hset.assert_called_once_with(
+            "leaderboard:entries", mapping={"1": '{"user_id": 1}'}
+        )
+        pipe.zrem.assert_called_once_with("leaderboard", "2")
+        pipe.hdel.assert_called_once_with("leaderboard:entries", "2")
+        pipe.execute.assert_awaited_once()
+
+        redis_manager.redis.zrevrange = AsyncMock(return_value=["1"])
+        redis_manager.redis.hmget = AsyncMock(return_value=['{"user_id": 1}'])
+        redis_manager.redis.zrevrank = AsyncMock(return_value=0)
+
+        assert await redis_manager.get_leaderboard_range(0, 9) == [{"user_id": 1}]
+        assert await redis_manager.get_leaderboard_rank(1) == 0
+        redis_manager.redis.zrevrange.assert_called_once_with("leaderboard", 0, 9)
+        redis_manager.redis.zrevrank.assert_called_once_with("leaderboard", "1")
+
+    @pytest.mark.asyncio
+    async def test_replace_leaderboard(self, redis_manager, pipe):
+        """Test a rebuild is written aside and renamed into place"""
 
-        # Test retrieving cached game state
-        redis_manager.redis.get.return_value = '{"id": 1, "board_state": "[\\"X\\",\\"\\",\\"O\\",\\"\\",\\"\\",\\"\\",\\"\\",\\"\\",\\"\\"]", "status": "in_progress"}'
-        result = await redis_manager.get_cached_game_state(game_id)
+        await redis_manager.replace_leaderboard({1: (5.0, {"user_id": 1})})
 
-        redis_manager.redis.get.assert_called_with("game_state:1")
-        assert result["id"] == 1
-        assert result["status"] == "in_progress"
+        pipe.zadd.assert_called_once_with("leaderboard:building", {"1": 5.0})
+        assert [c.args for c in pipe.rename.call_args_list] == [
+            ("leaderboard:building", "leaderboard"),
+            ("leaderboard:entries:building", "leaderboard:entries"),
+        ]
 
     @pytest.mark.asyncio
     async def test_websocket_manager_with_redis(self, websocket_manager, redis_manager):
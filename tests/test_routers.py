@@ -1,37 +1,87 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
 import pytest
+from fastapi import WebSocketDisconnect, status
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from redis.exceptions import RedisError
 
-from app.database.connection import Base, get_db
-from app.models.leaderboard import UserStats
+import main
+from app.database.connection import get_async_db
+from app.models.game import Game, GameStatus
+from app.models.leaderboard import LeaderboardEntry, LeaderboardResponse, UserStats
 from app.models.user import User
+from app.routers import auth, games, leaderboard, websocket
+from app.services import cache_service, user_service
+from app.services.cache_service import game_cache, games_list_cache, leaderboard_cache
+from app.services.game_service import MOVE_CONFLICT
+from app.services.live_game_store import LiveGame, LiveGameStore
+from app.services.rate_limit_service import (
+    IP_LIMITS,
+    TOO_MANY_REQUESTS,
+    USER_LIMITS,
+    USERNAME_LIMITS,
+    rate_limiter,
+)
+from app.services.user_service import UserCache
 from main import app
 
 
 @pytest.fixture
-def db_session():
-    """Create test database session"""
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(bind=engine)
-    local_session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    session = local_session()
-    yield session
-    session.close()
+def db_session(file_session):
+    """Sync session on the database the app uses"""
+    return file_session
+
+
+@pytest.fixture
+def live_store(session_factory):
+    """Live game store writing to the test database"""
+    store = LiveGameStore(enabled=True, session_factory=session_factory)
+    with (
+        patch.object(main, "live_game_store", store),
+        patch.object(games, "live_game_store", store),
+        patch.object(websocket, "live_game_store", store),
+        patch.object(cache_service, "live_game_store", store),
+    ):
+        yield store
+
+
+@pytest.fixture
+def user_cache(session_factory):
+    """User cache reading the test database"""
+    cache = UserCache(session_factory=session_factory)
+    with (
+        patch.object(auth, "user_cache", cache),
+        patch.object(websocket, "user_cache", cache),
+    ):
+        yield cache
 
 
 @pytest.fixture
-def client(db_session):
+def caches():
+    """Game and leaderboard caches, in memory only and empty for each test"""
+    module_caches = (game_cache, games_list_cache, leaderboard_cache)
+    with (
+        patch.object(game_cache, "bus", None),
+        patch.object(games_list_cache, "bus", None),
+        patch.object(leaderboard_cache, "bus", None),
+    ):
+        yield module_caches
+    for cache in module_caches:
+        cache.drop_local(None)
+
+
+@pytest.fixture
+def client(db_session, session_factory, live_store, user_cache, caches):
     """Create test client with database override"""
 
-    def override_get_db():
-        try:
-            yield db_session
-        except Exception:
-            pass
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
 
-    app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Tests that need limits turn them back on
+    with patch.object(rate_limiter, "enabled", False), TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
@@ -63,6 +113,20 @@ def sample_user(db_session):
     return user
 
 
+def register(client, username):
+    """Register a user and return their auth headers"""
+    response = client.post(
+        "/api/auth/register",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": "secret",
+        },
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
 class TestLeaderboardRouter:
     """Test leaderboard router endpoints"""
 
@@ -101,3 +165,448 @@ class TestLeaderboardRouter:
         """Test getting stats for non-existent user"""
         response = client.get("/api/leaderboard/user/999")
         assert response.status_code == 404
+
+
+class TestAuthRouter:
+    """Test authentication endpoints"""
+
+    def test_me_without_database(self, client, user_cache):
+        """Test an authenticated request needs no query for the user"""
+        headers = register(client, "ivy")
+        client.get("/api/auth/me", headers=headers)
+
+        with patch.object(user_cache, "session_factory") as session_factory:
+            response = client.get("/api/auth/me", headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["username"] == "ivy"
+        session_factory.assert_not_called()
+
+    def test_login_when_hashing_is_saturated(self, client):
+        """Test sign-ins get a 503 while the password pool is full"""
+        register(client, "kate")
+        with patch.object(user_service.password_hasher, "max_pending", 0):
+            response = client.post(
+                "/api/auth/login", json={"username": "kate", "password": "secret"}
+            )
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == "1"
+
+    def test_deactivated_user(self, client, user_cache, db_session):
+        """Test a deactivated user's token stops working"""
+        headers = register(client, "jack")
+        user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+        db_session.get(User, user_id).is_active = False
+        db_session.commit()
+
+        # Served from the cache until it is invalidated
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+        asyncio.run(user_cache.invalidate(user_id))
+
+        response = client.get("/api/auth/me", headers=headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_user_cannot_log_in(self, client, db_session):
+        """Test a deactivated user cannot get a new token"""
+        headers = register(client, "lena")
+        user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+        db_session.get(User, user_id).is_active = False
+        db_session.commit()
+
+        response = client.post(
+            "/api/auth/login", json={"username": "lena", "password": "secret"}
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.fixture
+def rate_limits():
+    """Rate limits answered by a mock of the Redis script"""
+    redis_manager = AsyncMock()
+    with (
+        patch.object(rate_limiter, "enabled", True),
+        patch.object(rate_limiter, "redis_manager", redis_manager),
+    ):
+        yield redis_manager.hit_rate_limit
+
+
+class TestRateLimits:
+    """Test rate limits on sign-in and play"""
+
+    def test_login_is_limited_by_ip(self, client, rate_limits):
+        """Test a client flooding the login route is turned away"""
+        # The first is within both limits; the second is over the IP's
+        rate_limits.side_effect = [(True, 0.0), (True, 0.0), (False, 12.3)]
+        credentials = {"username": "nobody", "password": "wrong"}
+
+        first = client.post("/api/auth/login", json=credentials)
+        second = client.post("/api/auth/login", json=credentials)
+
+        assert first.status_code == status.HTTP_401_UNAUTHORIZED
+        assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert second.headers["Retry-After"] == "13"
+        key, limit, window = rate_limits.call_args.args
+        assert key == "rate_limit:ip:login:testclient"
+        assert (limit, window) == (IP_LIMITS["login"].limit, 60)
+
+    def test_login_is_limited_by_username(self, client, rate_limits):
+        """Test guesses at one account are limited across addresses"""
+        # Allowed by IP, then over the username's limit
+        rate_limits.side_effect = [(True, 0.0), (False, 40.0)]
+
+        response = client.post(
+            "/api/auth/login", json={"username": "mia", "password": "guess"}
+        )
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.headers["Retry-After"] == "40"
+        key, limit, window = rate_limits.call_args.args
+        assert key == "rate_limit:username:login:mia"
+        assert (limit, window) == (
+            USERNAME_LIMITS["login"].limit,
+            USERNAME_LIMITS["login"].window,
+        )
+
+    def test_moves_are_limited_per_user(self, client, rate_limits):
+        """Test a player can't make moves faster than the limit"""
+        rate_limits.return_value = (True, 0.0)
+        headers = register(client, "liam")
+        # Allowed by IP, then over the player's limit
+        rate_limits.side_effect = [(True, 0.0), (False, 1.0)]
+
+        response = client.post(
+            "/api/games/999/move", json={"position": 0}, headers=headers
+        )
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.json()["detail"] == TOO_MANY_REQUESTS
+        user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+        key, limit, _ = rate_limits.call_args_list[-1].args
+        assert key == f"rate_limit:user:move:{user_id}"
+        assert limit == USER_LIMITS["move"].limit
+
+
+class TestRedisLeaderboardRouter:
+    """Test leaderboard endpoints served from Redis"""
+
+    def test_leaderboard_page(self, client):
+        """Test pages come from the sorted set"""
+        headers = register(client, "erin")
+        page = LeaderboardResponse(entries=[], total_users=0)
+        with patch.object(
+            leaderboard.get_redis_leaderboard(),
+            "get_leaderboard",
+            AsyncMock(return_value=page),
+        ) as get_page:
+            response = client.get("/api/leaderboard/?offset=20", headers=headers)
+
+        assert response.status_code == 200
+        get_page.assert_awaited_once_with(20, 20)
+
+    def test_leaderboard_falls_back_to_database(self, client, sample_user):
+        """Test the database answers while Redis is down"""
+        headers = register(client, "frank")
+        with patch.object(
+            leaderboard.get_redis_leaderboard(),
+            "get_leaderboard",
+            AsyncMock(side_effect=RedisError("down")),
+        ):
+            response = client.get("/api/leaderboard/", headers=headers)
+
+        assert response.status_code == 200
+        assert [e["username"] for e in response.json()["entries"]] == ["testuser"]
+
+    def test_my_rank(self, client):
+        """Test a ranked player's entry, an unranked player and Redis down"""
+        headers = register(client, "gina")
+        entry = LeaderboardEntry(
+            rank=3,
+            user_id=1,
+            username="gina",
+            games_played=5,
+            games_won=3,
+            games_lost=2,
+            games_drawn=0,
+            win_rate=0.6,
+            avg_moves_per_game=7.0,
+        )
+        redis_leaderboard = leaderboard.get_redis_leaderboard()
+
+        with patch.object(redis_leaderboard, "get_rank", AsyncMock(return_value=entry)):
+            response = client.get("/api/leaderboard/me/rank", headers=headers)
+        assert response.json()["rank"] == 3
+
+        with patch.object(redis_leaderboard, "get_rank", AsyncMock(return_value=None)):
+            response = client.get("/api/leaderboard/me/rank", headers=headers)
+        assert response.status_code == 404
+
+        with patch.object(
+            redis_leaderboard, "get_around", AsyncMock(side_effect=RedisError("down"))
+        ):
+            response = client.get("/api/leaderboard/me/around", headers=headers)
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def test_window_reads_period_buckets(self, client):
+        """Test weekly pages come from the database, not Redis"""
+        headers = register(client, "hank")
+        with patch.object(
+            leaderboard.get_redis_leaderboard(), "get_leaderboard", AsyncMock()
+        ) as get_page:
+            response = client.get("/api/leaderboard/?window=week", headers=headers)
+
+        assert response.status_code == 200
+        assert response.json() == {"entries": [], "total_users": 0}
+        get_page.assert_not_awaited()
+
+        response = client.get("/api/leaderboard/?window=year", headers=headers)
+        assert response.status_code == 422
+
+
+class TestGamesRouter:
+    """Test games router endpoints"""
+
+    def test_play_against_ai(self, client):
+        """Test creating an AI game and making a move"""
+        headers = register(client, "alice")
+
+        response = client.post(
+            "/api/games/", json={"player2_type": "ai"}, headers=headers
+        )
+        assert response.status_code == 200
+        game = response.json()
+        assert game["status"] == "in_progress"
+        assert game["board_state"] == [""] * 9
+
+        response = client.get("/api/games/", headers=headers)
+        assert response.status_code == 200
+        assert [g["id"] for g in response.json()] == [game["id"]]
+
+        manager = websocket.get_websocket_manager()
+        with patch.object(manager, "broadcast_to_games", AsyncMock()) as broadcast:
+            response = client.post(
+                f"/api/games/{game['id']}/move",
+                json={"position": 4},
+                headers=headers,
+            )
+        assert response.status_code == 200
+        game = response.json()
+        assert game["board_state"][4] == "X"
+        assert game["board_state"].count("O") == 1
+        assert game["total_moves"] == 2
+
+        # Observers get one event per move, the AI reply included, in one batch
+        broadcast.assert_awaited_once()
+        events = [message["data"] for message, _ in broadcast.call_args.args[0]]
+        assert events[0] == {
+            "game_id": game["id"],
+            "seq": 1,
+            "position": 4,
+            "mark": "X",
+            "status": "in_progress",
+            "winner_id": None,
+        }
+        assert events[1]["seq"] == 2
+        assert events[1]["mark"] == "O"
+        assert game["board_state"][events[1]["position"]] == "O"
+
+        response = client.get(f"/api/games/{game['id']}/moves", headers=headers)
+        assert response.status_code == 200
+        moves = response.json()
+        assert [(m["seq"], m["position"], m["mark"]) for m in moves] == [
+            (e["seq"], e["position"], e["mark"]) for e in events
+        ]
+
+    @pytest.mark.asyncio
+    async def test_load_game_snapshot(self, client, session_factory):
+        """Test WebSocket snapshots use the game response shape"""
+        headers = register(client, "carol")
+        response = client.post(
+            "/api/games/", json={"player2_type": "ai"}, headers=headers
+        )
+        game = response.json()
+
+        with patch.object(websocket, "AsyncSessionLocal", session_factory):
+            snapshot = await websocket.load_game_snapshot(game["id"])
+            missing = await websocket.load_game_snapshot(999)
+
+        assert snapshot == game
+        assert missing is None
+
+    def test_move_conflict(self, client, live_store):
+        """Test a move that keeps losing the race gets 409"""
+        headers = register(client, "dave")
+        with patch.object(
+            live_store, "make_move", AsyncMock(return_value=(None, MOVE_CONFLICT, []))
+        ):
+            response = client.post(
+                "/api/games/1/move", json={"position": 4}, headers=headers
+            )
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.json()["detail"] == MOVE_CONFLICT
+
+    def test_get_game_not_found(self, client):
+        """Test getting a missing game"""
+        headers = register(client, "bob")
+        response = client.get("/api/games/999", headers=headers)
+        assert response.status_code == 404
+        response = client.get("/api/games/999/moves", headers=headers)
+        assert response.status_code == 404
+
+
+class TestReadCaches:
+    """Test game, games-list and leaderboard reads are cached"""
+
+    def test_finished_games_are_cached(self, client, db_session, live_store):
+        """Test only games that can no longer change are kept"""
+        headers = register(client, "ivan")
+        db_session.add(Game(id=7, player1_id=1, status=GameStatus.COMPLETED))
+        db_session.add(Game(id=8, player1_id=1, status=GameStatus.WAITING))
+        db_session.commit()
+
+        with patch.object(
+            live_store, "get_game", wraps=live_store.get_game
+        ) as get_game:
+            for game_id in (7, 7, 8, 8):
+                response = client.get(f"/api/games/{game_id}", headers=headers)
+                assert response.status_code == 200
+
+        assert [c.args[1] for c in get_game.await_args_list] == [7, 8, 8]
+
+    def test_unsaved_finished_games_are_not_cached(
+        self, client, db_session, live_store
+    ):
+        """Test a game finished only in memory is read again until it is saved"""
+        headers = register(client, "lou")
+        game = Game(id=7, player1_id=1, status=GameStatus.COMPLETED)
+        db_session.add(game)
+        db_session.commit()
+        live_store._games[7] = LiveGame.from_game(game)
+
+        with patch.object(
+            live_store, "get_game", wraps=live_store.get_game
+        ) as get_game:
+            for _ in range(2):
+                client.get("/api/games/7", headers=headers)
+            live_store._forget(7)
+            for _ in range(2):
+                client.get("/api/games/7", headers=headers)
+
+        assert get_game.await_count == 3
+
+    def test_games_list_until_lobby_changes(self, client):
+        """Test the games list is read once until a game is announced"""
+        headers = register(client, "judy")
+        with patch.object(
+            games.AsyncGameService,
+            "get_active_games",
+            wraps=games.AsyncGameService.get_active_games,
+        ) as get_active_games:
+            assert client.get("/api/games/", headers=headers).json() == []
+            assert client.get("/api/games/", headers=headers).json() == []
+            assert get_active_games.await_count == 1
+
+            response = client.post(
+                "/api/games/", json={"player2_type": "ai"}, headers=headers
+            )
+            # Dropped once the debounced lobby diff goes out
+            asyncio.run(websocket.get_websocket_manager().flush_lobby())
+            response = client.get("/api/games/", headers=headers)
+
+        assert [g["id"] for g in response.json()] == [1]
+        assert get_active_games.await_count == 2
+
+    def test_leaderboard_pages_are_cached(self, client):
+        """Test each page is read once within the ttl"""
+        headers = register(client, "kate")
+        page = LeaderboardResponse(entries=[], total_users=0)
+        with patch.object(
+            leaderboard.get_redis_leaderboard(),
+            "get_leaderboard",
+            AsyncMock(return_value=page),
+        ) as get_page:
+            for offset in (0, 0, 20):
+                response = client.get(
+                    f"/api/leaderboard/?offset={offset}", headers=headers
+                )
+                assert response.status_code == 200
+
+        assert [c.args for c in get_page.await_args_list] == [(20, 0), (20, 20)]
+
+
+class TestWebSocketRouter:
+    """Test the WebSocket endpoint"""
+
+    @pytest.fixture
+    def ws_client(self, client, session_factory):
+        """Client whose WebSocket manager needs no Redis"""
+        manager = websocket.get_websocket_manager()
+        with (
+            patch.object(websocket, "AsyncSessionLocal", session_factory),
+            patch.multiple(
+                manager.redis_manager,
+                add_user_connection=AsyncMock(),
+                remove_user_connection=AsyncMock(),
+                add_game_observer=AsyncMock(),
+                get_game_observers=AsyncMock(return_value=set()),
+                get_game_observers_many=AsyncMock(
+                    side_effect=lambda game_ids: dict.fromkeys(game_ids, set())
+                ),
+            ),
+        ):
+            yield client
+
+    def register(self, client, username):
+        response = client.post(
+            "/api/auth/register",
+            json={
+                "username": username,
+                "email": f"{username}@example.com",
+                "password": "secret",
+            },
+        )
+        body = response.json()
+        return body["user"]["id"], body["access_token"]
+
+    def test_make_move_over_websocket(self, ws_client):
+        """Test an authenticated socket can play and gets an ack"""
+        user_id, token = self.register(ws_client, "dave")
+        game = ws_client.post(
+            "/api/games/",
+            json={"player2_type": "ai"},
+            headers={"Authorization": f"Bearer {token}"},
+        ).json()
+
+        with ws_client.websocket_connect(f"/ws/{user_id}?token={token}") as ws:
+            ws.send_json(
+                {
+                    "type": "make_move",
+                    "data": {"game_id": game["id"], "position": 0, "request_id": 1},
+                }
+            )
+            ack = ws.receive_json()
+
+        assert ack["type"] == "move_ack"
+        assert ack["data"]["ok"] is True
+        assert ack["data"]["request_id"] == 1
+        assert ack["data"]["game"]["board_state"][0] == "X"
+        assert ack["data"]["game"]["total_moves"] == 2
+
+    def test_token_must_match_user(self, ws_client):
+        """Test a token for another user is refused"""
+        user_id, token = self.register(ws_client, "erin")
+
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with ws_client.websocket_connect(f"/ws/{user_id + 1}?token={token}"):
+                pass
+        assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
+
+
+class TestMetricsEndpoint:
+    """Test metrics endpoint"""
+
+    def test_get_metrics(self, client):
+        """Test metrics are exposed"""
+        response = client.get("/api/metrics")
+        assert response.status_code == 200
+        assert set(response.json()) == {"counters", "gauges", "timers"}
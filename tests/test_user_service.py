@@ -1,13 +1,24 @@
 from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from jose import jwt
+from pydantic import TypeAdapter
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.database.connection import Base
-from app.models.user import UserCreate
-from app.services.user_service import UserService
+from app.models.user import User, UserCreate, UserResponse
+from app.services.cache_service import CacheBus, TwoTierCache
+from app.services.metrics_service import metrics
+from app.services.user_service import (
+    BCRYPT_ROUNDS,
+    AsyncUserService,
+    PasswordHasher,
+    PasswordHasherBusyError,
+    UserCache,
+    UserService,
+)
 
 
 @pytest.fixture
@@ -221,3 +232,189 @@ class TestUserService:
         user = UserService.get_user_from_token(db_session, token)
 
         assert user is None
+
+    def test_create_user_token(self, sample_user):
+        """Test tokens carry the user's id as well as their username"""
+        token = UserService.create_user_token(sample_user)
+
+        payload = UserService.decode_token(token)
+        assert payload["sub"] == "testuser"
+        assert payload["uid"] == sample_user.id
+        assert UserService.decode_token("invalid.jwt.token") is None
+
+    def test_deactivate_user(self, db_session, sample_user):
+        """Test deactivating a user, and a user that doesn't exist"""
+        user = UserService.deactivate_user(db_session, sample_user.id)
+
+        assert user.is_active is False
+        assert UserService.deactivate_user(db_session, 999) is None
+
+
+class TestPasswordHasher:
+    """Test password hashing on worker threads"""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify(self):
+        """Test hashes made on the pool verify, with the configured cost"""
+        hasher = PasswordHasher(max_workers=1)
+        try:
+            hashed = await hasher.hash("secret")
+
+            assert hashed.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+            assert await hasher.verify("secret", hashed)
+            assert not await hasher.verify("wrong", hashed)
+            assert hasher.pending == 0
+        finally:
+            hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_is_rejected(self):
+        """Test hashing beyond max_pending fails fast"""
+        hasher = PasswordHasher(max_pending=0)
+        rejected = metrics.snapshot()["counters"].get("auth.hash_rejected", 0)
+
+        with pytest.raises(PasswordHasherBusyError):
+            await hasher.hash("secret")
+
+        assert metrics.snapshot()["counters"]["auth.hash_rejected"] == rejected + 1
+        assert hasher._executor is None
+
+    @pytest.mark.asyncio
+    async def test_async_sign_in(self, session_factory):
+        """Test registering and signing in hash on the pool"""
+        async with session_factory() as db:
+            user = await AsyncUserService.create_user(
+                db, UserCreate(username="new", email="new@test.com", password="pw")
+            )
+            assert UserService.verify_password("pw", user.password_hash)
+
+            assert await AsyncUserService.authenticate_user(db, "new", "pw") == user
+            assert await AsyncUserService.authenticate_user(db, "new", "no") is None
+            assert await AsyncUserService.authenticate_user(db, "none", "pw") is None
+
+
+@pytest.fixture
+def file_session(file_session):
+    """Sync session on the file database, with one user"""
+    file_session.add(
+        User(id=1, username="player1", email="p1@test.com", password_hash="h")
+    )
+    file_session.commit()
+    return file_session
+
+
+@pytest.fixture
+def cache(session_factory):
+    """User cache without Redis"""
+    return UserCache(session_factory=session_factory)
+
+
+def token_for(user_id, username="player1"):
+    """Access token as issued at login"""
+    return UserService.create_access_token({"sub": username, "uid": user_id})
+
+
+class TestUserCache:
+    """Test resolving tokens to users without the database"""
+
+    @pytest.mark.asyncio
+    async def test_user_is_read_once(self, cache):
+        """Test only the first request for a user queries the database"""
+        with patch.object(
+            AsyncUserService, "get_user_by_id", wraps=AsyncUserService.get_user_by_id
+        ) as get_user:
+            first = await cache.get_user_from_token(token_for(1))
+            second = await cache.get_user_from_token(token_for(1))
+
+        assert first.username == "player1"
+        assert second is first
+        assert get_user.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_bad_tokens(self, cache):
+        """Test invalid tokens and unknown users are rejected"""
+        assert await cache.get_user_from_token("invalid.jwt.token") is None
+        assert await cache.get_user_from_token(token_for(999)) is None
+        assert (
+            await cache.get_user_from_token(
+                UserService.create_access_token({"other": "data"})
+            )
+            is None
+        )
+
+    @pytest.mark.asyncio
+    async def test_token_without_id(self, cache):
+        """Test tokens issued before the id claim still work"""
+        token = UserService.create_access_token({"sub": "player1"})
+
+        user = await cache.get_user_from_token(token)
+
+        assert user.id == 1
+        assert await cache.get(1) is user
+
+    @pytest.mark.asyncio
+    async def test_records_expire(self, cache, file_session):
+        """Test records are read again once they are older than the ttl"""
+        cache.cache.ttl = 0
+        await cache.get(1)
+        file_session.get(User, 1).username = "renamed"
+        file_session.commit()
+
+        assert (await cache.get(1)).username == "renamed"
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_is_dropped(self, cache, file_session):
+        """Test the cache keeps at most max_size records"""
+        file_session.add(
+            User(id=2, username="player2", email="p2@test.com", password_hash="h")
+        )
+        file_session.commit()
+        cache.cache.max_size = 1
+
+        await cache.get(1)
+        await cache.get(2)
+
+        assert list(cache.cache._entries) == ["2"]
+
+    @pytest.mark.asyncio
+    async def test_deactivated_user_is_rejected(self, cache, session_factory):
+        """Test deactivating a user stops their tokens straight away"""
+        token = token_for(1)
+        assert await cache.get_user_from_token(token) is not None
+
+        with patch("app.services.user_service.user_cache", cache):
+            async with session_factory() as db:
+                await AsyncUserService.deactivate_user(db, 1)
+
+        assert await cache.get_user_from_token(token) is None
+
+    @pytest.mark.asyncio
+    async def test_shared_through_redis(self, session_factory):
+        """Test records come from Redis before the database and are shared"""
+        bus = CacheBus()
+        bus.redis_manager = AsyncMock()
+        bus.redis_manager.get_cached.return_value = {
+            "id": 1,
+            "username": "from-redis",
+            "email": "p1@test.com",
+            "is_active": True,
+            "created_at": "2026-10-17T12:00:00",
+        }
+        users = TwoTierCache(
+            "users", TypeAdapter(UserResponse), max_size=10, ttl=30, bus=bus
+        )
+        cache = UserCache(users, session_factory=session_factory)
+        assert (await cache.get(1)).username == "from-redis"
+        bus.redis_manager.get_cached.assert_awaited_once_with("cache:users:1")
+
+        users.drop_local(None)
+        bus.redis_manager.get_cached.return_value = None
+        assert (await cache.get(1)).username == "player1"
+        bus.redis_manager.set_cached.assert_awaited_once()
+        assert bus.redis_manager.set_cached.call_args.args[0] == "cache:users:1"
+
+        # Every worker is told to drop the record
+        await cache.invalidate(1)
+        bus.redis_manager.delete_cached.assert_awaited_once_with("cache:users:1")
+        bus.redis_manager.publish.assert_awaited_once()
+        assert "1" not in users._entries
@@ -1,12 +1,20 @@
+import asyncio
 import json
-from unittest.mock import AsyncMock, Mock
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from fastapi import WebSocket
 
 from app.models.game import WebSocketMessage
+from app.services.metrics_service import metrics
 from app.services.redis_service import RedisManager
-from app.services.websocket_service import WebSocketManager
+from app.services.websocket_service import (
+    BROADCAST_CHANNEL,
+    GAME_CHANNEL_PREFIX,
+    LOBBY_CHANNEL,
+    SLOW_CONSUMER_CLOSE_CODE,
+    WebSocketManager,
+)
 
 
 @pytest.fixture
@@ -96,6 +104,7 @@ class TestWebSocketManager:
 
         # Send message
         await websocket_manager.send_personal_message(message, user_id)
+        await websocket_manager.drain()
 
         # Check that message was sent
         mock_websocket.send_text.assert_called_once_with(json.dumps(message))
@@ -125,6 +134,7 @@ class TestWebSocketManager:
 
         # Send message (should handle exception and disconnect)
         await websocket_manager.send_personal_message(message, user_id)
+        await websocket_manager.drain()
 
         # Check that user was disconnected
         assert user_id not in websocket_manager.user_connections
@@ -150,6 +160,7 @@ class TestWebSocketManager:
 
         # Broadcast to game
         await websocket_manager.broadcast_to_game(message, game_id)
+        await websocket_manager.drain()
 
         # Check Redis call
         mock_redis_manager.get_game_observers.assert_called_once_with(game_id)
@@ -172,6 +183,7 @@ class TestWebSocketManager:
 
         # Broadcast to all
         await websocket_manager.broadcast_to_all(message)
+        await websocket_manager.drain()
 
         # Check that all users received message
         mock_websocket.send_text.assert_called_with(json.dumps(message))
@@ -179,52 +191,56 @@ class TestWebSocketManager:
 
     @pytest.mark.asyncio
     async def test_handle_message_join_game(
-        self, websocket_manager, mock_redis_manager
+        self, websocket_manager, mock_redis_manager, mock_websocket
     ):
         """Test handling join game message"""
         user_id = 1
         message = WebSocketMessage(type="join_game", data={"game_id": 123})
 
-        await websocket_manager.handle_message(user_id, message)
+        connection_id = await websocket_manager.connect(mock_websocket, user_id)
+        await websocket_manager.handle_message(user_id, message, connection_id)
 
         # Check Redis call
         mock_redis_manager.add_game_observer.assert_called_once_with(123, user_id)
 
     @pytest.mark.asyncio
     async def test_handle_message_leave_game(
-        self, websocket_manager, mock_redis_manager
+        self, websocket_manager, mock_redis_manager, mock_websocket
     ):
         """Test handling leave game message"""
         user_id = 1
         message = WebSocketMessage(type="leave_game", data={"game_id": 123})
 
-        await websocket_manager.handle_message(user_id, message)
+        connection_id = await websocket_manager.connect(mock_websocket, user_id)
+        await websocket_manager.handle_message(user_id, message, connection_id)
 
         # Check Redis call
         mock_redis_manager.remove_game_observer.assert_called_once_with(123, user_id)
 
     @pytest.mark.asyncio
     async def test_handle_message_game_update(
-        self, websocket_manager, mock_redis_manager
+        self, websocket_manager, mock_redis_manager, mock_websocket
     ):
         """Test handling game update message"""
         user_id = 1
         game_data = {"game_id": 123, "board": ["X", "", "", "", "", "", "", "", ""]}
         message = WebSocketMessage(type="game_update", data=game_data)
 
-        await websocket_manager.handle_message(user_id, message)
+        connection_id = await websocket_manager.connect(mock_websocket, user_id)
+        await websocket_manager.handle_message(user_id, message, connection_id)
 
         # Check Redis call to get observers
         mock_redis_manager.get_game_observers.assert_called_once_with(123)
 
     @pytest.mark.asyncio
-    async def test_handle_message_unknown_type(self, websocket_manager):
+    async def test_handle_message_unknown_type(self, websocket_manager, mock_websocket):
         """Test handling unknown message type"""
         user_id = 1
         message = WebSocketMessage(type="unknown_type", data={})
 
         # Should not raise exception
-        await websocket_manager.handle_message(user_id, message)
+        connection_id = await websocket_manager.connect(mock_websocket, user_id)
+        await websocket_manager.handle_message(user_id, message, connection_id)
 
     @pytest.mark.asyncio
     async def test_notify_game_update(self, websocket_manager, mock_redis_manager):
@@ -241,12 +257,20 @@ class TestWebSocketManager:
     async def test_notify_games_list_update(self, websocket_manager, mock_websocket):
         """Test notifying games list update"""
         # Connect users
-        await websocket_manager.connect(mock_websocket, 1)
+        connection_id = await websocket_manager.connect(mock_websocket, 1)
+        await websocket_manager.handle_message(
+            1, WebSocketMessage(type="subscribe_lobby", data={}), connection_id
+        )
 
-        await websocket_manager.notify_games_list_update()
+        await websocket_manager.notify_games_list_update(5, {"id": 5})
+        await websocket_manager.flush_lobby()
+        await websocket_manager.drain()
 
         # Check that message was sent
-        expected_message = {"type": "games_list_update", "data": {}}
+        expected_message = {
+            "type": "games_list_update",
+            "data": {"updated": [{"id": 5}], "removed": []},
+        }
         mock_websocket.send_text.assert_called_with(json.dumps(expected_message))
 
     @pytest.mark.asyncio
@@ -284,3 +308,710 @@ class TestWebSocketManager:
 
         # Should not call Redis
         mock_redis_manager.get_game_observers.assert_not_called()
+
+
+class TestWebSocketFanout:
+    """Test cross-worker broadcast through Redis pub/sub"""
+
+    @pytest.fixture
+    def mock_pubsub(self, mock_redis_manager):
+        """Mock pub/sub client that never yields messages"""
+        pubsub = Mock()
+        pubsub.psubscribe = AsyncMock()
+        pubsub.subscribe = AsyncMock()
+        pubsub.aclose = AsyncMock()
+
+        async def listen():
+            await asyncio.Event().wait()
+            yield  # pragma: no cover
+
+        pubsub.listen = listen
+        mock_redis_manager.pubsub = Mock(return_value=pubsub)
+        mock_redis_manager.publish = AsyncMock(return_value=1)
+        return pubsub
+
+    @pytest.mark.asyncio
+    async def test_start_and_stop(self, websocket_manager, mock_pubsub):
+        """Test subscribing to broadcast channels"""
+        await websocket_manager.start()
+        assert websocket_manager.fanout_enabled
+
+        mock_pubsub.psubscribe.assert_called_once_with(f"{GAME_CHANNEL_PREFIX}*")
+        mock_pubsub.subscribe.assert_called_once_with(LOBBY_CHANNEL, BROADCAST_CHANNEL)
+
+        await websocket_manager.stop()
+        assert not websocket_manager.fanout_enabled
+        mock_pubsub.aclose.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_start_without_redis_stays_local(
+        self, websocket_manager, mock_pubsub, mock_websocket
+    ):
+        """Test broadcasts stay local when pub/sub is unavailable"""
+        mock_pubsub.psubscribe.side_effect = ConnectionError("refused")
+
+        await websocket_manager.start()
+        assert not websocket_manager.fanout_enabled
+
+        await websocket_manager.connect(mock_websocket, 1)
+        await websocket_manager.broadcast_to_all({"type": "ping", "data": {}})
+        await websocket_manager.drain()
+        mock_websocket.send_text.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_broadcasts_publish_when_enabled(
+        self, websocket_manager, mock_pubsub, mock_redis_manager, mock_websocket
+    ):
+        """Test broadcasts are published instead of sent directly"""
+        await websocket_manager.start()
+        await websocket_manager.connect(mock_websocket, 1)
+        message = {"type": "game_update", "data": {"game_id": 7}}
+
+        await websocket_manager.broadcast_to_game(message, 7)
+        await websocket_manager.broadcast_to_all(message)
+
+        mock_redis_manager.publish.assert_any_call(
+            f"{GAME_CHANNEL_PREFIX}7", json.dumps(message)
+        )
+        mock_redis_manager.publish.assert_any_call(
+            BROADCAST_CHANNEL, json.dumps(message)
+        )
+        mock_websocket.send_text.assert_not_called()
+
+        await websocket_manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_dispatch_delivers_locally(
+        self, websocket_manager, mock_redis_manager, mock_websocket
+    ):
+        """Test published messages reach local sockets"""
+        mock_redis_manager.get_game_observers_many = AsyncMock(
+            return_value={7: {1}, 8: set()}
+        )
+        await websocket_manager.connect(mock_websocket, 1)
+        message = json.dumps({"type": "game_update", "data": {"game_id": 7}})
+
+        # Every game in a batch has its observers read at once
+        await websocket_manager._dispatch(
+            [
+                (f"{GAME_CHANNEL_PREFIX}7", message),
+                (f"{GAME_CHANNEL_PREFIX}8", message),
+                (f"{GAME_CHANNEL_PREFIX}7", message),
+            ]
+        )
+        await websocket_manager.drain()
+        mock_redis_manager.get_game_observers_many.assert_awaited_once()
+        assert sorted(mock_redis_manager.get_game_observers_many.call_args.args[0]) == [
+            7,
+            8,
+        ]
+        assert mock_websocket.send_text.call_count == 2
+
+        await websocket_manager._dispatch([(BROADCAST_CHANNEL, message)])
+        await websocket_manager.drain()
+        assert mock_websocket.send_text.call_count == 3
+
+        # Lobby messages only reach users subscribed to the games list
+        await websocket_manager._dispatch([(LOBBY_CHANNEL, message)])
+        await websocket_manager.drain()
+        assert mock_websocket.send_text.call_count == 3
+
+        websocket_manager.lobby_subscribers.add(1)
+        await websocket_manager._dispatch([(LOBBY_CHANNEL, message)])
+        await websocket_manager.drain()
+        assert mock_websocket.send_text.call_count == 4
+        mock_redis_manager.get_game_observers_many.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_listener_batches_waiting_messages(
+        self, websocket_manager, mock_pubsub
+    ):
+        """Test messages already waiting are dispatched together"""
+        waiting = [
+            {"type": "pmessage", "channel": f"{GAME_CHANNEL_PREFIX}8", "data": "b"},
+            {"type": "message", "channel": LOBBY_CHANNEL, "data": "c"},
+            None,
+        ]
+
+        async def listen():
+            yield {
+                "type": "psubscribe",
+                "channel": f"{GAME_CHANNEL_PREFIX}*",
+                "data": 1,
+            }
+            yield {
+                "type": "pmessage",
+                "channel": f"{GAME_CHANNEL_PREFIX}7",
+                "data": "a",
+            }
+            await asyncio.Event().wait()
+
+        mock_pubsub.listen = listen
+        mock_pubsub.get_message = AsyncMock(side_effect=[None, *waiting])
+        dispatched = []
+        websocket_manager._dispatch = AsyncMock(side_effect=dispatched.append)
+
+        await websocket_manager.start()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        await websocket_manager.stop()
+
+        # Subscription confirmations are not dispatched
+        assert dispatched == [
+            [
+                (f"{GAME_CHANNEL_PREFIX}7", "a"),
+                (f"{GAME_CHANNEL_PREFIX}8", "b"),
+                (LOBBY_CHANNEL, "c"),
+            ],
+        ]
+
+
+class TestWebSocketBackpressure:
+    """Test per-connection send queues and the slow-consumer policy"""
+
+    @pytest.fixture
+    def stalled_websocket(self):
+        """WebSocket whose sends never complete"""
+        websocket = Mock(spec=WebSocket)
+        websocket.accept = AsyncMock()
+        websocket.close = AsyncMock()
+
+        async def send_text(payload):
+            await asyncio.Event().wait()
+
+        websocket.send_text = AsyncMock(side_effect=send_text)
+        return websocket
+
+    @pytest.mark.asyncio
+    async def test_broadcast_serializes_once(self, websocket_manager):
+        """Test a broadcast is encoded once for every recipient"""
+        sockets = []
+        for user_id in range(1, 4):
+            websocket = Mock(spec=WebSocket)
+            websocket.accept = AsyncMock()
+            websocket.send_text = AsyncMock()
+            sockets.append(websocket)
+            await websocket_manager.connect(websocket, user_id)
+        message = {"type": "games_list_update", "data": {}}
+
+        with patch(
+            "app.services.websocket_service.json.dumps", wraps=json.dumps
+        ) as dumps:
+            await websocket_manager.broadcast_to_all(message)
+        await websocket_manager.drain()
+
+        dumps.assert_called_once_with(message)
+        for websocket in sockets:
+            websocket.send_text.assert_called_once_with(json.dumps(message))
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_does_not_block_others(
+        self, websocket_manager, stalled_websocket, mock_websocket
+    ):
+        """Test a stalled socket doesn't delay delivery to other users"""
+        delivered = asyncio.Event()
+        mock_websocket.send_text.side_effect = lambda payload: delivered.set()
+        await websocket_manager.connect(stalled_websocket, 1)
+        await websocket_manager.connect(mock_websocket, 2)
+
+        await websocket_manager.broadcast_to_all({"type": "ping", "data": {}})
+
+        await asyncio.wait_for(delivered.wait(), timeout=1)
+        stalled_websocket.send_text.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_is_disconnected(
+        self, mock_redis_manager, stalled_websocket
+    ):
+        """Test a consumer with a full queue is disconnected"""
+        manager = WebSocketManager(mock_redis_manager, send_queue_size=1)
+        await manager.connect(stalled_websocket, 1)
+        before = metrics.snapshot()["counters"].get("ws.slow_consumer_disconnects", 0)
+
+        # First message is in flight, second fills the queue, third overflows
+        for _ in range(3):
+            await manager.send_personal_message({"type": "ping"}, 1)
+            await asyncio.sleep(0)
+        await asyncio.gather(*manager._closing)
+
+        assert 1 not in manager.user_connections
+        assert not manager._outboxes
+        stalled_websocket.close.assert_called_once_with(code=SLOW_CONSUMER_CLOSE_CODE)
+        mock_redis_manager.remove_user_connection.assert_called_once()
+        after = metrics.snapshot()["counters"]["ws.slow_consumer_disconnects"]
+        assert after == before + 1
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_drop_policy(
+        self, mock_redis_manager, stalled_websocket
+    ):
+        """Test the drop policy discards messages but keeps the connection"""
+        manager = WebSocketManager(
+            mock_redis_manager, send_queue_size=1, slow_consumer_policy="drop"
+        )
+        await manager.connect(stalled_websocket, 1)
+        before = metrics.snapshot()["counters"].get("ws.dropped_messages", 0)
+
+        for _ in range(4):
+            await manager.send_personal_message({"type": "ping"}, 1)
+            await asyncio.sleep(0)
+
+        assert 1 in manager.user_connections
+        stalled_websocket.close.assert_not_called()
+        after = metrics.snapshot()["counters"]["ws.dropped_messages"]
+        assert after == before + 2
+
+        await manager.disconnect(1)
+
+    @pytest.mark.asyncio
+    async def test_reconnect_replaces_writer(self, websocket_manager, mock_websocket):
+        """Test reconnecting closes the previous connection's queue"""
+        await websocket_manager.connect(mock_websocket, 1)
+        first_id = websocket_manager.user_connections[1]
+
+        websocket2 = Mock(spec=WebSocket)
+        websocket2.accept = AsyncMock()
+        websocket2.send_text = AsyncMock()
+        await websocket_manager.connect(websocket2, 1)
+
+        assert first_id not in websocket_manager.active_connections
+        assert list(websocket_manager._outboxes) == [
+            websocket_manager.user_connections[1]
+        ]
+
+        await websocket_manager.send_personal_message({"type": "ping"}, 1)
+        await websocket_manager.drain()
+        mock_websocket.send_text.assert_not_called()
+        websocket2.send_text.assert_called_once()
+
+
+class TestLobbySubscriptions:
+    """Test the opt-in games-list topic and its coalesced diffs"""
+
+    @pytest.fixture
+    def lobby_manager(self, mock_redis_manager):
+        """WebSocket manager with a short debounce window"""
+        return WebSocketManager(mock_redis_manager, lobby_debounce=0.01)
+
+    async def _connect(self, manager, user_id):
+        websocket = Mock(spec=WebSocket)
+        websocket.accept = AsyncMock()
+        websocket.send_text = AsyncMock()
+        await manager.connect(websocket, user_id)
+        return websocket
+
+    @pytest.mark.asyncio
+    async def test_subscribe_and_unsubscribe(self, lobby_manager):
+        """Test lobby subscription message types"""
+        await self._connect(lobby_manager, 1)
+
+        await lobby_manager.handle_message(
+            1,
+            WebSocketMessage(type="subscribe_lobby", data={}),
+            lobby_manager.user_connections[1],
+        )
+        assert lobby_manager.lobby_subscribers == {1}
+
+        await lobby_manager.handle_message(
+            1,
+            WebSocketMessage(type="unsubscribe_lobby", data={}),
+            lobby_manager.user_connections[1],
+        )
+        assert lobby_manager.lobby_subscribers == set()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_unsubscribes(self, lobby_manager):
+        """Test disconnecting leaves the lobby topic"""
+        await self._connect(lobby_manager, 1)
+        lobby_manager.lobby_subscribers.add(1)
+
+        await lobby_manager.disconnect(1)
+
+        assert 1 not in lobby_manager.lobby_subscribers
+
+    @pytest.mark.asyncio
+    async def test_changes_are_coalesced_into_one_diff(self, lobby_manager):
+        """Test a burst of changes becomes a single message for subscribers"""
+        subscriber = await self._connect(lobby_manager, 1)
+        idle = await self._connect(lobby_manager, 2)
+        lobby_manager.lobby_subscribers.add(1)
+
+        await lobby_manager.notify_games_list_update(1, {"id": 1, "status": "waiting"})
+        await lobby_manager.notify_games_list_update(2, {"id": 2, "status": "waiting"})
+        await lobby_manager.notify_games_list_update(
+            1, {"id": 1, "status": "in_progress"}
+        )
+        await lobby_manager.notify_games_list_update(3)
+        await asyncio.sleep(0.05)
+        await lobby_manager.drain()
+
+        subscriber.send_text.assert_called_once()
+        message = json.loads(subscriber.send_text.call_args.args[0])
+        assert message == {
+            "type": "games_list_update",
+            "data": {
+                "updated": [
+                    {"id": 1, "status": "in_progress"},
+                    {"id": 2, "status": "waiting"},
+                ],
+                "removed": [3],
+            },
+        }
+        idle.send_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_changes_are_reported_to_listener(self, lobby_manager):
+        """Test the games-list listener hears of a burst of changes once"""
+        lobby_manager.games_list_listener = AsyncMock()
+
+        await lobby_manager.notify_games_list_update(1, {"id": 1})
+        await lobby_manager.notify_games_list_update(2)
+        lobby_manager.games_list_listener.assert_not_awaited()
+
+        await asyncio.sleep(0.05)
+        assert lobby_manager.games_list_listener.await_count == 1
+        await lobby_manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_flush_without_changes_sends_nothing(self, lobby_manager):
+        """Test an empty diff isn't broadcast"""
+        subscriber = await self._connect(lobby_manager, 1)
+        lobby_manager.lobby_subscribers.add(1)
+
+        await lobby_manager.flush_lobby()
+        await lobby_manager.drain()
+
+        subscriber.send_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending_diff(self, mock_redis_manager):
+        """Test shutdown sends changes still waiting for the debounce window"""
+        manager = WebSocketManager(mock_redis_manager, lobby_debounce=60)
+        subscriber = await self._connect(manager, 1)
+        manager.lobby_subscribers.add(1)
+
+        await manager.notify_games_list_update(4)
+        await manager.stop()
+        await manager.drain()
+
+        subscriber.send_text.assert_called_once()
+
+
+class TestMoveEvents:
+    """Test move deltas and game snapshots"""
+
+    @pytest.fixture
+    def snapshot(self):
+        """Game state returned by the snapshot loader"""
+        return {"id": 7, "board_state": ["X"] + [""] * 8, "total_moves": 1}
+
+    @pytest.fixture
+    def snapshot_manager(self, websocket_manager, snapshot):
+        """WebSocket manager with a snapshot loader for game 7"""
+
+        async def load(game_id):
+            return snapshot if game_id == 7 else None
+
+        websocket_manager.snapshot_loader = AsyncMock(side_effect=load)
+        return websocket_manager
+
+    @pytest.mark.asyncio
+    async def test_notify_moves(self, websocket_manager, mock_redis_manager):
+        """Test a move event goes to the game's observers"""
+        mock_redis_manager.get_game_observers_many = AsyncMock(return_value={7: {1}})
+        websocket = Mock(spec=WebSocket)
+        websocket.accept = AsyncMock()
+        websocket.send_text = AsyncMock()
+        await websocket_manager.connect(websocket, 1)
+        event = {
+            "game_id": 7,
+            "seq": 3,
+            "position": 4,
+            "mark": "X",
+            "status": "in_progress",
+            "winner_id": None,
+        }
+
+        await websocket_manager.notify_moves([event])
+        await websocket_manager.drain()
+
+        mock_redis_manager.get_game_observers_many.assert_called_once_with([7])
+        websocket.send_text.assert_called_once_with(
+            json.dumps({"type": "move", "data": event})
+        )
+
+    @pytest.mark.asyncio
+    async def test_join_sends_snapshot(
+        self, snapshot_manager, mock_websocket, snapshot
+    ):
+        """Test joining a game starts from a full snapshot"""
+        await snapshot_manager.connect(mock_websocket, 1)
+
+        await snapshot_manager.handle_message(
+            1,
+            WebSocketMessage(type="join_game", data={"game_id": 7}),
+            snapshot_manager.user_connections[1],
+        )
+        await snapshot_manager.drain()
+
+        snapshot_manager.snapshot_loader.assert_called_once_with(7)
+        sent = [json.loads(c.args[0]) for c in mock_websocket.send_text.call_args_list]
+        assert sent[0] == {
+            "type": "game_update",
+            "data": {"game_id": 7, "game": snapshot},
+        }
+
+    @pytest.mark.asyncio
+    async def test_resync_sends_snapshot(
+        self, snapshot_manager, mock_websocket, snapshot
+    ):
+        """Test a client that saw a sequence gap can ask for a snapshot"""
+        await snapshot_manager.connect(mock_websocket, 1)
+
+        await snapshot_manager.handle_message(
+            1,
+            WebSocketMessage(type="resync_game", data={"game_id": 7}),
+            snapshot_manager.user_connections[1],
+        )
+        await snapshot_manager.drain()
+
+        mock_websocket.send_text.assert_called_once_with(
+            json.dumps(
+                {"type": "game_update", "data": {"game_id": 7, "game": snapshot}}
+            )
+        )
+
+    @pytest.mark.asyncio
+    async def test_resync_unknown_game(self, snapshot_manager, mock_websocket):
+        """Test nothing is sent for a missing game or game id"""
+        await snapshot_manager.connect(mock_websocket, 1)
+
+        await snapshot_manager.handle_message(
+            1,
+            WebSocketMessage(type="resync_game", data={"game_id": 99}),
+            snapshot_manager.user_connections[1],
+        )
+        await snapshot_manager.handle_message(
+            1,
+            WebSocketMessage(type="resync_game", data={}),
+            snapshot_manager.user_connections[1],
+        )
+        await snapshot_manager.drain()
+
+        mock_websocket.send_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_no_snapshot_without_loader(self, websocket_manager, mock_websocket):
+        """Test joining still works when no snapshot loader is set"""
+        await websocket_manager.connect(mock_websocket, 1)
+
+        await websocket_manager._send_snapshot(1, 7)
+        await websocket_manager.drain()
+
+        mock_websocket.send_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_resync_games(self, snapshot_manager, mock_redis_manager, snapshot):
+        """Test observers of games changed elsewhere get their full state"""
+        snapshot_manager.broadcast_to_games = AsyncMock()
+
+        await snapshot_manager.resync_games([7, 99])
+
+        snapshot_manager.broadcast_to_games.assert_awaited_once_with(
+            [({"type": "game_update", "data": {"game_id": 7, "game": snapshot}}, 7)]
+        )
+
+
+class TestWebSocketMoves:
+    """Test making moves over the socket"""
+
+    @pytest.fixture
+    def game(self):
+        """Game state returned after a move"""
+        return {"id": 7, "board_state": [""] * 4 + ["X"] + [""] * 4}
+
+    @pytest.fixture
+    def move_manager(self, websocket_manager, game):
+        """WebSocket manager with a move handler"""
+        websocket_manager.move_handler = AsyncMock(
+            return_value=(game, "Move successful")
+        )
+        return websocket_manager
+
+    async def _make_move(self, manager, websocket, data):
+        await manager.handle_message(
+            1,
+            WebSocketMessage(type="make_move", data=data),
+            manager.user_connections[1],
+        )
+        await manager.drain()
+        return json.loads(websocket.send_text.call_args.args[0])
+
+    @pytest.mark.asyncio
+    async def test_make_move_ack(self, move_manager, mock_websocket, game):
+        """Test an authenticated move is applied and acknowledged"""
+        await move_manager.connect(mock_websocket, 1, authenticated=True)
+
+        ack = await self._make_move(
+            move_manager,
+            mock_websocket,
+            {"game_id": 7, "position": 4, "request_id": "r1"},
+        )
+
+        move_manager.move_handler.assert_called_once_with(1, 7, 4)
+        assert ack == {
+            "type": "move_ack",
+            "data": {
+                "game_id": 7,
+                "request_id": "r1",
+                "ok": True,
+                "message": "Move successful",
+                "game": game,
+            },
+        }
+
+    @pytest.mark.asyncio
+    async def test_make_move_rejected_by_game(self, move_manager, mock_websocket):
+        """Test a refused move is acknowledged with the reason"""
+        move_manager.move_handler.return_value = (None, "Not your turn")
+        await move_manager.connect(mock_websocket, 1, authenticated=True)
+
+        ack = await self._make_move(
+            move_manager, mock_websocket, {"game_id": 7, "position": 4}
+        )
+
+        assert ack["data"]["ok"] is False
+        assert ack["data"]["message"] == "Not your turn"
+        assert ack["data"]["game"] is None
+
+    @pytest.mark.asyncio
+    async def test_make_move_requires_authentication(
+        self, move_manager, mock_websocket
+    ):
+        """Test connections without a token can't move"""
+        await move_manager.connect(mock_websocket, 1)
+
+        ack = await self._make_move(
+            move_manager, mock_websocket, {"game_id": 7, "position": 4}
+        )
+
+        move_manager.move_handler.assert_not_called()
+        assert ack["data"]["ok"] is False
+        assert ack["data"]["message"] == "Not authenticated"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "data", [{"game_id": 7, "position": 9}, {"game_id": 7}, {"position": 4}]
+    )
+    async def test_make_move_invalid(self, move_manager, mock_websocket, data):
+        """Test malformed moves are refused before reaching the game"""
+        await move_manager.connect(mock_websocket, 1, authenticated=True)
+
+        ack = await self._make_move(move_manager, mock_websocket, data)
+
+        move_manager.move_handler.assert_not_called()
+        assert ack["data"]["message"] == "Invalid move"
+
+    @pytest.mark.asyncio
+    async def test_make_move_without_handler(self, websocket_manager, mock_websocket):
+        """Test moves are refused when no handler is configured"""
+        await websocket_manager.connect(mock_websocket, 1, authenticated=True)
+
+        ack = await self._make_move(
+            websocket_manager, mock_websocket, {"game_id": 7, "position": 4}
+        )
+
+        assert ack["data"]["ok"] is False
+
+    @pytest.mark.asyncio
+    async def test_authentication_belongs_to_the_connection(
+        self, websocket_manager, mock_websocket
+    ):
+        """Test authentication is dropped with the connection that proved it"""
+        first = await websocket_manager.connect(mock_websocket, 1, authenticated=True)
+        assert websocket_manager.authenticated_connections == {first}
+
+        second = await websocket_manager.connect(mock_websocket, 1)
+        assert websocket_manager.authenticated_connections == set()
+
+        third = await websocket_manager.connect(mock_websocket, 1, authenticated=True)
+        # The replaced socket closing leaves the current connection alone
+        await websocket_manager.disconnect(1, second)
+        assert websocket_manager.user_connections[1] == third
+        await websocket_manager.disconnect(1, third)
+        assert websocket_manager.authenticated_connections == set()
+        assert 1 not in websocket_manager.user_connections
+
+    @pytest.mark.asyncio
+    async def test_unauthenticated_socket_cannot_borrow_authentication(
+        self, move_manager, mock_websocket
+    ):
+        """Test a socket without a token can't move as the user it names,
+        and messages from a replaced socket are dropped"""
+        authenticated = await move_manager.connect(
+            mock_websocket, 1, authenticated=True
+        )
+        other = Mock(spec=WebSocket)
+        other.accept = AsyncMock()
+        other.send_text = AsyncMock()
+        unauthenticated = await move_manager.connect(other, 1)
+        move = WebSocketMessage(type="make_move", data={"game_id": 7, "position": 4})
+
+        await move_manager.handle_message(1, move, authenticated)
+        await move_manager.handle_message(1, move, unauthenticated)
+        await move_manager.drain()
+
+        move_manager.move_handler.assert_not_called()
+        mock_websocket.send_text.assert_not_called()
+        ack = json.loads(other.send_text.call_args.args[0])
+        assert ack["data"]["message"] == "Not authenticated"
+
+    @pytest.mark.asyncio
+    async def test_broadcast_to_games_reads_observers_once(
+        self, websocket_manager, mock_redis_manager, mock_websocket
+    ):
+        """Test a batch of game messages costs one observers lookup"""
+        mock_redis_manager.get_game_observers_many = AsyncMock(
+            return_value={7: {1}, 8: set()}
+        )
+        await websocket_manager.connect(mock_websocket, 1)
+
+        await websocket_manager.broadcast_to_games(
+            [({"seq": 1}, 7), ({"seq": 2}, 8), ({"seq": 3}, 7)]
+        )
+        await websocket_manager.drain()
+
+        mock_redis_manager.get_game_observers_many.assert_awaited_once_with([7, 8])
+        sent = [json.loads(c.args[0]) for c in mock_websocket.send_text.call_args_list]
+        assert sent == [{"seq": 1}, {"seq": 3}]
+
+    @pytest.mark.asyncio
+    async def test_broadcast_to_games_publishes_once(
+        self, websocket_manager, mock_redis_manager
+    ):
+        """Test a batch of game messages is published in one call"""
+        mock_redis_manager.publish_many = AsyncMock()
+        websocket_manager._listener = Mock()
+
+        await websocket_manager.broadcast_to_games([({"seq": 1}, 7), ({"seq": 2}, 8)])
+
+        mock_redis_manager.publish_many.assert_awaited_once_with(
+            [("ws:game:7", '{"seq": 1}'), ("ws:game:8", '{"seq": 2}')]
+        )
+
+    @pytest.mark.asyncio
+    async def test_notify_moves_finished_game(self, websocket_manager):
+        """Test a finished game is sent as removed from the games list"""
+        websocket_manager.broadcast_to_games = AsyncMock()
+        events = [
+            {"game_id": 7, "seq": 5, "status": "in_progress"},
+            {"game_id": 7, "seq": 6, "status": "completed"},
+        ]
+
+        await websocket_manager.notify_moves(events)
+
+        websocket_manager.broadcast_to_games.assert_awaited_once_with(
+            [({"type": "move", "data": event}, 7) for event in events]
+        )
+        assert websocket_manager._lobby_changes == {7: None}
+        await websocket_manager.flush_lobby()
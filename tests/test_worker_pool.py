@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from app.services.worker_pool import BoundedWorkerPool, WorkerPoolFullError
+
+
+class TestBoundedWorkerPool:
+    """Test blocking calls on a bounded pool of threads"""
+
+    @pytest.mark.asyncio
+    async def test_run(self):
+        """Test calls run on a worker thread and are no longer pending after"""
+        pool = BoundedWorkerPool("test-pool", max_workers=1, max_pending=1)
+        try:
+            name = await pool.run(lambda: threading.current_thread().name)
+
+            assert name.startswith("test-pool")
+            assert pool.pending == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_full(self):
+        """Test calls beyond max_pending are refused without starting threads"""
+        pool = BoundedWorkerPool("test-pool", max_workers=1, max_pending=0)
+
+        with pytest.raises(WorkerPoolFullError):
+            await pool.run(time.time)
+
+        assert pool._executor is None
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """Test a call over its timeout raises and frees its place"""
+        pool = BoundedWorkerPool("test-pool", max_workers=1, max_pending=1)
+        try:
+            with pytest.raises(TimeoutError):
+                await pool.run(time.sleep, 0.2, timeout=0.01)
+
+            assert pool.pending == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_recreates_executor(self):
+        """Test the pool keeps working after shutdown"""
+        pool = BoundedWorkerPool("test-pool", max_workers=1, max_pending=1)
+        pool.shutdown()
+        assert await pool.run(sum, [1, 2]) == 3
+        pool.shutdown()
+        assert pool._executor is None